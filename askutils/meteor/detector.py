@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import contextlib
+import fcntl
 import json
 import os
 import re
+import multiprocessing
 import shutil
+import threading
+import time
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 
 import numpy as np
@@ -14,6 +20,12 @@ from PIL import Image
 from askutils import config
 
 
+# Schuetzt index.json / Journal gegen gleichzeitiges Schreiben (Dienst + Upload-Thread);
+# die Dateisperre in _index_lock() zusaetzlich gegen den Upload-Worker-Prozess
+_INDEX_LOCK = threading.RLock()
+_index_lock_depth = 0
+
+
 def log(msg):
     print(msg, flush=True)
 
@@ -140,12 +152,94 @@ def _load_image_rgb(path):
     return np.array(img, dtype=np.uint8)
 
 
+def _load_image_gray(path, scale=1):
+    gray, _ = _load_frame(path, scale)
+    return gray
+
+
+def _load_frame(path, scale=1, keep_rgb=False):
+    # Pillow rechnet RGB -> L direkt in C (gleiche Festkomma-Formel wie _rgb_to_gray)
+    img = Image.open(path)
+
+    if keep_rgb and scale <= 1:
+        rgb = img.convert("RGB")
+        return np.asarray(rgb.convert("L"), dtype=np.uint8).astype(np.int16), rgb
+
+    if scale > 1:
+        full_width, full_height = img.size
+        target = ((full_width + scale - 1) // scale, (full_height + scale - 1) // scale)
+        # JPEG: DCT-Skalierung 1/2, 1/4, 1/8 direkt im Decoder
+        img.draft("L", target)
+        if img.size != target:
+            img = img.convert("L").reduce(scale)
+
+    img = img.convert("L")
+    return np.asarray(img, dtype=np.uint8).astype(np.int16), None
+
+
 def _rgb_to_gray(img):
-    return (
-        0.299 * img[:, :, 0] +
-        0.587 * img[:, :, 1] +
-        0.114 * img[:, :, 2]
-    ).astype(np.uint8)
+    # ITU-R 601-2 in 16.16-Festkomma, ohne float64-Zwischenergebnisse
+    acc = img[:, :, 0].astype(np.uint32) * 19595
+    acc += img[:, :, 1].astype(np.uint32) * 38470
+    acc += img[:, :, 2].astype(np.uint32) * 7471
+    acc += 0x8000
+    acc >>= 16
+    return acc.astype(np.uint8)
+
+
+class _FrameCache:
+    """
+    Kleines Schiebefenster fuer dekodierte Graustufenbilder (int16).
+
+    Schluessel ist (Pfad, mtime); bei Vergleich i wird das "aktuelle" Bild
+    in Vergleich i+1 als "vorheriges" Bild wiederverwendet. Mit keep_rgb
+    bleibt zusaetzlich das RGB-Bild fuer den Kandidaten-Export erhalten.
+    """
+
+    def __init__(self, capacity=2, scale=1, keep_rgb=False):
+        self.capacity = max(1, int(capacity))
+        self.scale = max(1, int(scale))
+        self.keep_rgb = bool(keep_rgb) and self.scale == 1
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._order = deque()
+
+    def get_gray(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        gray, rgb = _load_frame(path, self.scale, self.keep_rgb)
+
+        if path not in self._entries:
+            self._order.append(path)
+        self._entries[path] = (mtime, gray, rgb)
+
+        while len(self._order) > self.capacity:
+            self._entries.pop(self._order.popleft(), None)
+
+        return gray
+
+    def get_rgb(self, path):
+        # Nur aus dem Cache, kein erneutes Dekodieren
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        return entry[2]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "scale": self.scale,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (float(self.hits) / float(total)) if total > 0 else 0.0,
+        }
 
 
 def _create_circle_mask(height, width):
@@ -161,19 +255,205 @@ def _create_circle_mask(height, width):
 def _detect_positive_motion(img1, img2, threshold, circle_mask):
     gray1 = _rgb_to_gray(img1).astype(np.int16)
     gray2 = _rgb_to_gray(img2).astype(np.int16)
+    return _detect_positive_motion_gray(gray1, gray2, threshold, circle_mask)
+
 
+def _detect_positive_motion_gray(gray1, gray2, threshold, circle_mask, keep_mask=None):
     diff = gray2 - gray1
-    thresh = np.where(diff >= threshold, 255, 0).astype(np.uint8)
-    thresh = np.where(circle_mask, thresh, 0).astype(np.uint8)
+    hits = diff >= threshold
+    hits &= circle_mask
+    if keep_mask is not None:
+        hits &= keep_mask
+    thresh = hits.view(np.uint8) * np.uint8(255)
 
-    count = int(np.count_nonzero(thresh))
+    count = int(np.count_nonzero(hits))
     total_mask_pixels = int(np.count_nonzero(circle_mask))
     percent = (float(count) / float(total_mask_pixels) * 100.0) if total_mask_pixels > 0 else 0.0
 
     return count, percent, thresh
 
 
-def _find_connected_components(binary_mask):
+def _get_prefilter_scale():
+    # 0/1 = aus, sonst JPEG-Draft-Faktor 2, 4 oder 8.
+    # Mit METEOR_BACKGROUND_ENABLE: verworfene Paare fuehren das Hintergrundmodell
+    # nur jedes METEOR_BACKGROUND_PREFILTER_EVERY-te Bild nach (0 = gar nicht)
+    try:
+        scale = int(getattr(config, "METEOR_PREFILTER_SCALE", 0) or 0)
+    except Exception:
+        return 0
+    if scale in (2, 4, 8):
+        return scale
+    return 0
+
+
+def _get_prefilter_limits(scale):
+    threshold = int(getattr(config, "METEOR_THRESHOLD", 80))
+    min_pixels = int(getattr(config, "METEOR_MIN_PIXELS", 1200))
+
+    # Verkleinerung mittelt schmale Spuren aus -> niedrigere Schwellen als Standard
+    pre_threshold = getattr(config, "METEOR_PREFILTER_THRESHOLD", None)
+    pre_min_pixels = getattr(config, "METEOR_PREFILTER_MIN_PIXELS", None)
+
+    if pre_threshold is None:
+        pre_threshold = max(1, threshold // 2)
+    if pre_min_pixels is None:
+        pre_min_pixels = max(1, min_pixels // (scale * scale * 4))
+
+    return int(pre_threshold), int(pre_min_pixels)
+
+
+def _encode_runs(binary_mask):
+    # Zeilenweise Lauflaengen: (Zeile, Start, Ende exklusiv), sortiert nach Zeile/Start
+    h, w = binary_mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = binary_mask > 0
+
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    return start_rows.astype(np.int64), starts.astype(np.int64), ends.astype(np.int64)
+
+
+def _link_runs(rows, starts, ends, width):
+    # Paare von Laeufen in benachbarten Zeilen, die sich 8-zusammenhaengend beruehren
+    stride = int(width) + 2
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+
+    upper_rows = rows - 1
+    lo = np.searchsorted(end_keys, upper_rows * stride + starts, side="left")
+    hi = np.searchsorted(start_keys, upper_rows * stride + ends, side="right")
+
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    lower = np.repeat(np.arange(len(rows), dtype=np.int64), counts)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    upper = np.repeat(lo, counts) + offsets
+    return upper, lower
+
+
+def _union_runs(n_runs, upper, lower):
+    # Union-Find ueber Kantenlisten: Wurzel ist immer der kleinste Laufindex
+    labels = np.arange(n_runs, dtype=np.int64)
+    if len(upper) == 0:
+        return labels
+
+    while True:
+        la = labels[upper]
+        lb = labels[lower]
+        unresolved = la != lb
+        if not np.any(unresolved):
+            break
+
+        la = la[unresolved]
+        lb = lb[unresolved]
+        np.minimum.at(labels, np.maximum(la, lb), np.minimum(la, lb))
+
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+    return labels
+
+
+def _label_runs(binary_mask):
+    rows, starts, ends = _encode_runs(binary_mask)
+    upper, lower = _link_runs(rows, starts, ends, binary_mask.shape[1])
+    roots = _union_runs(len(rows), upper, lower)
+
+    # Wurzeln sind minimale Laufindizes -> np.unique liefert Rasterreihenfolge
+    _, run_labels = np.unique(roots, return_inverse=True)
+    n_labels = int(run_labels.max()) + 1 if len(run_labels) else 0
+    return rows, starts, ends, run_labels.reshape(-1), n_labels
+
+
+def _line_fit_runs(rows, starts, ends, run_labels, n_labels):
+    # Zweite Momente je Label direkt aus den Laeufen (ohne Pixelkoordinaten):
+    # Summen x, x^2 ueber einen Lauf [s, e) geschlossen, y ist je Lauf konstant
+    n = (ends - starts).astype(np.float64)
+    s = starts.astype(np.float64)
+    last = ends.astype(np.float64) - 1.0
+    y = rows.astype(np.float64)
+
+    sum_x = n * (s + last) * 0.5
+    sum_xx = (last * (last + 1.0) * (2.0 * last + 1.0) - (s - 1.0) * s * (2.0 * s - 1.0)) / 6.0
+
+    area = np.bincount(run_labels, weights=n, minlength=n_labels)
+    mx = np.bincount(run_labels, weights=sum_x, minlength=n_labels) / area
+    my = np.bincount(run_labels, weights=n * y, minlength=n_labels) / area
+    cxx = np.bincount(run_labels, weights=sum_xx, minlength=n_labels) / area - mx * mx
+    cyy = np.bincount(run_labels, weights=n * y * y, minlength=n_labels) / area - my * my
+    cxy = np.bincount(run_labels, weights=sum_x * y, minlength=n_labels) / area - mx * my
+
+    # Pixel als Flaeche (Varianz 1/12), damit einpixelige Linien endlich bleiben
+    cxx = np.maximum(cxx, 0.0) + 1.0 / 12.0
+    cyy = np.maximum(cyy, 0.0) + 1.0 / 12.0
+
+    half_trace = (cxx + cyy) * 0.5
+    root = np.sqrt(((cxx - cyy) * 0.5) ** 2 + cxy * cxy)
+    major = half_trace + root
+    minor = np.maximum(half_trace - root, 1.0 / 12.0)
+
+    return {
+        "elongation": np.sqrt(major / minor),
+        "orientation_deg": np.degrees(0.5 * np.arctan2(2.0 * cxy, cxx - cyy)),
+        "fit_residual": np.sqrt(minor),
+        "line_length": np.sqrt(12.0 * major),
+    }
+
+
+def _find_connected_components(binary_mask, line_fit=True):
+    rows, starts, ends, run_labels, n_labels = _label_runs(binary_mask)
+    if n_labels == 0:
+        return []
+
+    areas = np.bincount(run_labels, weights=ends - starts, minlength=n_labels).astype(np.int64)
+
+    min_x = np.full(n_labels, np.iinfo(np.int64).max, dtype=np.int64)
+    max_x = np.full(n_labels, -1, dtype=np.int64)
+    min_y = np.full(n_labels, np.iinfo(np.int64).max, dtype=np.int64)
+    max_y = np.full(n_labels, -1, dtype=np.int64)
+
+    np.minimum.at(min_x, run_labels, starts)
+    np.maximum.at(max_x, run_labels, ends - 1)
+    np.minimum.at(min_y, run_labels, rows)
+    np.maximum.at(max_y, run_labels, rows)
+
+    widths = max_x - min_x + 1
+    heights = max_y - min_y + 1
+    long_sides = np.maximum(widths, heights)
+    short_sides = np.maximum(1, np.minimum(widths, heights))
+    aspect_ratios = long_sides.astype(np.float64) / short_sides.astype(np.float64)
+
+    keys = ["area", "min_x", "max_x", "min_y", "max_y", "width", "height", "long_side", "short_side",
+            "aspect_ratio"]
+    arrays = [areas, min_x, max_x, min_y, max_y, widths, heights, long_sides, short_sides, aspect_ratios]
+
+    columns = [a.tolist() for a in arrays]
+    components = [dict(zip(keys, values)) for values in zip(*columns)]
+
+    if line_fit:
+        # Linienfit nur fuer Komponenten, die den Flaechenfilter ueberstehen koennen
+        min_area = int(getattr(config, "METEOR_MIN_BLOB_PIXELS", 25))
+        fit = _line_fit_runs(rows, starts, ends, run_labels, n_labels)
+        fit_keys = ("elongation", "orientation_deg", "fit_residual", "line_length")
+        idx = np.flatnonzero(areas >= min_area)
+        fit_columns = [np.round(fit[key][idx], 3).tolist() for key in fit_keys]
+        for i, values in zip(idx.tolist(), zip(*fit_columns)):
+            components[i].update(zip(fit_keys, values))
+
+    return components
+
+
+def _find_connected_components_bfs(binary_mask):
+    # Referenzimplementierung (Pixel-BFS), nur noch fuer Vergleich/Benchmark
     h, w = binary_mask.shape
     visited = np.zeros((h, w), dtype=np.uint8)
     components = []
@@ -244,19 +524,43 @@ def _filter_line_components(components):
     min_blob_pixels = int(getattr(config, "METEOR_MIN_BLOB_PIXELS", 25))
     min_line_length = int(getattr(config, "METEOR_MIN_LINE_LENGTH", 20))
     min_aspect_ratio = float(getattr(config, "METEOR_MIN_ASPECT_RATIO", 4.0))
+    min_elongation = float(getattr(config, "METEOR_MIN_ELONGATION", min_aspect_ratio))
+    max_fit_residual = float(getattr(config, "METEOR_MAX_FIT_RESIDUAL", 3.0))
 
     good = []
     for c in components:
         if c["area"] < min_blob_pixels:
             continue
-        if c["long_side"] < min_line_length:
+        if max(c["long_side"], c.get("line_length", 0)) < min_line_length:
             continue
         if c["aspect_ratio"] < min_aspect_ratio:
-            continue
+            # Diagonale Spuren: Bounding-Box fast quadratisch, Linienfit entscheidet
+            if c.get("elongation", 0.0) < min_elongation:
+                continue
+            if c.get("fit_residual", max_fit_residual + 1.0) > max_fit_residual:
+                continue
         good.append(c)
     return good
 
 
+def _line_fit_summary(component):
+    if not component or "elongation" not in component:
+        return None
+    return {
+        "elongation": component["elongation"],
+        "orientation_deg": component["orientation_deg"],
+        "fit_residual": component["fit_residual"],
+        "line_length": component["line_length"],
+        "min_elongation": float(getattr(config, "METEOR_MIN_ELONGATION",
+                                        getattr(config, "METEOR_MIN_ASPECT_RATIO", 4.0))),
+        "max_fit_residual": float(getattr(config, "METEOR_MAX_FIT_RESIDUAL", 3.0)),
+    }
+
+
+def _line_score(c):
+    return max(c["aspect_ratio"], c.get("elongation", 0.0))
+
+
 def _resize_image(img_pil, target_width):
     if not target_width:
         return img_pil.copy()
@@ -267,6 +571,22 @@ def _resize_image(img_pil, target_width):
     return img_pil.resize((int(target_width), int(new_height)), Image.BILINEAR)
 
 
+def _resize_pyramid(img_pil, widths):
+    # Jede Stufe aus der kleinsten bereits vorhandenen Stufe, die noch gross genug ist
+    levels = {}
+    source = img_pil
+    for width in sorted(set(int(w or 0) for w in widths), reverse=True):
+        if not width:
+            levels[width] = img_pil
+            continue
+        if source.width <= width:
+            levels[width] = source
+            continue
+        levels[width] = _resize_image(source, width)
+        source = levels[width]
+    return levels
+
+
 def _draw_boxes_on_image(img_pil, components):
     arr = np.array(img_pil.convert("RGB"), dtype=np.uint8)
     h, w = arr.shape[:2]
@@ -309,7 +629,30 @@ def _candidate_uploaded_marker(day_dir_name, candidate_id):
     return os.path.join(_candidate_dir(day_dir_name, candidate_id), "uploaded.ok")
 
 
-def _save_candidate(day_dir_name, prev_path, curr_path, diff_img, pixel_count, pixel_percent, line_components):
+def _scale_components(components, factor):
+    if factor == 1.0:
+        return components
+    scaled = []
+    for c in components:
+        scaled.append({
+            "min_x": int(c["min_x"] * factor),
+            "max_x": int(c["max_x"] * factor),
+            "min_y": int(c["min_y"] * factor),
+            "max_y": int(c["max_y"] * factor),
+        })
+    return scaled
+
+
+def _get_save_threads():
+    try:
+        return max(1, int(getattr(config, "METEOR_SAVE_THREADS", 3)))
+    except Exception:
+        return 3
+
+
+def _save_candidate(day_dir_name, prev_path, curr_path, diff_img, pixel_count, pixel_percent, line_components,
+                    prev_img=None, curr_img=None):
+    started = time.perf_counter()
     kamera = _get_kamera_id()
     fullhd_width = int(getattr(config, "METEOR_FULLHD_WIDTH", 1920))
     small_width = int(getattr(config, "METEOR_SMALL_WIDTH", 640))
@@ -328,31 +671,52 @@ def _save_candidate(day_dir_name, prev_path, curr_path, diff_img, pixel_count, p
     _safe_mkdir(candidate_dir)
     _safe_mkdir(quicklook_dir)
 
-    prev_img = Image.open(prev_path).convert("RGB")
-    curr_img = Image.open(curr_path).convert("RGB")
-    diff_pil = Image.fromarray(diff_img)
-    boxed_pil = _draw_boxes_on_image(curr_img, line_components)
+    # Bereits dekodierte Bilder aus der Erkennung wiederverwenden
+    if prev_img is None:
+        prev_img = Image.open(prev_path).convert("RGB")
+    if curr_img is None:
+        curr_img = Image.open(curr_path).convert("RGB")
+
+    curr_levels = _resize_pyramid(curr_img, [fullhd_width, small_width])
+    prev_small = _resize_image(prev_img, prev_small_width)
+    diff_small = _resize_image(Image.fromarray(diff_img), diff_width)
+
+    # Boxen auf der groessten benoetigten Stufe zeichnen statt auf dem Vollbild
+    boxed_base_width = max(boxed_width, small_width)
+    boxed_base = _resize_pyramid(curr_levels[fullhd_width], [boxed_base_width])[boxed_base_width]
+    factor = float(boxed_base.width) / float(curr_img.width)
+    boxed_levels = _resize_pyramid(
+        _draw_boxes_on_image(boxed_base, _scale_components(line_components, factor)),
+        [boxed_width, small_width]
+    )
 
     curr_fullhd_name = "current_fullhd.jpg"
     curr_small_name = "current_small.jpg"
     prev_small_name = "previous_small.jpg"
     diff_small_name = "diff_small.jpg"
     boxed_small_name = "boxed_small.jpg"
-
-    _resize_image(curr_img, fullhd_width).save(os.path.join(candidate_dir, curr_fullhd_name), quality=90)
-    _resize_image(curr_img, small_width).save(os.path.join(candidate_dir, curr_small_name), quality=85)
-    _resize_image(prev_img, prev_small_width).save(os.path.join(candidate_dir, prev_small_name), quality=85)
-    _resize_image(diff_pil, diff_width).save(os.path.join(candidate_dir, diff_small_name), quality=85)
-    _resize_image(boxed_pil, boxed_width).save(os.path.join(candidate_dir, boxed_small_name), quality=85)
-
     quicklook_name = candidate_id + "_small.jpg"
-    _resize_image(boxed_pil, small_width).save(os.path.join(quicklook_dir, quicklook_name), quality=85)
+
+    jobs = [
+        (curr_levels[fullhd_width], os.path.join(candidate_dir, curr_fullhd_name), 90),
+        (curr_levels[small_width], os.path.join(candidate_dir, curr_small_name), 85),
+        (prev_small, os.path.join(candidate_dir, prev_small_name), 85),
+        (diff_small, os.path.join(candidate_dir, diff_small_name), 85),
+        (boxed_levels[boxed_width], os.path.join(candidate_dir, boxed_small_name), 85),
+        (boxed_levels[small_width], os.path.join(quicklook_dir, quicklook_name), 85),
+    ]
+
+    # JPEG-Encoder gibt den GIL frei -> Encodes parallel
+    with ThreadPoolExecutor(max_workers=_get_save_threads()) as pool:
+        futures = [pool.submit(img.save, path, quality=quality) for img, path, quality in jobs]
+        for future in futures:
+            future.result()
 
     best = None
     if line_components:
         best = sorted(
             line_components,
-            key=lambda c: (c["aspect_ratio"], c["long_side"], c["area"]),
+            key=lambda c: (_line_score(c), c["long_side"], c["area"]),
             reverse=True
         )[0]
 
@@ -374,6 +738,7 @@ def _save_candidate(day_dir_name, prev_path, curr_path, diff_img, pixel_count, p
         "min_aspect_ratio": float(getattr(config, "METEOR_MIN_ASPECT_RATIO", 4.0)),
         "line_components": line_components,
         "best_line": best,
+        "line_fit": _line_fit_summary(best),
         "uploaded": False,
         "uploaded_utc": None,
         "files": {
@@ -387,10 +752,64 @@ def _save_candidate(day_dir_name, prev_path, curr_path, diff_img, pixel_count, p
     }
 
     _write_json(_candidate_json_path(day_dir_name, candidate_id), candidate_data)
-    return candidate_id
+
+    save_ms = (time.perf_counter() - started) * 1000.0
+    log("Meteor: Kandidat %s gespeichert in %.0f ms" % (candidate_id, save_ms))
+    return candidate_data, save_ms
+
+
+def _get_day_journal_path(day_dir_name):
+    return os.path.join(_get_day_output_dir(day_dir_name), "index.journal.jsonl")
+
+
+def _index_entry(data):
+    return {
+        "candidate_id": data.get("candidate_id"),
+        "source_current_image": data.get("source_current_image"),
+        "source_previous_image": data.get("source_previous_image"),
+        "source_time": data.get("source_time"),
+        "pixel_count": data.get("pixel_count"),
+        "pixel_percent": data.get("pixel_percent"),
+        "best_line": data.get("best_line"),
+        "uploaded": data.get("uploaded", False),
+        "uploaded_utc": data.get("uploaded_utc"),
+        "files": data.get("files", {}),
+    }
+
+
+def _write_day_index(day_dir_name, candidates):
+    index_data = {
+        "kamera": _get_kamera_id(),
+        "day": day_dir_name,
+        "updated_utc": _utc_now_iso(),
+        "candidate_count": len(candidates),
+        "candidates": candidates,
+    }
+
+    _write_json(_get_day_index_path(day_dir_name), index_data)
+
+
+@contextlib.contextmanager
+def _index_lock():
+    global _index_lock_depth
+    with _INDEX_LOCK:
+        lock_fh = None
+        if _index_lock_depth == 0:
+            _safe_mkdir(_get_output_dir())
+            lock_fh = open(os.path.join(_get_output_dir(), ".index.lock"), "a")
+            fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        _index_lock_depth += 1
+        try:
+            yield
+        finally:
+            _index_lock_depth -= 1
+            if lock_fh is not None:
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+                lock_fh.close()
 
 
 def _rebuild_day_index(day_dir_name):
+    # Vollstaendiger Neuaufbau aus allen candidate.json (Reparatur / alte Tage ohne Index)
     day_output_dir = _get_day_output_dir(day_dir_name)
     _safe_mkdir(day_output_dir)
 
@@ -410,41 +829,601 @@ def _rebuild_day_index(day_dir_name):
         if not isinstance(data, dict):
             continue
 
-        candidates.append({
-            "candidate_id": data.get("candidate_id"),
-            "source_current_image": data.get("source_current_image"),
-            "source_previous_image": data.get("source_previous_image"),
-            "source_time": data.get("source_time"),
-            "pixel_count": data.get("pixel_count"),
-            "pixel_percent": data.get("pixel_percent"),
-            "best_line": data.get("best_line"),
-            "uploaded": data.get("uploaded", False),
-            "uploaded_utc": data.get("uploaded_utc"),
-            "files": data.get("files", {}),
-        })
+        candidates.append(_index_entry(data))
 
-    index_data = {
-        "kamera": _get_kamera_id(),
-        "day": day_dir_name,
-        "updated_utc": _utc_now_iso(),
-        "candidate_count": len(candidates),
-        "candidates": candidates,
-    }
+    with _index_lock():
+        _write_day_index(day_dir_name, candidates)
+        journal = _get_day_journal_path(day_dir_name)
+        if os.path.isfile(journal):
+            os.remove(journal)
+
+    return candidates
 
-    _write_json(_get_day_index_path(day_dir_name), index_data)
+
+def _read_journal(day_dir_name):
+    journal = _get_day_journal_path(day_dir_name)
+    entries = []
+    if not os.path.isfile(journal):
+        return entries
+
+    with open(journal, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except Exception:
+                # abgebrochene letzte Zeile nach Absturz ignorieren
+                continue
+            if isinstance(entry, dict) and entry.get("candidate_id"):
+                entries.append(entry)
+    return entries
+
+
+def _apply_index_entries(candidates, entries):
+    by_id = {c.get("candidate_id"): c for c in candidates}
+    for entry in entries:
+        current = by_id.get(entry["candidate_id"])
+        if current is None:
+            by_id[entry["candidate_id"]] = dict(entry)
+        else:
+            current.update(entry)
+    return [by_id[k] for k in sorted(by_id, key=lambda k: str(k))]
+
+
+def _load_day_index(day_dir_name):
+    # index.json + noch nicht kompaktiertes Journal; fehlt der Index, einmal neu aufbauen
+    index_path = _get_day_index_path(day_dir_name)
+    data = _read_json(index_path, None)
+    if not isinstance(data, dict) or not isinstance(data.get("candidates"), list):
+        if not os.path.isdir(_get_day_output_dir(day_dir_name)):
+            return []
+        return _rebuild_day_index(day_dir_name)
+
+    return _apply_index_entries(data["candidates"], _read_journal(day_dir_name))
+
+
+def _use_index_journal():
+    return bool(getattr(config, "METEOR_INDEX_JOURNAL", False))
+
+
+def _compact_day_index(day_dir_name):
+    with _index_lock():
+        journal = _get_day_journal_path(day_dir_name)
+        if not os.path.isfile(journal):
+            return
+        candidates = _load_day_index(day_dir_name)
+        _write_day_index(day_dir_name, candidates)
+        os.remove(journal)
+
+
+def _update_day_index(day_dir_name, entries, compact=False):
+    """
+    Fuegt Kandidaten in index.json ein bzw. aktualisiert sie (Schluessel
+    candidate_id), ohne das Tagesverzeichnis neu einzulesen.
+
+    Mit METEOR_INDEX_JOURNAL werden Aenderungen zunaechst an
+    index.journal.jsonl angehaengt und erst bei compact=True oder ab
+    METEOR_INDEX_JOURNAL_MAX Zeilen in index.json uebernommen.
+    """
+    entries = [e for e in entries if e and e.get("candidate_id")]
+
+    with _index_lock():
+        _safe_mkdir(_get_day_output_dir(day_dir_name))
+
+        if _use_index_journal():
+            if entries:
+                with open(_get_day_journal_path(day_dir_name), "a", encoding="utf-8") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            max_lines = int(getattr(config, "METEOR_INDEX_JOURNAL_MAX", 200))
+            if not compact and len(_read_journal(day_dir_name)) < max_lines \
+                    and os.path.isfile(_get_day_index_path(day_dir_name)):
+                return
+            candidates = _load_day_index(day_dir_name)
+            _write_day_index(day_dir_name, candidates)
+            journal = _get_day_journal_path(day_dir_name)
+            if os.path.isfile(journal):
+                os.remove(journal)
+            return
+
+        if not entries and os.path.isfile(_get_day_index_path(day_dir_name)):
+            return
+        candidates = _apply_index_entries(_load_day_index(day_dir_name), entries)
+        _write_day_index(day_dir_name, candidates)
+
+
+def _pending_candidate_ids(day_dir_name):
+    return [
+        c.get("candidate_id")
+        for c in _load_day_index(day_dir_name)
+        if c.get("candidate_id") and not c.get("uploaded")
+    ]
 
 
 def _mark_candidate_uploaded(day_dir_name, candidate_id):
     candidate_json_path = _candidate_json_path(day_dir_name, candidate_id)
+    uploaded_utc = _utc_now_iso()
     data = _read_json(candidate_json_path, None)
     if isinstance(data, dict):
         data["uploaded"] = True
-        data["uploaded_utc"] = _utc_now_iso()
+        data["uploaded_utc"] = uploaded_utc
         _write_json(candidate_json_path, data)
 
     marker = _candidate_uploaded_marker(day_dir_name, candidate_id)
     with open(marker, "w", encoding="utf-8") as f:
-        f.write(_utc_now_iso() + "\n")
+        f.write(uploaded_utc + "\n")
+
+    return {"candidate_id": candidate_id, "uploaded": True, "uploaded_utc": uploaded_utc}
+
+
+def _block_sky(level, block):
+    # Grober Himmelshintergrund: Mittelwert je block x block Kachel, zurueck auf volle Groesse
+    h, w = level.shape
+    bh = (h + block - 1) // block
+    bw = (w + block - 1) // block
+    padded = np.pad(level, ((0, bh * block - h), (0, bw * block - w)), mode="edge")
+    tiles = padded.reshape(bh, block, bw, block).mean(axis=(1, 3), dtype=np.float32)
+    sky = np.repeat(np.repeat(tiles.astype(np.int16), block, axis=0), block, axis=1)
+    return sky[:h, :w]
+
+
+def _dilate3(mask):
+    out = mask.copy()
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    grown = out.copy()
+    grown[:, 1:] |= out[:, :-1]
+    grown[:, :-1] |= out[:, 1:]
+    return grown
+
+
+def _get_background_file():
+    return getattr(
+        config,
+        "METEOR_BACKGROUND_FILE",
+        os.path.join(_get_output_dir(), "background.npy")
+    )
+
+
+class _BackgroundModel:
+    """
+    Laufender Hintergrund je Pixel (exponentieller Mittelwert ueber ca.
+    METEOR_BACKGROUND_FRAMES Bilder, uint16 mit 8 Nachkommabits) als
+    memory-mapped .npy. Pixel, die dauerhaft deutlich heller als ihre
+    Umgebung sind (Sterne, Hotpixel), werden vor der Schwelle ausgeblendet.
+
+    persist=False (Worker-Prozesse): Datei nur lesen, Aenderungen bleiben privat.
+    Der Worker gibt Startstand, Endstand und Anzahl Schritte zurueck (export());
+    der Elternprozess rechnet die Bloecke in Reihenfolge ein (merge()), so dass
+    auch parallele Rueckstandslaeufe das gespeicherte Modell fortschreiben.
+
+    Mit Vorfilter (METEOR_PREFILTER_SCALE) wird das Modell auch bei verworfenen
+    Paaren nachgefuehrt: jedes METEOR_BACKGROUND_PREFILTER_EVERY-te verworfene
+    Bild wird voll dekodiert und mit dem Gewicht der uebersprungenen Bilder
+    eingerechnet (update(steps=n)).
+    """
+
+    def __init__(self, path, persist=True):
+        self.path = path
+        self.persist = bool(persist)
+        self.frames = max(1, int(getattr(config, "METEOR_BACKGROUND_FRAMES", 16)))
+        self.contrast = int(getattr(config, "METEOR_BACKGROUND_STAR_CONTRAST", 30))
+        self.block = max(2, int(getattr(config, "METEOR_BACKGROUND_BLOCK", 16)))
+        self.ema = None
+        self.base = None
+        self.steps = 0
+        self.keep_mask = None
+        self.masked_pixels = 0
+        self.updates = 0
+
+    def _open(self, shape):
+        if self.path and os.path.isfile(self.path):
+            try:
+                mode = "r+" if self.persist else "c"
+                ema = np.load(self.path, mmap_mode=mode)
+                if ema.shape == tuple(shape) and ema.dtype == np.uint16:
+                    return ema
+            except Exception as e:
+                log("Meteor: Hintergrundmodell unlesbar, neu angelegt: %s" % str(e))
+
+        if self.persist and self.path:
+            _safe_mkdir(os.path.dirname(self.path))
+            return np.lib.format.open_memmap(self.path, mode="w+", dtype=np.uint16, shape=tuple(shape))
+        return np.zeros(shape, dtype=np.uint16)
+
+    def _ensure(self, gray):
+        if self.ema is None or self.ema.shape != gray.shape:
+            self.ema = self._open(gray.shape)
+            if not np.any(self.ema):
+                self.ema[...] = gray.astype(np.uint16) << 8
+            self.keep_mask = None
+            if not self.persist:
+                # private Kopie: der Elternprozess schreibt die Datei waehrenddessen fort
+                self.ema = np.array(self.ema)
+                self.base = self.ema.copy()
+                self.steps = 0
+
+    def prepare(self, gray):
+        # Maske aus dem Stand VOR dem aktuellen Bild; einmal pro Bild
+        self._ensure(gray)
+
+        if self.keep_mask is None:
+            level = (self.ema >> 8).astype(np.int16)
+            stars = (level - _block_sky(level, self.block)) >= self.contrast
+            stars = _dilate3(stars)
+            self.masked_pixels = int(np.count_nonzero(stars))
+            self.keep_mask = ~stars
+
+        return self.keep_mask
+
+    def update(self, gray, steps=1):
+        # steps > 1: ersetzt steps einzelne Updates (Bilder dazwischen nicht dekodiert)
+        self._ensure(gray)
+        steps = max(1, min(int(steps), self.frames))
+        ema = self.ema.astype(np.int32)
+        ema += ((gray.astype(np.int32) << 8) - ema) * steps // self.frames
+        self.ema[...] = ema
+        self.updates += 1
+        self.steps += steps
+        self.keep_mask = None
+
+    def export(self):
+        # (Startstand, Endstand, Schritte) fuer merge() im Elternprozess
+        if self.ema is None or self.base is None or self.steps <= 0:
+            return None
+        return self.base, np.array(self.ema), self.steps
+
+    def merge(self, exported):
+        """
+        Endstand eines Workers auf den eigenen Stand umrechnen: der Worker
+        begann bei base, nach steps Schritten ist davon noch der Anteil
+        (1 - 1/frames)^steps uebrig -> durch den aktuellen Stand ersetzen.
+        """
+        base, ema, steps = exported
+        if self.ema is None or self.ema.shape != ema.shape:
+            self.ema = self._open(ema.shape)
+            if not np.any(self.ema):
+                self.ema[...] = base
+        decay = (1.0 - 1.0 / self.frames) ** steps
+        merged = ema.astype(np.float64) + (self.ema.astype(np.float64) - base) * decay
+        self.ema[...] = np.clip(np.rint(merged), 0, 65535).astype(np.uint16)
+        self.updates += steps
+        self.keep_mask = None
+
+    def flush(self):
+        if isinstance(self.ema, np.memmap) and self.persist:
+            self.ema.flush()
+
+    def close(self):
+        self.flush()
+        self.ema = None
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "masked_pixels": self.masked_pixels,
+        }
+
+
+class _PairDetector:
+    """
+    Vergleicht aufeinanderfolgende Bildpaare und speichert Kandidaten.
+
+    Haelt Frame-Caches, Kreismasken und Schwellwerte fuer eine Folge von
+    Paaren (seriell, pro Worker-Prozess oder im Dienstmodus).
+    """
+
+    def __init__(self, persist_background=True):
+        self.threshold = int(getattr(config, "METEOR_THRESHOLD", 80))
+        self.min_pixels = int(getattr(config, "METEOR_MIN_PIXELS", 1200))
+        # RGB der letzten beiden Bilder behalten, damit der Export nicht neu dekodiert
+        keep_rgb = bool(getattr(config, "METEOR_KEEP_RGB_FRAMES", True))
+        self.frame_cache = _FrameCache(capacity=2, keep_rgb=keep_rgb)
+        self.circle_mask = None
+        self.saved = 0
+        self.save_ms_total = 0.0
+        self.save_ms_max = 0.0
+
+        self.background = None
+        self.background_every = max(0, int(getattr(config, "METEOR_BACKGROUND_PREFILTER_EVERY", 4)))
+        self.background_pending = 0
+        if bool(getattr(config, "METEOR_BACKGROUND_ENABLE", False)):
+            self.background = _BackgroundModel(_get_background_file(), persist=persist_background)
+
+        self.prefilter_scale = _get_prefilter_scale()
+        self.prefilter_cache = None
+        self.prefilter_mask = None
+        self.prefilter_passed = 0
+        self.prefilter_rejected = 0
+        if self.prefilter_scale:
+            self.prefilter_cache = _FrameCache(capacity=2, scale=self.prefilter_scale)
+            self.prefilter_threshold, self.prefilter_min_pixels = _get_prefilter_limits(self.prefilter_scale)
+
+    def _prefilter_rejects(self, prev_path, curr_path):
+        small_prev = self.prefilter_cache.get_gray(prev_path)
+        small_curr = self.prefilter_cache.get_gray(curr_path)
+
+        if small_prev.shape != small_curr.shape:
+            return False
+
+        if self.prefilter_mask is None or self.prefilter_mask.shape != small_prev.shape:
+            self.prefilter_mask = _create_circle_mask(*small_prev.shape[:2])
+
+        small_count, _, _ = _detect_positive_motion_gray(
+            small_prev, small_curr, self.prefilter_threshold, self.prefilter_mask
+        )
+
+        if small_count < self.prefilter_min_pixels:
+            self.prefilter_rejected += 1
+            log("Meteor: Vorfilter verworfen %s | pixel=%s (1/%s)" % (
+                os.path.basename(curr_path), small_count, self.prefilter_scale
+            ))
+            return True
+
+        self.prefilter_passed += 1
+        return False
+
+    def _update_background_skipped(self, curr_path):
+        # Vom Vorfilter verworfene Bilder: ohne Nachfuehren lernt das Sternmodell
+        # nur aus den wenigen durchgelassenen Paaren und veraltet
+        if self.background is None or self.background_every <= 0:
+            return
+        self.background_pending += 1
+        if self.background_pending < self.background_every:
+            return
+        self.background.update(self.frame_cache.get_gray(curr_path), steps=self.background_pending)
+        self.background_pending = 0
+
+    def process(self, day_dir_name, prev_path, curr_path):
+        result = {
+            "image": os.path.basename(curr_path),
+            "status": "none",
+            "candidate_id": None,
+        }
+
+        try:
+            if self.prefilter_cache is not None and self._prefilter_rejects(prev_path, curr_path):
+                self._update_background_skipped(curr_path)
+                result["status"] = "prefilter"
+                return result
+
+            gray_prev = self.frame_cache.get_gray(prev_path)
+            gray_curr = self.frame_cache.get_gray(curr_path)
+
+            if gray_prev.shape != gray_curr.shape:
+                log("Meteor: unterschiedliche Bildgroessen, übersprungen: %s / %s" % (
+                    os.path.basename(prev_path),
+                    os.path.basename(curr_path)
+                ))
+                result["status"] = "size_mismatch"
+                return result
+
+            if self.circle_mask is None:
+                height, width = gray_prev.shape[:2]
+                self.circle_mask = _create_circle_mask(height, width)
+
+            keep_mask = None
+            if self.background is not None:
+                keep_mask = self.background.prepare(gray_prev)
+
+            pixel_count, pixel_percent, thresh = _detect_positive_motion_gray(
+                gray_prev, gray_curr, self.threshold, self.circle_mask, keep_mask
+            )
+
+            if self.background is not None:
+                self.background.update(gray_curr, steps=1 + self.background_pending)
+                self.background_pending = 0
+
+            components = _find_connected_components(thresh)
+            line_components = _filter_line_components(components)
+
+            if pixel_count >= self.min_pixels and len(line_components) > 0:
+                candidate_data, save_ms = _save_candidate(
+                    day_dir_name,
+                    prev_path,
+                    curr_path,
+                    thresh,
+                    pixel_count,
+                    pixel_percent,
+                    line_components,
+                    prev_img=self.frame_cache.get_rgb(prev_path),
+                    curr_img=self.frame_cache.get_rgb(curr_path),
+                )
+                candidate_id = candidate_data["candidate_id"]
+                self.saved += 1
+                self.save_ms_total += save_ms
+                self.save_ms_max = max(self.save_ms_max, save_ms)
+                result["status"] = "candidate"
+                result["candidate_id"] = candidate_id
+                result["index_entry"] = _index_entry(candidate_data)
+                log("Meteor: Kandidat erkannt %s | pixel=%s | lines=%s" % (
+                    candidate_id, pixel_count, len(line_components)
+                ))
+            else:
+                log("Meteor: kein Kandidat %s | pixel=%s | lines=%s" % (
+                    os.path.basename(curr_path), pixel_count, len(line_components)
+                ))
+
+        except Exception as e:
+            log("Meteor: Fehler bei %s: %s" % (os.path.basename(curr_path), str(e)))
+            result["status"] = "error"
+
+        return result
+
+    def flush(self):
+        if self.background is not None:
+            self.background.flush()
+
+    def close(self):
+        if self.background is not None:
+            self.background.close()
+
+    def stats(self):
+        return {
+            "background": self.background.stats() if self.background is not None else None,
+            "candidate_save": {
+                "count": self.saved,
+                "total_ms": round(self.save_ms_total, 1),
+                "max_ms": round(self.save_ms_max, 1),
+            },
+            "frame_cache": self.frame_cache.stats(),
+            "prefilter": {
+                "scale": self.prefilter_scale,
+                "passed": self.prefilter_passed,
+                "rejected": self.prefilter_rejected,
+                "frame_cache": self.prefilter_cache.stats() if self.prefilter_cache is not None else None,
+            },
+        }
+
+
+def _merge_stats(total, part):
+    # Zaehler aus mehreren _PairDetector.stats() aufsummieren
+    for key, value in part.items():
+        if isinstance(value, dict):
+            _merge_stats(total.setdefault(key, {}), value)
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            total.setdefault(key, value)
+        elif key in ("capacity", "scale", "masked_pixels"):
+            total[key] = value
+        elif key == "max_ms":
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def _finish_stats(stats):
+    for cache in (stats.get("frame_cache"), (stats.get("prefilter") or {}).get("frame_cache")):
+        if isinstance(cache, dict):
+            total = cache.get("hits", 0) + cache.get("misses", 0)
+            cache["hit_rate"] = (float(cache.get("hits", 0)) / float(total)) if total > 0 else 0.0
+    return stats
+
+
+def _get_worker_count():
+    # 1 = seriell, 0 = alle CPU-Kerne
+    try:
+        workers = int(getattr(config, "METEOR_WORKERS", 1))
+    except Exception:
+        workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _get_parallel_chunk_size():
+    try:
+        return max(1, int(getattr(config, "METEOR_PARALLEL_CHUNK_SIZE", 16)))
+    except Exception:
+        return 16
+
+
+def _process_pairs_serial(day_dir_name, pairs):
+    detector = _PairDetector()
+    results = [detector.process(day_dir_name, prev_path, curr_path) for prev_path, curr_path in pairs]
+    detector.close()
+
+    stats = _finish_stats(detector.stats())
+    stats["failed_pairs"] = 0
+    stats["last_processed_image"] = results[-1]["image"] if results else None
+    return results, stats
+
+
+def _process_pair_chunk(day_dir_name, pairs):
+    # Laeuft im Worker-Prozess; eigener Frame-Cache je zusammenhaengendem Block,
+    # Hintergrundmodell nur lesend (sonst schreiben mehrere Prozesse dieselbe Datei)
+    detector = _PairDetector(persist_background=False)
+    results = [detector.process(day_dir_name, prev_path, curr_path) for prev_path, curr_path in pairs]
+    background = detector.background.export() if detector.background is not None else None
+    detector.close()
+    return results, detector.stats(), background
+
+
+def _get_process_pool_context():
+    # fork: Worker erben die bereits geladene config ohne erneuten Secrets-Abruf
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _process_pairs_parallel(day_dir_name, pairs, workers, checkpoint):
+    chunk_size = _get_parallel_chunk_size()
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    log("Meteor: parallele Verarbeitung, %s Paare in %s Bloecken mit %s Workern" % (
+        len(pairs), len(chunks), workers
+    ))
+
+    done = {}
+    exports = {}
+    failed = set()
+    next_chunk = 0
+    last_processed_image = None
+    stats = {}
+
+    # Hintergrundmodell der Worker in Blockreihenfolge fortschreiben
+    background = None
+    if bool(getattr(config, "METEOR_BACKGROUND_ENABLE", False)):
+        background = _BackgroundModel(_get_background_file(), persist=True)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_get_process_pool_context()) as pool:
+        futures = {
+            pool.submit(_process_pair_chunk, day_dir_name, chunk): idx
+            for idx, chunk in enumerate(chunks)
+        }
+
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                chunk_results, chunk_stats, exports[idx] = future.result()
+            except Exception as e:
+                log("Meteor: Block %s fehlgeschlagen (%s .. %s): %s" % (
+                    idx,
+                    os.path.basename(chunks[idx][0][1]),
+                    os.path.basename(chunks[idx][-1][1]),
+                    str(e)
+                ))
+                failed.add(idx)
+                continue
+
+            done[idx] = chunk_results
+            _merge_stats(stats, chunk_stats)
+
+            # State nur ueber den lueckenlos abgeschlossenen Anfang vorruecken
+            advanced = []
+            while next_chunk in done and next_chunk not in failed:
+                if done[next_chunk]:
+                    last_processed_image = done[next_chunk][-1]["image"]
+                advanced.extend(done[next_chunk])
+                exported = exports.pop(next_chunk, None)
+                if background is not None and exported is not None:
+                    background.merge(exported)
+                next_chunk += 1
+
+            if advanced and last_processed_image:
+                if background is not None:
+                    background.flush()
+                checkpoint(last_processed_image, advanced)
+
+    if background is not None:
+        background.close()
+
+    results = []
+    for idx in range(next_chunk):
+        results.extend(done[idx])
+
+    if next_chunk < len(chunks):
+        log("Meteor: %s Paare nicht abgeschlossen, werden im naechsten Lauf wiederholt." % (
+            sum(len(c) for c in chunks[next_chunk:])
+        ))
+
+    stats = _finish_stats(stats)
+    stats["failed_pairs"] = sum(len(chunks[idx]) for idx in failed)
+    stats["last_processed_image"] = last_processed_image
+    return results, stats
 
 
 def _detect_candidates_for_day(day_dir_name):
@@ -468,8 +1447,9 @@ def _detect_candidates_for_day(day_dir_name):
             start_index = 1
 
     if len(image_paths) < 2:
-        state["last_day_dir"] = day_dir_name
-        state["last_processed_image"] = state_last_image
+        if not first_run_for_day:
+            state["last_day_dir"] = day_dir_name
+            state["last_processed_image"] = state_last_image
         state["last_run_utc"] = _utc_now_iso()
         state["mode"] = "initial_lookback" if first_run_for_day else "incremental"
         state["images_in_scope"] = len(image_paths)
@@ -495,73 +1475,54 @@ def _detect_candidates_for_day(day_dir_name):
             "comparisons": 0,
         }
 
-    threshold = int(getattr(config, "METEOR_THRESHOLD", 80))
-    min_pixels = int(getattr(config, "METEOR_MIN_PIXELS", 1200))
-
-    comparisons = 0
-    new_candidates = 0
-    circle_mask = None
-    last_processed_image = state_last_image
-
-    for i in range(start_index, len(image_paths)):
-        prev_path = image_paths[i - 1]
-        curr_path = image_paths[i]
-
-        try:
-            img_prev = _load_image_rgb(prev_path)
-            img_curr = _load_image_rgb(curr_path)
-
-            if img_prev.shape != img_curr.shape:
-                log("Meteor: unterschiedliche Bildgroessen, übersprungen: %s / %s" % (
-                    os.path.basename(prev_path),
-                    os.path.basename(curr_path)
-                ))
-                last_processed_image = os.path.basename(curr_path)
-                comparisons += 1
-                continue
+    pairs = [(image_paths[i - 1], image_paths[i]) for i in range(start_index, len(image_paths))]
+    workers = _get_worker_count()
 
-            if circle_mask is None:
-                height, width = img_prev.shape[:2]
-                circle_mask = _create_circle_mask(height, width)
+    indexed = set()
 
-            pixel_count, pixel_percent, thresh = _detect_positive_motion(
-                img_prev, img_curr, threshold, circle_mask
-            )
+    def index_results(part):
+        entries = [
+            r["index_entry"] for r in part
+            if r.get("index_entry") and r["candidate_id"] not in indexed
+        ]
+        _update_day_index(day_dir_name, entries)
+        indexed.update(e["candidate_id"] for e in entries)
 
-            components = _find_connected_components(thresh)
-            line_components = _filter_line_components(components)
+    def checkpoint(image_name, part=()):
+        # Erst die Kandidaten in den Index, dann den State vorruecken: nach einem
+        # Abbruch setzt der naechste Lauf hinter dem Checkpoint fort und sieht
+        # nicht indizierte Kandidaten sonst nie wieder (Upload liest nur den Index)
+        index_results(part)
+        state["last_day_dir"] = day_dir_name
+        state["last_processed_image"] = image_name
+        _save_state(state)
 
-            if pixel_count >= min_pixels and len(line_components) > 0:
-                candidate_id = _save_candidate(
-                    day_dir_name,
-                    prev_path,
-                    curr_path,
-                    thresh,
-                    pixel_count,
-                    pixel_percent,
-                    line_components
-                )
-                new_candidates += 1
-                log("Meteor: Kandidat erkannt %s | pixel=%s | lines=%s" % (
-                    candidate_id, pixel_count, len(line_components)
-                ))
-            else:
-                log("Meteor: kein Kandidat %s | pixel=%s | lines=%s" % (
-                    os.path.basename(curr_path), pixel_count, len(line_components)
-                ))
+    if workers > 1 and len(pairs) > _get_parallel_chunk_size():
+        if first_run_for_day:
+            # Startpunkt festhalten, damit ein Abbruch kein neues Lookback-Fenster ausloest
+            # (State des Vortags wuerde sonst mit dem neuen Tag kombiniert)
+            checkpoint(os.path.basename(pairs[0][0]))
+        results, stats = _process_pairs_parallel(day_dir_name, pairs, workers, checkpoint)
+    else:
+        workers = 1
+        results, stats = _process_pairs_serial(day_dir_name, pairs)
 
-            last_processed_image = os.path.basename(curr_path)
-            comparisons += 1
+    comparisons = len(results)
+    new_candidates = sum(1 for r in results if r.get("candidate_id"))
+    last_processed_image = stats.pop("last_processed_image", None)
+    if not last_processed_image and state_day == day_dir_name:
+        last_processed_image = state_last_image
 
-        except Exception as e:
-            log("Meteor: Fehler bei %s: %s" % (os.path.basename(curr_path), str(e)))
-            last_processed_image = os.path.basename(curr_path)
-            comparisons += 1
+    # Index vor dem State (siehe checkpoint)
+    index_results(results)
+    _compact_day_index(day_dir_name)
 
+    # Bild eines anderen Tages nie mit diesem Tag speichern: der naechste Lauf
+    # faende es nicht und finge beim ersten Bild des Tages an
     if last_processed_image:
+        state["last_day_dir"] = day_dir_name
         state["last_processed_image"] = last_processed_image
 
-    state["last_day_dir"] = day_dir_name
     state["last_run_utc"] = _utc_now_iso()
     state["mode"] = "initial_lookback" if first_run_for_day else "incremental"
     state["images_in_scope"] = len(image_paths)
@@ -569,8 +1530,6 @@ def _detect_candidates_for_day(day_dir_name):
     state["new_candidates"] = new_candidates
     _save_state(state)
 
-    _rebuild_day_index(day_dir_name)
-
     _write_runtime_status({
         "ok": True,
         "day": day_dir_name,
@@ -579,6 +1538,12 @@ def _detect_candidates_for_day(day_dir_name):
         "comparisons": comparisons,
         "new_candidates": new_candidates,
         "last_processed_image": state.get("last_processed_image"),
+        "workers": workers,
+        "frame_cache": stats.get("frame_cache"),
+        "prefilter": stats.get("prefilter"),
+        "background": stats.get("background"),
+        "candidate_save": stats.get("candidate_save"),
+        "failed_pairs": stats.get("failed_pairs", 0),
         "updated_utc": _utc_now_iso(),
     })
 
@@ -653,38 +1618,67 @@ def upload_pending_for_day(day_dir_name):
         from askutils.uploader.meteor_upload_api import upload_pending_meteor_candidates
     except Exception as e:
         log("Meteor: Upload-Modul konnte nicht geladen werden: %s" % str(e))
-        return
+        return False
 
     day_dir = _get_day_output_dir(day_dir_name)
     if not os.path.isdir(day_dir):
-        return
+        return True
+
+    # index.json wird mit hochgeladen -> Journal vorher uebernehmen
+    _compact_day_index(day_dir_name)
+    pending_ids = _pending_candidate_ids(day_dir_name)
+
+    # Marker vorhanden, Index noch nicht nachgezogen (z.B. Abbruch nach Upload)
+    already = [
+        candidate_id for candidate_id in pending_ids
+        if os.path.isfile(_candidate_uploaded_marker(day_dir_name, candidate_id))
+    ]
+    if already:
+        _update_day_index(day_dir_name, [
+            _index_entry(_read_json(_candidate_json_path(day_dir_name, candidate_id), {}) or {})
+            for candidate_id in already
+        ], compact=True)
+        pending_ids = [candidate_id for candidate_id in pending_ids if candidate_id not in already]
+
+    if not pending_ids:
+        return True
+
+    def _on_uploaded(ids):
+        # Bestaetigte Kandidaten sofort markieren (bei Sammel-Upload je Batch)
+        entries = [_mark_candidate_uploaded(day_dir_name, candidate_id) for candidate_id in ids]
+        _update_day_index(day_dir_name, entries, compact=True)
+
+    uploaded_ids = upload_pending_meteor_candidates(
+        day_dir_name, day_dir, candidate_ids=pending_ids, on_uploaded=_on_uploaded
+    )
+
+    return len(uploaded_ids) == len(pending_ids)
+
+def _queue_enabled():
+    try:
+        from askutils.uploader import upload_queue
+    except Exception:
+        return False
+    return upload_queue.is_enabled()
 
-    uploaded_ids = upload_pending_meteor_candidates(day_dir_name, day_dir)
 
-    if uploaded_ids:
-        for candidate_id in uploaded_ids:
-            _mark_candidate_uploaded(day_dir_name, candidate_id)
-        _rebuild_day_index(day_dir_name)
+def _enqueue_upload(day_dir_name):
+    # Upload-Worker uebernimmt; ein wartender Job pro Tag genuegt
+    from askutils.uploader import upload_queue
 
-def _has_pending_uploads(day_dir_name):
-    day_dir = _get_day_output_dir(day_dir_name)
-    if not os.path.isdir(day_dir):
-        return False
+    if upload_queue.has_pending("meteor", day_dir_name):
+        return
+    upload_queue.enqueue("meteor", day_dir_name, __name__, args={"day": day_dir_name})
 
-    for name in os.listdir(day_dir):
-        candidate_dir = os.path.join(day_dir, name)
-        if not os.path.isdir(candidate_dir):
-            continue
-        if name == "quicklook":
-            continue
 
-        candidate_json = os.path.join(candidate_dir, "candidate.json")
-        uploaded_ok = os.path.join(candidate_dir, "uploaded.ok")
+def upload_queued_job(args, files):
+    return upload_pending_for_day(args["day"])
 
-        if os.path.isfile(candidate_json) and not os.path.isfile(uploaded_ok):
-            return True
 
-    return False
+def _has_pending_uploads(day_dir_name):
+    if not os.path.isdir(_get_day_output_dir(day_dir_name)):
+        return False
+    return len(_pending_candidate_ids(day_dir_name)) > 0
 
 def run_meteor_detection_cycle():
     if not bool(getattr(config, "METEOR_ENABLE", False)):
@@ -711,7 +1705,10 @@ def run_meteor_detection_cycle():
     ))
 
     if _has_pending_uploads(active_day):
-        upload_pending_for_day(active_day)
+        if _queue_enabled():
+            _enqueue_upload(active_day)
+        else:
+            upload_pending_for_day(active_day)
     else:
         log("Meteor: keine offenen Uploads.")
 
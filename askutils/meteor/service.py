@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Meteor-Erkennung als Dauerdienst:
+# - ueberwacht das aktive Tagesverzeichnis per inotify (Fallback: Polling)
+# - vergleicht jedes neue image-YYYYMMDDHHMMSS.jpg mit dem Vorgaenger im Speicher
+# - State und last_run.json werden periodisch geschrieben
+
+import os
+import signal
+import threading
+import time
+
+from askutils import config
+from askutils.meteor import detector
+from askutils.utils import http_client
+from askutils.utils.filewatch import open_watcher
+from askutils.utils.latency import LatencyHistogram
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+class MeteorService:
+
+    def __init__(self):
+        self.poll_seconds = _cfg_float("METEOR_SERVICE_POLL_SECONDS", 0.5)
+        self.flush_seconds = _cfg_float("METEOR_SERVICE_FLUSH_SECONDS", 30.0)
+        self.day_check_seconds = _cfg_float("METEOR_SERVICE_DAY_CHECK_SECONDS", 30.0)
+        self.upload_interval_seconds = _cfg_float("METEOR_SERVICE_UPLOAD_INTERVAL_SECONDS", 300.0)
+        self.prefer_inotify = bool(getattr(config, "METEOR_SERVICE_INOTIFY", True))
+
+        self.stop_requested = False
+        self.day = None
+        self.watcher = None
+        self.prev_path = None
+        self.state = {}
+        self.pairs = None
+        self.latency = LatencyHistogram()
+
+        self.comparisons = 0
+        self.new_candidates = 0
+        self.index_entries = []
+        self.started_utc = detector._utc_now_iso()
+
+        self._upload_thread = None
+        self._last_flush = 0.0
+        self._last_day_check = 0.0
+        self._last_upload_check = 0.0
+
+    # ----------------------------------------------------------------
+    # Tagesverzeichnis
+    # ----------------------------------------------------------------
+
+    def _day_path(self, day):
+        return os.path.join(detector._get_source_images_dir(), day)
+
+    def _catch_up(self, day):
+        # Rueckstand (Start, Tageswechsel) ueber den normalen Zyklus abarbeiten
+        self.flush()
+        detector._detect_candidates_for_day(day)
+        self.state = detector._load_state()
+
+    def _switch_day(self, day):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+
+        self._wait_for_upload()
+        if self.pairs is not None:
+            self._update_index()
+            detector._compact_day_index(self.day)
+            self.pairs.close()
+
+        # Watcher vor dem Aufholen oeffnen: Bilder, die waehrend eines langen
+        # Rueckstands landen, erzeugen sonst kein Ereignis und ihre Paare fehlen
+        self.watcher = open_watcher(
+            self._day_path(day),
+            poll_seconds=self.poll_seconds,
+            prefer_inotify=self.prefer_inotify,
+        )
+        self._catch_up(day)
+
+        self.day = day
+        self.pairs = detector._PairDetector()
+        self.prev_path = None
+
+        last_image = self.state.get("last_processed_image")
+        if self.state.get("last_day_dir") == day and last_image:
+            path = os.path.join(self._day_path(day), last_image)
+            if os.path.isfile(path):
+                self.prev_path = path
+
+        log("Meteor-Dienst: beobachte %s (%s)" % (self._day_path(day), self.watcher.kind))
+
+        # Alles nach dem Aufholen Gelandete sofort nachziehen; die Ereignisse
+        # dazu verwirft _handle_new_file spaeter (Name <= Vorgaenger)
+        if self.prev_path is not None:
+            for path in detector._list_images_for_day(day):
+                self._handle_new_file(os.path.basename(path))
+            self._update_index()
+
+        detector.cleanup_old_meteor_dirs()
+
+    def _check_day(self, force=False):
+        now = time.monotonic()
+        watcher_gone = self.watcher is not None and self.watcher.gone
+        if not force and not watcher_gone and now - self._last_day_check < self.day_check_seconds:
+            return
+
+        self._last_day_check = now
+        active_day = detector._get_active_day_dir()
+        if active_day and (active_day != self.day or watcher_gone):
+            log("Meteor-Dienst: Tagesordner = %s" % active_day)
+            self._switch_day(active_day)
+
+    # ----------------------------------------------------------------
+    # Bilder
+    # ----------------------------------------------------------------
+
+    def _handle_new_file(self, name):
+        if not detector._extract_timestamp_from_filename(name):
+            return
+
+        # Erst der Namensvergleich: _switch_day reicht den ganzen Tag durch,
+        # bereits verarbeitete Bilder brauchen keinen stat()
+        if self.prev_path is not None and name <= os.path.basename(self.prev_path):
+            return
+
+        path = os.path.join(self._day_path(self.day), name)
+        try:
+            landed = os.stat(path).st_mtime
+        except OSError:
+            return
+
+        if self.prev_path is None:
+            self.prev_path = path
+            return
+
+        result = self.pairs.process(self.day, self.prev_path, path)
+        self.latency.record(time.time() - landed)
+
+        self.prev_path = path
+        self.comparisons += 1
+        self.state["last_day_dir"] = self.day
+        self.state["last_processed_image"] = name
+        self.state["mode"] = "service"
+
+        if result.get("candidate_id"):
+            self.new_candidates += 1
+            self.index_entries.append(result.get("index_entry"))
+
+    # ----------------------------------------------------------------
+    # Index / Upload
+    # ----------------------------------------------------------------
+
+    def _upload_running(self):
+        return self._upload_thread is not None and self._upload_thread.is_alive()
+
+    def _wait_for_upload(self):
+        if self._upload_running():
+            self._upload_thread.join()
+
+    def _update_index(self):
+        # Nur die neuen Kandidaten eintragen; Upload-Thread ist ueber _INDEX_LOCK getrennt
+        if self.index_entries:
+            entries, self.index_entries = self.index_entries, []
+            detector._update_day_index(self.day, entries)
+
+    def _maybe_start_upload(self):
+        now = time.monotonic()
+        if self._upload_running() or self.index_entries:
+            return
+        if now - self._last_upload_check < self.upload_interval_seconds:
+            return
+
+        self._last_upload_check = now
+        if not detector._has_pending_uploads(self.day):
+            return
+
+        if detector._queue_enabled():
+            detector._enqueue_upload(self.day)
+            return
+
+        self._upload_thread = threading.Thread(
+            target=detector.upload_pending_for_day,
+            args=(self.day,),
+            name="meteor-upload",
+            daemon=True,
+        )
+        self._upload_thread.start()
+
+    # ----------------------------------------------------------------
+    # State
+    # ----------------------------------------------------------------
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if self.day is None:
+            return
+
+        self.state["last_run_utc"] = detector._utc_now_iso()
+        detector._save_state(self.state)
+        if self.pairs is not None:
+            self.pairs.flush()
+
+        stats = self.pairs.stats() if self.pairs is not None else {}
+        detector._write_runtime_status({
+            "ok": True,
+            "day": self.day,
+            "mode": "service",
+            "watcher": self.watcher.kind if self.watcher is not None else None,
+            "started_utc": self.started_utc,
+            "comparisons": self.comparisons,
+            "new_candidates": self.new_candidates,
+            "last_processed_image": self.state.get("last_processed_image"),
+            "frame_cache": stats.get("frame_cache"),
+            "prefilter": stats.get("prefilter"),
+            "background": stats.get("background"),
+            "candidate_save": stats.get("candidate_save"),
+            "latency": self.latency.to_dict(),
+            "http": http_client.stats(),
+            "updated_utc": detector._utc_now_iso(),
+        })
+
+    def request_stop(self, *_args):
+        self.stop_requested = True
+
+    def run(self):
+        self._check_day(force=True)
+        if self.day is None:
+            log("Meteor-Dienst: kein aktives Tagesverzeichnis gefunden.")
+            return False
+
+        while not self.stop_requested:
+            names = self.watcher.wait(self.poll_seconds)
+            for name in sorted(names):
+                if self.stop_requested:
+                    break
+                self._handle_new_file(name)
+
+            self._update_index()
+
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+
+            self._check_day()
+            self._maybe_start_upload()
+
+        self._wait_for_upload()
+        self._update_index()
+        detector._compact_day_index(self.day)
+        self.flush()
+        if self.pairs is not None:
+            self.pairs.close()
+        if self.watcher is not None:
+            self.watcher.close()
+        log("Meteor-Dienst: beendet.")
+        return True
+
+
+def run_meteor_service():
+    if not bool(getattr(config, "METEOR_ENABLE", False)):
+        log("Meteor: deaktiviert in config.")
+        return False
+
+    detector._safe_mkdir(detector._get_output_dir())
+
+    service = MeteorService()
+    signal.signal(signal.SIGTERM, service.request_stop)
+    signal.signal(signal.SIGINT, service.request_stop)
+    return service.run()
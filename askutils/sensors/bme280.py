@@ -1,6 +1,8 @@
 # askutils/sensors/bme280.py
 
+import json
 import math
+import os
 import smbus
 import time
 from ctypes import c_short
@@ -65,45 +67,79 @@ def get_enabled_sensors():
     return [s for s in get_configured_sensors() if s.get("enabled", False)]
 
 
-def get_chip_id(addr):
-    reg_id = 0xD0
-    return bus.read_i2c_block_data(addr, reg_id, 2)
-
-
-def read_bme280(addr, temp_offset_c=0.0, press_offset_hpa=0.0, hum_offset_pct=0.0):
-    reg_data = 0xF7
-    reg_control = 0xF4
-    reg_control_hum = 0xF2
-
-    oversample_temp = 2
-    oversample_pres = 2
-    oversample_hum = 2
-    mode = 1
-
-    bus.write_byte_data(addr, reg_control_hum, oversample_hum)
-    control = (oversample_temp << 5) | (oversample_pres << 2) | mode
-    bus.write_byte_data(addr, reg_control, control)
-
-    cal1 = bus.read_i2c_block_data(addr, 0x88, 24)
-    cal2 = bus.read_i2c_block_data(addr, 0xA1, 1)
-    cal3 = bus.read_i2c_block_data(addr, 0xE1, 7)
-
-    dig_T1 = getUShort(cal1, 0)
-    dig_T2 = getShort(cal1, 2)
-    dig_T3 = getShort(cal1, 4)
-    dig_P1 = getUShort(cal1, 6)
-    dig_P2 = getShort(cal1, 8)
-    dig_P3 = getShort(cal1, 10)
-    dig_P4 = getShort(cal1, 12)
-    dig_P5 = getShort(cal1, 14)
-    dig_P6 = getShort(cal1, 16)
-    dig_P7 = getShort(cal1, 18)
-    dig_P8 = getShort(cal1, 20)
-    dig_P9 = getShort(cal1, 22)
-    dig_H1 = getUChar(cal2, 0)
-    dig_H2 = getShort(cal3, 0)
-    dig_H3 = getUChar(cal3, 2)
-
+# -----------------------------------------------------------
+# Treiber
+#
+# Kalibrierdaten (0x88..0xA1, 0xE1..0xE7) werden pro Adresse nur einmal
+# gelesen und zusaetzlich in tmp/bme280_calibration.json abgelegt
+# (Schluessel: Bus, Adresse, Chip-ID). Pro Messung:
+#   forced (Default): ctrl_hum + ctrl_meas schreiben, warten, ein Burst-Read 0xF7..0xFE
+#   normal:           nur ein Burst-Read 0xF2..0xFE (Sensor misst selbst im Takt);
+#                     stehen ctrl_hum/ctrl_meas nicht mehr auf unseren Werten
+#                     (Reset durch Spannungseinbruch, Umstecken), wird neu konfiguriert
+# Ein Lesefehler verwirft das Treiber-Objekt (naechste Messung liest Chip-ID neu).
+# -----------------------------------------------------------
+BUS_NUMBER = 1
+
+REG_CHIP_ID = 0xD0
+REG_CTRL_HUM = 0xF2
+REG_CTRL_MEAS = 0xF4
+REG_CONFIG = 0xF5
+REG_DATA = 0xF7
+DATA_LEN = 8
+
+OVERSAMPLE_TEMP = 2
+OVERSAMPLE_PRES = 2
+OVERSAMPLE_HUM = 2
+
+MODE_FORCED = 1
+MODE_NORMAL = 3
+STANDBY_1000MS = 5 << 5
+
+_devices = {}
+
+
+def _get_mode():
+    mode = str(getattr(config, "BME280_MODE", "forced") or "forced").strip().lower()
+    return MODE_NORMAL if mode == "normal" else MODE_FORCED
+
+
+def _get_calibration_path():
+    path = getattr(config, "BME280_CALIBRATION_CACHE_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "bme280_calibration.json")
+
+
+def _load_calibration_cache():
+    try:
+        with open(_get_calibration_path(), "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_calibration_cache(key, entry):
+    path = _get_calibration_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = _load_calibration_cache()
+        data[key] = entry
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        # Cache ist nur Optimierung
+        pass
+
+
+def parse_calibration(cal1, cal2, cal3):
+    """
+    Rohbytes (0x88: 24, 0xA1: 1, 0xE1: 7) -> dict dig_T1..dig_H6
+    """
     dig_H4 = getChar(cal3, 3)
     dig_H4 = (dig_H4 << 24) >> 20
     dig_H4 |= getChar(cal3, 4) & 0x0F
@@ -112,67 +148,277 @@ def read_bme280(addr, temp_offset_c=0.0, press_offset_hpa=0.0, hum_offset_pct=0.
     dig_H5 = (dig_H5 << 24) >> 20
     dig_H5 |= (getUChar(cal3, 4) >> 4) & 0x0F
 
-    dig_H6 = getChar(cal3, 6)
-
-    wait_time = (
-        1.25
-        + (2.3 * oversample_temp)
-        + ((2.3 * oversample_pres) + 0.575)
-        + ((2.3 * oversample_hum) + 0.575)
-    )
-    time.sleep(wait_time / 1000.0)
-
-    data = bus.read_i2c_block_data(addr, reg_data, 8)
+    return {
+        "T1": getUShort(cal1, 0),
+        "T2": getShort(cal1, 2),
+        "T3": getShort(cal1, 4),
+        "P1": getUShort(cal1, 6),
+        "P2": getShort(cal1, 8),
+        "P3": getShort(cal1, 10),
+        "P4": getShort(cal1, 12),
+        "P5": getShort(cal1, 14),
+        "P6": getShort(cal1, 16),
+        "P7": getShort(cal1, 18),
+        "P8": getShort(cal1, 20),
+        "P9": getShort(cal1, 22),
+        "H1": getUChar(cal2, 0),
+        "H2": getShort(cal3, 0),
+        "H3": getUChar(cal3, 2),
+        "H4": dig_H4,
+        "H5": dig_H5,
+        "H6": getChar(cal3, 6),
+    }
+
+
+def parse_raw(data):
+    """
+    Burst-Read 0xF7..0xFE -> (pres_raw, temp_raw, hum_raw)
+    """
     pres_raw = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
     temp_raw = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
     hum_raw = (data[6] << 8) | data[7]
+    return pres_raw, temp_raw, hum_raw
+
+
+def _clip(value, low, high):
+    if hasattr(value, "clip"):
+        return value.clip(low, high)
+    return max(low, min(value, high))
+
+
+def compensate(cal, pres_raw, temp_raw, hum_raw):
+    """
+    Kompensation nach Datenblatt. Funktioniert mit einzelnen Werten oder
+    mit numpy-Arrays (mehrere Sensoren auf einmal, cal-Werte als Arrays).
+    Gibt (Temperatur Grad_C, Druck hPa, Feuchte %) zurueck.
+    """
+    T1, T2, T3 = cal["T1"], cal["T2"], cal["T3"]
 
-    var1 = ((((temp_raw >> 3) - (dig_T1 << 1))) * dig_T2) >> 11
-    var2 = (((((temp_raw >> 4) - dig_T1) * ((temp_raw >> 4) - dig_T1)) >> 12) * dig_T3) >> 14
+    var1 = ((((temp_raw >> 3) - (T1 << 1))) * T2) >> 11
+    var2 = (((((temp_raw >> 4) - T1) * ((temp_raw >> 4) - T1)) >> 12) * T3) >> 14
     t_fine = var1 + var2
-    temperature = float(((t_fine * 5) + 128) >> 8) / 100.0
+    temperature = (((t_fine * 5) + 128) >> 8) / 100.0
 
     var1 = t_fine / 2.0 - 64000.0
-    var2 = var1 * var1 * dig_P6 / 32768.0
-    var2 = var2 + var1 * dig_P5 * 2.0
-    var2 = var2 / 4.0 + dig_P4 * 65536.0
-    var1 = (dig_P3 * var1 * var1 / 524288.0 + dig_P2 * var1) / 524288.0
-    var1 = (1.0 + var1 / 32768.0) * dig_P1
-
-    if var1 == 0:
-        pressure = 0.0
-    else:
-        pressure = ((1048576.0 - pres_raw - var2 / 4096.0) * 6250.0 / var1)
-        var1 = dig_P9 * pressure * pressure / 2147483648.0
-        var2 = pressure * dig_P8 / 32768.0
-        pressure = (pressure + (var1 + var2 + dig_P7) / 16.0) / 100.0
+    var2 = var1 * var1 * cal["P6"] / 32768.0
+    var2 = var2 + var1 * cal["P5"] * 2.0
+    var2 = var2 / 4.0 + cal["P4"] * 65536.0
+    var1 = (cal["P3"] * var1 * var1 / 524288.0 + cal["P2"] * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * cal["P1"]
+
+    # var1 == 0 -> Druck 0 (ohne Division durch 0, auch fuer Arrays)
+    valid = var1 != 0
+    safe_var1 = var1 + (var1 == 0)
+    pressure = ((1048576.0 - pres_raw - var2 / 4096.0) * 6250.0 / safe_var1)
+    var1 = cal["P9"] * pressure * pressure / 2147483648.0
+    var2 = pressure * cal["P8"] / 32768.0
+    pressure = (pressure + (var1 + var2 + cal["P7"]) / 16.0) / 100.0 * valid
 
     humidity = t_fine - 76800.0
     humidity = (
-        (hum_raw - (dig_H4 * 64.0 + dig_H5 / 16384.0 * humidity))
+        (hum_raw - (cal["H4"] * 64.0 + cal["H5"] / 16384.0 * humidity))
         * (
-            dig_H2 / 65536.0
-            * (1.0 + dig_H6 / 67108864.0 * humidity * (1.0 + dig_H3 / 67108864.0 * humidity))
+            cal["H2"] / 65536.0
+            * (1.0 + cal["H6"] / 67108864.0 * humidity * (1.0 + cal["H3"] / 67108864.0 * humidity))
         )
     )
-    humidity = humidity * (1.0 - dig_H1 * humidity / 524288.0)
-    humidity = max(0.0, min(humidity, 100.0))
+    humidity = humidity * (1.0 - cal["H1"] * humidity / 524288.0)
+    humidity = _clip(humidity, 0.0, 100.0)
+
+    return temperature, pressure, humidity
+
+
+class BME280:
+    """
+    Ein Sensor an einer Adresse; Chip-ID und Kalibrierung werden nur
+    beim Anlegen gelesen (bzw. aus dem Cache genommen).
+    """
+
+    def __init__(self, addr, i2c_bus=None):
+        self.addr = int(addr)
+        self.bus = i2c_bus or bus
+        self.mode = _get_mode()
+        self.chip = self.bus.read_i2c_block_data(self.addr, REG_CHIP_ID, 2)
+        self.chip_id = self.chip[0]
+        self.cal = self._calibration()
+        self._configure()
+
+    def _calibration(self):
+        key = "%d:%s:%s" % (BUS_NUMBER, hex(self.addr), hex(self.chip_id))
+        max_age = float(getattr(config, "BME280_CALIBRATION_MAX_AGE_HOURS", 24) or 0) * 3600.0
+
+        entry = _load_calibration_cache().get(key) if max_age > 0 else None
+        if isinstance(entry, dict) and time.time() - float(entry.get("read", 0)) < max_age:
+            try:
+                return parse_calibration(entry["cal1"], entry["cal2"], entry["cal3"])
+            except Exception:
+                pass
+
+        cal1 = self.bus.read_i2c_block_data(self.addr, 0x88, 24)
+        cal2 = self.bus.read_i2c_block_data(self.addr, 0xA1, 1)
+        cal3 = self.bus.read_i2c_block_data(self.addr, 0xE1, 7)
+        if max_age > 0:
+            _save_calibration_cache(key, {
+                "cal1": list(cal1),
+                "cal2": list(cal2),
+                "cal3": list(cal3),
+                "read": int(time.time()),
+            })
+        return parse_calibration(cal1, cal2, cal3)
+
+    def _configure(self):
+        # forced: ctrl_hum/ctrl_meas schreibt trigger() bei jeder Messung
+        if self.mode == MODE_NORMAL:
+            # ctrl_hum wird erst mit dem naechsten ctrl_meas-Schreiben wirksam
+            self.bus.write_byte_data(self.addr, REG_CTRL_HUM, OVERSAMPLE_HUM)
+            self.bus.write_byte_data(self.addr, REG_CONFIG, STANDBY_1000MS)
+            self.bus.write_byte_data(self.addr, REG_CTRL_MEAS, self._ctrl_meas())
+            time.sleep(self.conversion_seconds())
+
+    def _ctrl_meas(self):
+        return (OVERSAMPLE_TEMP << 5) | (OVERSAMPLE_PRES << 2) | self.mode
+
+    @staticmethod
+    def conversion_seconds():
+        # Maximale Messdauer laut Datenblatt
+        wait_time = (
+            1.25
+            + (2.3 * OVERSAMPLE_TEMP)
+            + ((2.3 * OVERSAMPLE_PRES) + 0.575)
+            + ((2.3 * OVERSAMPLE_HUM) + 0.575)
+        )
+        return wait_time / 1000.0
+
+    def trigger(self):
+        if self.mode == MODE_FORCED:
+            # ctrl_hum jedes Mal mitschreiben: nach einem Reset steht es auf 0
+            # (Feuchte aus, Rohwert 0x8000), das Objekt lebt im Sensor-Dienst lange
+            self.bus.write_byte_data(self.addr, REG_CTRL_HUM, OVERSAMPLE_HUM)
+            self.bus.write_byte_data(self.addr, REG_CTRL_MEAS, self._ctrl_meas())
+
+    def read_raw(self):
+        if self.mode == MODE_FORCED:
+            return parse_raw(self.bus.read_i2c_block_data(self.addr, REG_DATA, DATA_LEN))
+
+        # normal: Steuerregister im selben Burst mitlesen (0xF2..0xFE), ohne
+        # zusaetzliche Transaktion; nach einem Reset schlaeft der Chip und
+        # liefert sonst dauerhaft denselben alten Wert
+        offset = REG_DATA - REG_CTRL_HUM
+        data = self.bus.read_i2c_block_data(self.addr, REG_CTRL_HUM, offset + DATA_LEN)
+        ctrl_hum = data[0] & 0x07
+        ctrl_meas = data[REG_CTRL_MEAS - REG_CTRL_HUM]
+        if ctrl_hum != OVERSAMPLE_HUM or ctrl_meas != self._ctrl_meas():
+            self._configure()
+            data = self.bus.read_i2c_block_data(self.addr, REG_CTRL_HUM, offset + DATA_LEN)
+        return parse_raw(data[offset:])
+
+    def read(self):
+        self.trigger()
+        if self.mode == MODE_FORCED:
+            time.sleep(self.conversion_seconds())
+        return compensate(self.cal, *self.read_raw())
+
+
+def get_device(addr):
+    """
+    Treiber-Objekt je Adresse (im Prozess zwischengespeichert).
+    """
+    addr = int(addr)
+    device = _devices.get(addr)
+    if device is None:
+        device = BME280(addr)
+        _devices[addr] = device
+    return device
+
+
+def _drop_device(addr):
+    # Nach Lesefehlern neu anlegen (Chip-ID, Konfiguration)
+    _devices.pop(int(addr), None)
+
+
+def get_chip_id(addr):
+    return get_device(addr).chip
 
-    temperature = temperature + float(temp_offset_c)
-    pressure = pressure + float(press_offset_hpa)
-    humidity = humidity + float(hum_offset_pct)
 
+def _apply_offsets(values, sensor):
+    temperature, pressure, humidity = values
+    temperature = float(temperature) + float(sensor.get("temp_offset_c", 0.0))
+    pressure = float(pressure) + float(sensor.get("press_offset_hpa", 0.0))
+    humidity = float(humidity) + float(sensor.get("hum_offset_pct", 0.0))
     return round(temperature, 2), round(pressure, 2), round(humidity, 2)
 
 
+def read_bme280(addr, temp_offset_c=0.0, press_offset_hpa=0.0, hum_offset_pct=0.0):
+    try:
+        values = get_device(addr).read()
+    except Exception:
+        _drop_device(addr)
+        raise
+    return _apply_offsets(values, {
+        "temp_offset_c": temp_offset_c,
+        "press_offset_hpa": press_offset_hpa,
+        "hum_offset_pct": hum_offset_pct,
+    })
+
+
 def read_sensor(sensor):
-    addr = int(sensor["address"])
-    return read_bme280(
-        addr=addr,
-        temp_offset_c=float(sensor.get("temp_offset_c", 0.0)),
-        press_offset_hpa=float(sensor.get("press_offset_hpa", 0.0)),
-        hum_offset_pct=float(sensor.get("hum_offset_pct", 0.0)),
-    )
+    # read_sensors liefert Fehler als Wert; hier wie bisher ausloesen
+    result = read_sensors([sensor])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _stack(cals):
+    import numpy as np
+    return {key: np.array([c[key] for c in cals], dtype=np.int64) for key in cals[0]}
+
+
+def read_sensors(sensors):
+    """
+    Liest mehrere Sensoren: alle ausloesen, einmal warten, je ein
+    Burst-Read, Kompensation gemeinsam (numpy, falls vorhanden).
+    Gibt pro Sensor (temp, press, hum) oder die Exception zurueck.
+    """
+    results = [None] * len(sensors)
+    devices = []
+    for i, sensor in enumerate(sensors):
+        try:
+            device = get_device(sensor["address"])
+            device.trigger()
+            devices.append((i, device))
+        except Exception as e:
+            _drop_device(sensor["address"])
+            results[i] = e
+
+    if any(device.mode == MODE_FORCED for _i, device in devices):
+        time.sleep(BME280.conversion_seconds())
+
+    raws = []
+    for i, device in devices:
+        try:
+            raws.append((i, device.cal, device.read_raw()))
+        except Exception as e:
+            _drop_device(device.addr)
+            results[i] = e
+
+    values = None
+    if len(raws) > 1:
+        # numpy nur bei mehreren Sensoren laden (Kaltstart im Cron)
+        try:
+            import numpy as np
+            cal = _stack([c for _i, c, _r in raws])
+            raw = np.array([r for _i, _c, r in raws], dtype=np.int64)
+            t, p, h = compensate(cal, raw[:, 0], raw[:, 1], raw[:, 2])
+            values = list(zip(t.tolist(), p.tolist(), h.tolist()))
+        except ImportError:
+            values = None
+    if values is None:
+        values = [compensate(c, *r) for _i, c, r in raws]
+
+    for (i, _c, _r), v in zip(raws, values):
+        results[i] = _apply_offsets(v, sensors[i])
+    return results
 
 
 def calculate_dew_point(temp, hum):
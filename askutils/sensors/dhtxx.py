@@ -82,6 +82,20 @@ def calculate_dew_point(temp_c, rel_hum):
     alpha = ((a * temp_c) / (b + temp_c)) + math.log(rel_hum / 100.0)
     return round((b * alpha) / (a - alpha), 2)
 
+# DHT-Objekte je Pin wiederverwenden (Sensor-Dienst); nur beim ersten
+# Anlegen muss der Sensor sich stabilisieren
+_dht_cache = {}
+
+def _get_dht(kind, pin):
+    key = (kind, str(pin))
+    dht = _dht_cache.get(key)
+    if dht is None:
+        cls = adafruit_dht.DHT11 if kind == "DHT11" else adafruit_dht.DHT22
+        dht = cls(pin, use_pulseio=False)
+        time.sleep(2.0)  # Sensor stabilisieren
+        _dht_cache[key] = dht
+    return dht
+
 # ---- Public API: DHT11 ----
 def read_dht11():
     if not getattr(config, "DHT11_ENABLED", False):
@@ -91,8 +105,7 @@ def read_dht11():
     retries = getattr(config, "DHT11_RETRIES", 10)
     delay   = getattr(config, "DHT11_RETRY_DELAY", 0.3)
 
-    dht = adafruit_dht.DHT11(pin, use_pulseio=False)
-    time.sleep(2.0)  # Sensor stabilisieren
+    dht = _get_dht("DHT11", pin)
 
     t_min, t_max = _valid_temp_range("DHT11")
     t, h = _read_median(dht, retries, delay, t_min, t_max)
@@ -111,8 +124,7 @@ def read_dht22():
     retries = getattr(config, "DHT22_RETRIES", 10)
     delay   = getattr(config, "DHT22_RETRY_DELAY", 0.3)
 
-    dht = adafruit_dht.DHT22(pin, use_pulseio=False)
-    time.sleep(2.0)
+    dht = _get_dht("DHT22", pin)
 
     t_min, t_max = _valid_temp_range("DHT22")
     t, h = _read_median(dht, retries, delay, t_min, t_max)
@@ -133,8 +145,7 @@ def read_dht22_sensor(sensor_cfg: dict):
     retries = sensor_cfg.get("retries", 10)
     delay = sensor_cfg.get("retry_delay", 0.3)
 
-    dht = adafruit_dht.DHT22(pin, use_pulseio=False)
-    time.sleep(2.0)
+    dht = _get_dht("DHT22", pin)
 
     t_min, t_max = _valid_temp_range("DHT22")
     t, h = _read_median(dht, retries, delay, t_min, t_max)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# askutils/sensors/scheduler.py
+#
+# Sensor-Dienst statt einem Cron-Prozess pro Sensor:
+# - ein Python-Prozess; I2C-Bus, Sensor-Objekte und Kalibrierdaten bleiben
+#   zwischen den Messungen offen (kein Kaltstart, kein erneuter Import)
+# - jeder Sensor laeuft im Takt seines *_LOG_INTERVAL_MIN, ausgerichtet wie
+#   "*/N * * * *" im Crontab
+# - Messungen laufen ueber die main()-Funktionen der scripts/*_logger.py,
+#   tmp/env/*.json, Overlay-Dateien und Influx-Werte bleiben also gleich
+# - I2C-Sensoren laufen nacheinander in einer Spur (I2C_LOCK), DHT (GPIO)
+#   und DS18B20 (1-Wire) in eigenen Spuren, damit langsame DHT-Retries die
+#   I2C-Messungen nicht verzoegern
+# - Influx-Werte gehen gesammelt raus (influx_writer puffert im Prozess)
+# - CPU-Zeit je Sensor und gesamt (CPU-Sekunden pro Stunde) steht in
+#   tmp/sensor_daemon.json, vergleichbar mit tests/sensor_cpu_benchmark.py
+#
+# Start per Cron (setupui, SENSOR_DAEMON_ENABLED):
+#   * * * * * cd ... && flock -n tmp/sensor_daemon.lock python3 -m scripts.run_sensor_daemon
+
+import datetime
+import importlib
+import io
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from askutils import config
+
+try:
+    from askutils.utils import influx_writer
+except Exception:
+    influx_writer = None
+
+# (Name, Enabled-Key, Intervall-Key, Modul, Spur)
+SENSOR_JOBS = (
+    ("bme280", "BME280_ENABLED", "BME280_LOG_INTERVAL_MIN", "scripts.bme280_logger", "i2c"),
+    ("tsl2591", "TSL2591_ENABLED", "TSL2591_LOG_INTERVAL_MIN", "scripts.tsl2591_logger", "i2c"),
+    ("mlx90614", "MLX90614_ENABLED", "MLX90614_LOG_INTERVAL_MIN", "scripts.mlx90614_logger", "i2c"),
+    ("htu21", "HTU21_ENABLED", "HTU21_LOG_INTERVAL_MIN", "scripts.htu21_logger", "i2c"),
+    ("sht3x", "SHT3X_ENABLED", "SHT3X_LOG_INTERVAL_MIN", "scripts.sht3x_logger", "i2c"),
+    ("dht11", "DHT11_ENABLED", "DHT11_LOG_INTERVAL_MIN", "scripts.dht11_logger", "gpio"),
+    ("dht22", "DHT22_ENABLED", "DHT22_LOG_INTERVAL_MIN", "scripts.dht22_logger", "gpio"),
+    ("ds18b20", "DS18B20_ENABLED", "DS18B20_LOG_INTERVAL_MIN", "scripts.ds18b20_logger", "w1"),
+)
+
+# Alle I2C-Zugriffe im Prozess laufen unter diesem Lock
+I2C_LOCK = threading.RLock()
+
+IMPORT_RETRY_SECONDS = 300
+OUTPUT_TAIL_CHARS = 2000
+
+
+def log(msg):
+    _stdout.real.write(msg + "\n")
+    _stdout.real.flush()
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _get_status_path():
+    path = getattr(config, "SENSOR_DAEMON_STATUS_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "sensor_daemon.json")
+
+
+def _iso_now_utc():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _bme280_enabled():
+    # BME280_SENSORS (Liste) ersetzt BME280_ENABLED
+    sensors = getattr(config, "BME280_SENSORS", None)
+    if isinstance(sensors, list) and sensors:
+        return any(isinstance(s, dict) and s.get("enabled", True) for s in sensors)
+    return bool(getattr(config, "BME280_ENABLED", False))
+
+
+def next_due(now, interval_min):
+    """
+    Naechster Zeitpunkt wie "*/N * * * *": volle Minute, Minute % N == 0.
+    """
+    interval_min = max(1, int(interval_min))
+    t = datetime.datetime.fromtimestamp(now).replace(second=0, microsecond=0)
+    for _ in range(61 * 24):
+        t += datetime.timedelta(minutes=1)
+        if t.minute % interval_min == 0:
+            return t.timestamp()
+    return now + 60 * interval_min
+
+
+# -----------------------------------------------------------
+# Ausgabe der Logger je Thread einsammeln
+# -----------------------------------------------------------
+class _ThreadOutput:
+    """
+    Ersetzt sys.stdout: Ausgaben eines Jobs landen in seinem Puffer,
+    alles andere geht unveraendert auf die echte Ausgabe.
+    """
+
+    def __init__(self, real):
+        self.real = real
+        self.local = threading.local()
+
+    def capture(self):
+        self.local.buffer = io.StringIO()
+
+    def release(self):
+        buffer = getattr(self.local, "buffer", None)
+        self.local.buffer = None
+        return buffer.getvalue() if buffer is not None else ""
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self.real.write(text)
+
+    def flush(self):
+        self.real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.real, name)
+
+
+_stdout = _ThreadOutput(sys.stdout)
+
+
+class SensorJob:
+
+    def __init__(self, name, module_name, lane, interval_min):
+        self.name = name
+        self.module_name = module_name
+        self.lane = lane
+        self.interval_min = max(1, int(interval_min))
+        self.main = None
+        self.import_error = None
+        self.due = next_due(time.time(), self.interval_min)
+        self.stats = {
+            "runs": 0,
+            "errors": 0,
+            "cpu_seconds": 0.0,
+            "wall_seconds": 0.0,
+            "last_seconds": None,
+            "last_run_utc": None,
+            "last_output": "",
+        }
+
+    def _load(self):
+        try:
+            self.main = importlib.import_module(self.module_name).main
+            self.import_error = None
+        except Exception as e:
+            # z.B. Bibliothek fehlt -> spaeter erneut versuchen
+            self.import_error = str(e)
+            log("Sensor-Dienst: %s nicht ladbar: %s" % (self.module_name, e))
+
+    def run(self, verbose):
+        if self.main is None:
+            self._load()
+            if self.main is None:
+                self.stats["errors"] += 1
+                self.due = time.time() + IMPORT_RETRY_SECONDS
+                return
+
+        wall0 = time.monotonic()
+        cpu0 = time.thread_time()
+        _stdout.capture()
+        ok = True
+        try:
+            if self.lane == "i2c":
+                with I2C_LOCK:
+                    self.main()
+            else:
+                self.main()
+        except BaseException as e:
+            # Logger beenden sich teils mit sys.exit()
+            ok = isinstance(e, SystemExit) and not e.code
+            if not ok:
+                print("[ERROR] %s: %s" % (self.name, e))
+        finally:
+            output = _stdout.release()
+
+        cpu = time.thread_time() - cpu0
+        wall = time.monotonic() - wall0
+        errors = [line for line in output.splitlines() if line.startswith(("[ERROR]", "[WARN]"))]
+        if errors:
+            ok = False
+
+        self.stats["runs"] += 1
+        self.stats["errors"] += 0 if ok else 1
+        self.stats["cpu_seconds"] += cpu
+        self.stats["wall_seconds"] += wall
+        self.stats["last_seconds"] = round(wall, 3)
+        self.stats["last_run_utc"] = _iso_now_utc()
+        self.stats["last_output"] = output[-OUTPUT_TAIL_CHARS:]
+
+        if verbose:
+            log(output.rstrip())
+            log("sensor_run name=%s seconds=%.2f cpu=%.3f ok=%s" % (self.name, wall, cpu, ok))
+        else:
+            for line in errors:
+                log("%s: %s" % (self.name, line))
+
+        self.due = next_due(time.time(), self.interval_min)
+
+    def to_dict(self):
+        data = dict(self.stats)
+        data["cpu_seconds"] = round(data["cpu_seconds"], 3)
+        data["wall_seconds"] = round(data["wall_seconds"], 3)
+        data.update({
+            "module": self.module_name,
+            "lane": self.lane,
+            "interval_min": self.interval_min,
+            "next_due": datetime.datetime.fromtimestamp(self.due).isoformat(timespec="seconds"),
+            "import_error": self.import_error,
+        })
+        return data
+
+
+def build_jobs():
+    jobs = []
+    for name, enabled_key, interval_key, module_name, lane in SENSOR_JOBS:
+        enabled = _bme280_enabled() if name == "bme280" else bool(getattr(config, enabled_key, False))
+        if enabled:
+            jobs.append(SensorJob(name, module_name, lane, getattr(config, interval_key, 1) or 1))
+    return jobs
+
+
+class SensorDaemon:
+
+    def __init__(self, jobs=None):
+        self.jobs = build_jobs() if jobs is None else jobs
+        self.status_seconds = max(5.0, _cfg_float("SENSOR_DAEMON_STATUS_SECONDS", 60.0))
+        self.verbose = bool(getattr(config, "SENSOR_DAEMON_VERBOSE", False))
+        self.stop_event = threading.Event()
+        self.started = time.monotonic()
+        self.started_utc = _iso_now_utc()
+        self.cpu_start = self._process_cpu()
+        self.config_path = getattr(config, "__file__", None)
+        self.config_mtime = self._config_mtime()
+        self.restart_reason = None
+
+    @staticmethod
+    def _process_cpu():
+        t = os.times()
+        return t.user + t.system
+
+    def _config_mtime(self):
+        try:
+            return os.path.getmtime(self.config_path)
+        except (OSError, TypeError):
+            return None
+
+    def _lane_loop(self, jobs):
+        while not self.stop_event.is_set():
+            now = time.time()
+            for job in sorted(jobs, key=lambda j: j.due):
+                if self.stop_event.is_set():
+                    return
+                if job.due <= now:
+                    job.run(self.verbose)
+            wait = min(job.due for job in jobs) - time.time()
+            self.stop_event.wait(max(0.05, min(wait, 5.0)))
+
+    def status(self):
+        uptime = time.monotonic() - self.started
+        cpu = self._process_cpu() - self.cpu_start
+        return {
+            "started_utc": self.started_utc,
+            "uptime_seconds": round(uptime, 1),
+            "cpu_seconds": round(cpu, 3),
+            "cpu_seconds_per_hour": round(cpu / uptime * 3600.0, 2) if uptime > 0 else None,
+            "jobs": {job.name: job.to_dict() for job in self.jobs},
+            "influx": influx_writer.stats() if influx_writer is not None else None,
+            "updated_utc": _iso_now_utc(),
+        }
+
+    def write_status(self):
+        path = _get_status_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.status(), f, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            log("Sensor-Dienst: Status konnte nicht geschrieben werden: %s" % e)
+
+    def request_stop(self, *_args):
+        self.stop_event.set()
+
+    def run(self):
+        if not self.jobs:
+            log("Sensor-Dienst: keine Sensoren aktiviert.")
+            return True
+
+        sys.stdout = _stdout
+        lanes = {}
+        for job in self.jobs:
+            lanes.setdefault(job.lane, []).append(job)
+        log("Sensor-Dienst: %s" % ", ".join(
+            "%s(%s, */%d)" % (j.name, j.lane, j.interval_min) for j in self.jobs
+        ))
+
+        threads = [
+            threading.Thread(target=self._lane_loop, args=(jobs,), name="sensor-" + lane, daemon=True)
+            for lane, jobs in lanes.items()
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            while not self.stop_event.wait(self.status_seconds):
+                self.write_status()
+                # config.py geaendert (SetupUI) -> beenden, Cron startet neu
+                if self._config_mtime() != self.config_mtime:
+                    self.restart_reason = "config"
+                    log("Sensor-Dienst: config.py geaendert, Neustart.")
+                    self.stop_event.set()
+        finally:
+            self.stop_event.set()
+            for t in threads:
+                t.join(60)
+            if influx_writer is not None:
+                influx_writer.flush()
+            self.write_status()
+            sys.stdout = _stdout.real
+
+        log("Sensor-Dienst: beendet.")
+        return True
+
+
+def run_sensor_daemon():
+    daemon = SensorDaemon()
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    signal.signal(signal.SIGINT, daemon.request_stop)
+    return daemon.run()
@@ -1,4 +1,6 @@
+import json
 import math
+import os
 import time
 import board
 import busio
@@ -55,6 +57,15 @@ AR_TARGET_HIGH = int(getattr(config, "TSL2591_TARGET_CH0_HIGH", 8000))
 AR_MIN_VALID = int(getattr(config, "TSL2591_MIN_CH0_VALID", 5))
 AR_WARMUP_READS = int(getattr(config, "TSL2591_WARMUP_READS", 2))
 
+# Autorange mode: "predictive" (last setting + linear prediction, bounded
+# binary search) or "sweep" (try all gain x integration combinations)
+AR_MODE = str(getattr(config, "TSL2591_AUTORANGE_MODE", "predictive")).strip().lower()
+AR_MAX_STEPS = int(getattr(config, "TSL2591_AUTORANGE_MAX_STEPS", 4))
+AR_HEADROOM = float(getattr(config, "TSL2591_AUTORANGE_HEADROOM", 0.7))   # keep CH0 below HIGH * headroom
+AR_STATE_FILE = getattr(config, "TSL2591_AUTORANGE_STATE_FILE", None) or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "tmp", "tsl2591_autorange.json")
+)
+
 # -------------------------
 # CloudIndex tuning (optional via config)
 # -------------------------
@@ -95,6 +106,9 @@ _time_map_enum2ms = {v: k for k, v in _time_map_ms2enum.items()}
 # -------------------------
 _i2c = None
 _sensor = None
+_autorange_steps = 0
+
+GAIN_FACTORS = {"LOW": 1, "MED": 25, "HIGH": 428, "MAX": 9876}
 
 
 def _settle_for_integration(ms: int) -> None:
@@ -109,6 +123,11 @@ def _make_or_get_sensor():
             _i2c = busio.I2C(board.SCL, board.SDA)
         if _sensor is None:
             _sensor = TSL2591(_i2c)
+        elif TSL_AUTORANGE and AR_MODE != "sweep":
+            # Keep the last autorange setting; the predictive autorange starts there.
+            # Reading the control register still detects a lost sensor.
+            _ = _sensor.gain
+            return _sensor
 
         _sensor.gain = _gain_map_str2enum.get(TSL_GAIN_STR.upper(), Gain.LOW)
         _sensor.integration_time = _time_map_ms2enum.get(TSL_INTEG_MS, IntegrationTime.TIME_300MS)
@@ -170,26 +189,13 @@ def _read_valid_raw(sensor, integ_ms: int):
     return None, None, last_note
 
 
-def _autorange_night(sensor):
+def _autorange_sweep(sensor):
     """
-    Night-aware autorange using RAW CH0 counts:
-    - Must produce VALID reads (not 0/0, CH0 >= AR_MIN_VALID)
-    - Prefer CH0 within [AR_TARGET_LOW .. AR_TARGET_HIGH]
-    - Otherwise choose best SNR below target_high (maximize CH0)
+    Exhaustive autorange: tries gain x integration from most to least
+    sensitive (TSL2591_AUTORANGE_MODE = "sweep").
     """
-    if not TSL_AUTORANGE:
-        return "fixed"
-
-    gain_factors = {"LOW": 1, "MED": 25, "HIGH": 428, "MAX": 9876}
-    gains = ["LOW", "MED", "HIGH", "MAX"]
-    expos = [100, 200, 300, 400, 500, 600]
-
-    combos = []
-    for g in gains:
-        for e in expos:
-            combos.append((gain_factors[g] * e, g, e))
-
-    combos.sort(key=lambda x: x[0], reverse=True)  # high sensitivity first
+    global _autorange_steps
+    combos = sorted(_combos(), key=lambda x: x[0], reverse=True)  # high sensitivity first
 
     best = None
     best_score = None
@@ -204,6 +210,7 @@ def _autorange_night(sensor):
         _warmup(sensor, e, AR_WARMUP_READS)
         _settle_for_integration(e)
         ch0, ch1 = _read_raw(sensor)
+        _autorange_steps += 1
 
         if ch0 is None:
             return "autorange_raw_missing"
@@ -239,6 +246,181 @@ def _autorange_night(sensor):
     return "autorange_fallback"
 
 
+def _combos():
+    """All (sensitivity, gain, integration_ms), sensitivity = gain factor x ms."""
+    return [
+        (GAIN_FACTORS[g] * e, g, e)
+        for g in ("LOW", "MED", "HIGH", "MAX")
+        for e in (100, 200, 300, 400, 500, 600)
+    ]
+
+
+def _max_count(integ_ms: int) -> int:
+    # ADC full scale: 37888 at 100 ms, 65535 from 200 ms
+    return 37888 if integ_ms <= 100 else 65535
+
+
+def _load_state():
+    try:
+        with open(AR_STATE_FILE, "r") as f:
+            state = json.load(f)
+        if state.get("gain") in GAIN_FACTORS and int(state.get("integration_ms", 0)) in _time_map_ms2enum:
+            return state
+    except Exception:
+        pass
+    return None
+
+
+def _save_state(gain: str, integ_ms: int, ch0: int) -> None:
+    try:
+        os.makedirs(os.path.dirname(AR_STATE_FILE), exist_ok=True)
+        tmp = AR_STATE_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"gain": gain, "integration_ms": int(integ_ms), "ch0": int(ch0), "ts": int(time.time())}, f)
+        os.replace(tmp, AR_STATE_FILE)
+    except Exception:
+        # State is only a shortcut for the next reading
+        pass
+
+
+def _predict_index(combos, ch0: int, sensitivity: float, lo: int, hi: int) -> int:
+    """
+    Index in combos (ascending sensitivity) whose predicted CH0 is inside
+    [AR_TARGET_LOW .. AR_TARGET_HIGH * AR_HEADROOM]; most sensitive wins.
+    Otherwise the combination closest to that band (log scale).
+    """
+    top = AR_TARGET_HIGH * AR_HEADROOM
+    best = None
+    closest = None
+    closest_dist = None
+    for i in range(lo, hi + 1):
+        predicted = max(ch0, 0.5) * combos[i][0] / float(sensitivity)
+        if AR_TARGET_LOW <= predicted <= top:
+            best = i
+        if predicted < AR_TARGET_LOW:
+            dist = math.log(AR_TARGET_LOW / predicted)
+        elif predicted > top:
+            dist = math.log(predicted / top)
+        else:
+            dist = 0.0
+        if closest_dist is None or dist < closest_dist:
+            closest, closest_dist = i, dist
+    return best if best is not None else closest
+
+
+def _autorange_predictive(sensor):
+    """
+    Predictive autorange using RAW CH0 counts:
+    - start from the last good setting and its CH0 (state file) and jump
+      to the combination expected to put CH0 into the target band
+      (CH0 scales linearly with gain factor x integration time)
+    - every measurement narrows the search interval; if the prediction
+      does not move, fall back to a binary search step
+    - at most AR_MAX_STEPS measurements, then best valid or MAX/600
+    """
+    global _autorange_steps
+    combos = sorted(_combos())
+    index = {(g, e): i for i, (_, g, e) in enumerate(combos)}
+
+    try:
+        current = index.get((_gain_map_enum2str.get(sensor.gain), _time_map_enum2ms.get(sensor.integration_time)))
+    except Exception:
+        current = None
+
+    lo, hi = 0, len(combos) - 1
+    state = _load_state()
+    if state is not None:
+        sens = GAIN_FACTORS[state["gain"]] * int(state["integration_ms"])
+        i = _predict_index(combos, int(state.get("ch0") or 0), sens, lo, hi)
+        reason = "autorange_predicted"
+    else:
+        i = (lo + hi) // 2
+        reason = "autorange_search"
+
+    best = None
+    best_score = None
+    tried = set()
+
+    for _ in range(max(1, AR_MAX_STEPS)):
+        sens, g, e = combos[i]
+        tried.add(i)
+        try:
+            if i != current:
+                sensor.gain = _gain_map_str2enum[g]
+                sensor.integration_time = _time_map_ms2enum[e]
+                current = i
+                _warmup(sensor, e, AR_WARMUP_READS)
+        except Exception:
+            return "autorange_set_failed"
+
+        _settle_for_integration(e)
+        ch0, ch1 = _read_raw(sensor)
+        _autorange_steps += 1
+
+        if ch0 is None:
+            return "autorange_raw_missing"
+
+        too_dark = (ch0 == 0 and ch1 == 0) or (AR_MIN_VALID > 0 and ch0 < AR_MIN_VALID)
+        saturated = ch0 >= _max_count(e)
+
+        if not too_dark and AR_TARGET_LOW <= ch0 <= AR_TARGET_HIGH and not saturated:
+            _save_state(g, e, ch0)
+            return reason
+
+        if not too_dark:
+            score = ch0 if ch0 <= AR_TARGET_HIGH else AR_TARGET_HIGH - (ch0 - AR_TARGET_HIGH)
+            if best_score is None or score > best_score:
+                best_score, best = score, (i, ch0)
+
+        # Narrow the interval
+        if too_dark or ch0 < AR_TARGET_LOW:
+            lo = i + 1
+        else:
+            hi = i - 1
+        if lo > hi:
+            break
+
+        reason = "autorange_search"
+        if too_dark or saturated:
+            nxt = (lo + hi) // 2 if saturated else _predict_index(combos, 0, sens, lo, hi)
+        else:
+            nxt = _predict_index(combos, ch0, sens, lo, hi)
+        if nxt in tried:
+            nxt = (lo + hi) // 2
+        i = nxt
+
+    if best is not None:
+        i, ch0 = best
+        _, g, e = combos[i]
+        if i != current:
+            sensor.gain = _gain_map_str2enum[g]
+            sensor.integration_time = _time_map_ms2enum[e]
+            _warmup(sensor, e, AR_WARMUP_READS)
+        _save_state(g, e, ch0)
+        return "autorange_best"
+
+    sensor.gain = Gain.MAX
+    sensor.integration_time = IntegrationTime.TIME_600MS
+    _warmup(sensor, 600, AR_WARMUP_READS)
+    return "autorange_fallback"
+
+
+def _autorange_night(sensor):
+    """
+    Night-aware autorange using RAW CH0 counts:
+    - Must produce VALID reads (not 0/0, CH0 >= AR_MIN_VALID)
+    - Prefer CH0 within [AR_TARGET_LOW .. AR_TARGET_HIGH]
+    - Otherwise choose best SNR below target_high (maximize CH0)
+    """
+    global _autorange_steps
+    _autorange_steps = 0
+    if not TSL_AUTORANGE:
+        return "fixed"
+    if AR_MODE == "sweep":
+        return _autorange_sweep(sensor)
+    return _autorange_predictive(sensor)
+
+
 # -------------------------
 # CloudIndex computation
 # -------------------------
@@ -323,6 +505,7 @@ def read_tsl2591():
     - Legacy SQM from lux/visible (kept for compatibility)
     - CloudScore (0..1) and CloudIndex (0..3)
     """
+    started = time.monotonic()
     sensor = _make_or_get_sensor()
     autorange_reason = _autorange_night(sensor)
 
@@ -409,4 +592,8 @@ def read_tsl2591():
         "integration_ms": int(integ_ms),
         "autorange": bool(TSL_AUTORANGE),
         "autorange_reason": autorange_reason,
+        "autorange_steps": int(_autorange_steps),
+
+        # Time to reading (sensor setup + autorange + read)
+        "read_seconds": round(time.monotonic() - started, 3),
     }
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# askutils/uploader/chunked_upload.py
+#
+# Fortsetzbarer Upload grosser Dateien (Nightly-Zeitraffer) in Teilstuecken.
+#
+# Protokoll (alle Antworten JSON, Header X-API-Key):
+#   POST ?action=init    Formular: date, asset, filename, size, sha256, mime,
+#                        publish_last + Datei "thumb"
+#                        -> {"ok": true, "upload_id": "...", "offset": n}
+#                        Gleiche Datei (date/asset/sha256) liefert die
+#                        vorhandene Sitzung samt bestaetigtem Offset zurueck.
+#   PUT  ?action=chunk   Header X-Upload-Id, X-Upload-Offset, X-Chunk-Sha256,
+#                        Body = rohe Bytes
+#                        -> {"ok": true, "offset": neuer_offset}
+#                        Offset passt nicht: HTTP 409 {"ok": false, "offset": n}
+#   GET  ?action=status  upload_id -> {"ok": true, "offset": n}
+#   POST ?action=finish  upload_id -> {"ok": true} (Server prueft sha256 der Datei)
+#
+# Nach einem Abbruch wird am vom Server bestaetigten Offset weitergemacht.
+# Die Stueckgroesse richtet sich nach dem gemessenen Durchsatz.
+
+import hashlib
+import os
+import time
+
+import requests
+
+from askutils import config
+from askutils.utils import http_client
+
+MIN_CHUNK_BYTES = 256 * 1024
+CHUNK_ALIGN = 64 * 1024
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def get_chunk_url():
+    return str(getattr(config, "NIGHTLY_CHUNK_UPLOAD_URL", "") or "").strip()
+
+
+def is_enabled():
+    return bool(getattr(config, "NIGHTLY_UPLOAD_CHUNKED", False)) and bool(get_chunk_url())
+
+
+def _file_sha256(path, block=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+class ChunkSizer:
+    """
+    Passt die Stueckgroesse an den Durchsatz an: ein Stueck soll etwa
+    target_seconds dauern; nach Fehlern wird halbiert.
+    """
+
+    def __init__(self, initial, maximum, target_seconds):
+        self.maximum = max(MIN_CHUNK_BYTES, int(maximum))
+        self.size = self._clamp(initial)
+        self.target_seconds = max(1.0, float(target_seconds))
+
+    def _clamp(self, size):
+        size = int(size) // CHUNK_ALIGN * CHUNK_ALIGN
+        return max(MIN_CHUNK_BYTES, min(self.maximum, size))
+
+    def record(self, sent_bytes, seconds):
+        if seconds <= 0 or sent_bytes <= 0:
+            return
+        rate = sent_bytes / seconds
+        # gedaempft, damit einzelne Ausreisser die Groesse nicht springen lassen
+        wanted = rate * self.target_seconds
+        self.size = self._clamp(min(wanted, self.size * 2.0))
+
+    def failed(self):
+        self.size = self._clamp(self.size // 2)
+
+
+class ChunkedUploader:
+
+    def __init__(self, url, api_key, connect_timeout=20, read_timeout=120, verify=True):
+        self.url = url
+        self.headers = {"X-API-Key": api_key}
+        self.timeout = (connect_timeout, read_timeout)
+        self.verify = verify
+        self.max_failures = int(_cfg_float("NIGHTLY_UPLOAD_CHUNK_RETRIES", 5))
+        self.sizer = ChunkSizer(
+            _cfg_float("NIGHTLY_UPLOAD_CHUNK_MB", 4.0) * 1024 * 1024,
+            _cfg_float("NIGHTLY_UPLOAD_CHUNK_MAX_MB", 32.0) * 1024 * 1024,
+            _cfg_float("NIGHTLY_UPLOAD_CHUNK_TARGET_SECONDS", 10.0),
+        )
+
+    def _call(self, method, action, label, **kwargs):
+        response = http_client.request(
+            method,
+            self.url,
+            label=label,
+            params={"action": action},
+            headers=dict(self.headers, **kwargs.pop("headers", {})),
+            timeout=self.timeout,
+            verify=self.verify,
+            **kwargs
+        )
+        try:
+            payload = response.json()
+        except Exception:
+            payload = {}
+        return response.status_code, payload
+
+    def _init(self, meta, thumb_path):
+        with open(thumb_path, "rb") as fh_thumb:
+            status, payload = self._call(
+                "POST", "init", "chunk_init",
+                data=meta,
+                files={"thumb": ("thumb.jpg", fh_thumb, "image/jpeg")},
+            )
+        if status != 200 or payload.get("ok") is not True or not payload.get("upload_id"):
+            raise RuntimeError("chunk_init_failed status=%s body=%s" % (status, str(payload)[:300]))
+        return payload["upload_id"], int(payload.get("offset") or 0)
+
+    def _status(self, upload_id):
+        status, payload = self._call("GET", "status", "chunk_status", headers={"X-Upload-Id": upload_id})
+        if status != 200 or payload.get("ok") is not True:
+            raise RuntimeError("chunk_status_failed status=%s" % status)
+        return int(payload.get("offset") or 0)
+
+    def _send_chunk(self, upload_id, offset, data):
+        status, payload = self._call(
+            "PUT", "chunk", "chunk",
+            headers={
+                "X-Upload-Id": upload_id,
+                "X-Upload-Offset": str(offset),
+                "X-Chunk-Sha256": hashlib.sha256(data).hexdigest(),
+                "Content-Type": "application/octet-stream",
+            },
+            data=data,
+        )
+        if status == 409 and "offset" in payload:
+            # Server hat einen anderen Stand -> dort weitermachen
+            return int(payload["offset"]), False
+        if status != 200 or payload.get("ok") is not True:
+            raise RuntimeError("chunk_failed status=%s body=%s" % (status, str(payload)[:300]))
+        return int(payload.get("offset", offset + len(data))), True
+
+    def _finish(self, upload_id):
+        status, payload = self._call("POST", "finish", "chunk_finish", data={"upload_id": upload_id})
+        if status != 200 or payload.get("ok") is not True:
+            raise RuntimeError("chunk_finish_failed status=%s body=%s" % (status, str(payload)[:300]))
+        return payload
+
+    def upload(self, path, thumb_path, fields, mime, progress=None):
+        """
+        Laedt path in Teilstuecken hoch. fields: date, asset, publish_last.
+        progress(gesendet, gesamt) wird nach jedem bestaetigten Stueck gerufen.
+        Gibt True bei Erfolg zurueck; Fehler werden geloggt.
+        """
+        size = os.path.getsize(path)
+        meta = dict(fields)
+        meta.update({
+            "filename": os.path.basename(path),
+            "size": str(size),
+            "sha256": _file_sha256(path),
+            "mime": mime,
+        })
+
+        try:
+            upload_id, offset = self._init(meta, thumb_path)
+        except (requests.RequestException, RuntimeError) as e:
+            log("chunk_upload_init_error %s" % e)
+            return False
+
+        if offset:
+            log("chunk_upload_resume upload_id=%s offset=%d/%d" % (upload_id, offset, size))
+
+        failures = 0
+        started = time.monotonic()
+        with open(path, "rb") as fh:
+            while offset < size:
+                fh.seek(offset)
+                data = fh.read(min(self.sizer.size, size - offset))
+
+                t0 = time.monotonic()
+                try:
+                    new_offset, accepted = self._send_chunk(upload_id, offset, data)
+                except (requests.RequestException, RuntimeError) as e:
+                    failures += 1
+                    self.sizer.failed()
+                    log("chunk_upload_error offset=%d failures=%d error=%s" % (offset, failures, e))
+                    if failures > self.max_failures:
+                        return False
+                    time.sleep(min(60, 2 ** failures))
+                    try:
+                        offset = self._status(upload_id)
+                    except (requests.RequestException, RuntimeError):
+                        pass
+                    continue
+
+                if accepted:
+                    self.sizer.record(len(data), time.monotonic() - t0)
+                else:
+                    log("chunk_upload_resync offset=%d server_offset=%d" % (offset, new_offset))
+
+                if new_offset <= offset:
+                    # Kein Fortschritt (409 mit gleichem Offset, Stueck ohne Vorruecken):
+                    # wie ein Fehler zaehlen, sonst dreht die Schleife ohne Pause endlos
+                    failures += 1
+                    log("chunk_upload_no_progress offset=%d server_offset=%d failures=%d" % (
+                        offset, new_offset, failures
+                    ))
+                    if failures > self.max_failures:
+                        return False
+                    time.sleep(min(60, 2 ** failures))
+                else:
+                    failures = 0
+                offset = min(new_offset, size)
+
+                if progress is not None:
+                    progress(offset, size)
+
+        try:
+            self._finish(upload_id)
+        except (requests.RequestException, RuntimeError) as e:
+            log("chunk_upload_finish_error %s" % e)
+            return False
+
+        elapsed = time.monotonic() - started
+        log("chunk_upload_ok size=%d seconds=%.1f last_chunk=%d" % (size, elapsed, self.sizer.size))
+        return True
@@ -11,6 +11,9 @@ from typing import Optional
 
 import requests
 from askutils import config
+from askutils.uploader import upload_ledger, upload_queue
+from askutils.utils import http_client
+from askutils.utils.image_variants import create_jpeg_variants
 
 # Influx Writer (wie bei raspi_status)
 try:
@@ -45,6 +48,10 @@ JPEG_QSCALE = 2
 # -----------------------------
 # Influx status logging
 # -----------------------------
+# Zuletzt gemeldeter Status (fuer den Live-Bild-Dienst)
+_last_status = None
+
+
 def _log_upload_status_to_influx(value: int) -> None:
     """
     Schreibt Upload-Status in Influx:
@@ -55,7 +62,11 @@ def _log_upload_status_to_influx(value: int) -> None:
       2 = upload_aborted_or_failed
       3 = file_not_found
       4 = file_too_old
+      5 = unchanged_skipped (gleiches Bild wie beim letzten Upload)
     """
+    global _last_status
+    _last_status = value
+
     try:
         if influx_writer is None:
             return
@@ -99,9 +110,9 @@ def _choose_newest_existing(*candidates: str) -> Optional[str]:
     return max(files, key=lambda p: os.path.getmtime(p))
 
 
-def _apply_upload_jitter() -> None:
+def _get_upload_jitter() -> int:
     """
-    Verteilt Lastspitzen: wartet zufällig 0..N Sekunden vor dem Upload.
+    Verteilt Lastspitzen: zufällige Wartezeit 0..N Sekunden vor dem Upload.
     Default bewusst klein (30s), damit keine Cron-Überlappung entsteht.
     """
     max_s = getattr(config, "IMAGE_UPLOAD_JITTER_MAX_SECONDS", 30)
@@ -111,9 +122,13 @@ def _apply_upload_jitter() -> None:
         max_s = 30
 
     if max_s <= 0:
-        return
+        return 0
+
+    return random.randint(0, max_s)
 
-    delay = random.randint(0, max_s)
+
+def _apply_upload_jitter() -> None:
+    delay = _get_upload_jitter()
     if delay > 0:
         log(f"Jitter: warte {delay}s vor API-Upload ...")
         time.sleep(delay)
@@ -127,6 +142,16 @@ def _is_file_too_old(path: str) -> bool:
       IMAGE_UPLOAD_MAX_AGE_SECONDS (Default 300)
         - <=0 deaktiviert den Check
     """
+    try:
+        mtime = os.path.getmtime(path)
+    except Exception:
+        # wenn wir nicht auf mtime zugreifen koennen, lieber normal weiter versuchen
+        return False
+
+    return _is_mtime_too_old(mtime)
+
+
+def _is_mtime_too_old(mtime: float) -> bool:
     max_age = getattr(config, "IMAGE_UPLOAD_MAX_AGE_SECONDS", 300)
     try:
         max_age = int(max_age)
@@ -136,12 +161,6 @@ def _is_file_too_old(path: str) -> bool:
     if max_age <= 0:
         return False
 
-    try:
-        mtime = os.path.getmtime(path)
-    except Exception:
-        # wenn wir nicht auf mtime zugreifen koennen, lieber normal weiter versuchen
-        return False
-
     age = time.time() - mtime
     return age > max_age
 
@@ -156,16 +175,18 @@ def _get_default_image_path() -> Optional[str]:
     INDI:
       ALLSKY_PATH + IMAGE_BASE_PATH + latest.jpg|latest.png
     """
+    return _choose_newest_existing(*_build_candidate_paths())
+
+
+def _build_candidate_paths() -> list:
     indi_flag = getattr(config, "INDI", 0)
 
     if not indi_flag:
-        jpg = os.path.join(config.ALLSKY_PATH, config.IMAGE_PATH, "image.jpg")
-        png = os.path.join(config.ALLSKY_PATH, config.IMAGE_PATH, "image.png")
-        return _choose_newest_existing(jpg, png)
+        base = os.path.join(config.ALLSKY_PATH, config.IMAGE_PATH)
+        return [os.path.join(base, "image.jpg"), os.path.join(base, "image.png")]
 
-    jpg = os.path.join(config.ALLSKY_PATH, config.IMAGE_BASE_PATH, "latest.jpg")
-    png = os.path.join(config.ALLSKY_PATH, config.IMAGE_BASE_PATH, "latest.png")
-    return _choose_newest_existing(jpg, png)
+    base = os.path.join(config.ALLSKY_PATH, config.IMAGE_BASE_PATH)
+    return [os.path.join(base, "latest.jpg"), os.path.join(base, "latest.png")]
 
 
 def _run_ffmpeg_create_jpg(src: str, dst: str, width: int) -> None:
@@ -195,15 +216,15 @@ def _create_variants(src: str, tmp_dir: str) -> dict:
     mobile = os.path.join(tmp_dir, "mobile.jpg")
     thumb = os.path.join(tmp_dir, "thumb.jpg")
 
-    _run_ffmpeg_create_jpg(src, fullhd, FULLHD_WIDTH)
-    _run_ffmpeg_create_jpg(src, mobile, MOBILE_WIDTH)
-    _run_ffmpeg_create_jpg(src, thumb, THUMB_WIDTH)
-
-    return {
-        "fullhd": fullhd,
-        "mobile": mobile,
-        "thumb": thumb,
-    }
+    return create_jpeg_variants(
+        src,
+        {
+            "fullhd": (fullhd, FULLHD_WIDTH),
+            "mobile": (mobile, MOBILE_WIDTH),
+            "thumb": (thumb, THUMB_WIDTH),
+        },
+        _run_ffmpeg_create_jpg,
+    )
 
 
 def _build_payload_meta() -> dict:
@@ -241,8 +262,9 @@ def _upload_variants_to_api(variants: dict) -> bool:
 
             data = _build_payload_meta()
 
-            response = requests.post(
+            response = http_client.post(
                 url,
+                label="image",
                 headers=headers,
                 data=data,
                 files=files,
@@ -288,6 +310,7 @@ def upload_image_api(image_path: str = None) -> bool:
     - 2: Upload abgebrochen/fehlgeschlagen
     - 3: Datei nicht gefunden
     - 4: Datei zu alt (Upload bewusst übersprungen)
+    - 5: Bild unverändert seit dem letzten Upload (übersprungen)
     """
 
     # --- Lokalen Pfad bestimmen ---
@@ -305,16 +328,39 @@ def upload_image_api(image_path: str = None) -> bool:
         _log_upload_status_to_influx(4)
         return False
 
+    # --- Unveraendert seit letztem Upload? ---
+    fp = None
+    if upload_ledger.is_enabled():
+        unchanged, fp = upload_ledger.check("image", image_path)
+        if unchanged:
+            log(f"Bild unveraendert seit letztem Upload, wird uebersprungen: {image_path}")
+            _log_upload_status_to_influx(5)
+            return True
+
     tmp_dir = None
 
     try:
-        _apply_upload_jitter()
+        queued = upload_queue.is_enabled()
+        if not queued:
+            _apply_upload_jitter()
 
         tmp_dir = tempfile.mkdtemp(prefix="askutils_image_api_")
         variants = _create_variants(image_path, tmp_dir)
 
+        if queued:
+            # Upload uebernimmt der Worker; Jitter als fruehester Startzeitpunkt
+            upload_queue.enqueue(
+                "image", "image", __name__,
+                args={"source_mtime": os.path.getmtime(image_path), "fingerprint": fp},
+                files=variants,
+                not_before=time.time() + _get_upload_jitter(),
+                supersede=True,
+            )
+            return True
+
         ok = _upload_variants_to_api(variants)
         if ok:
+            upload_ledger.record("image", fp)
             _log_upload_status_to_influx(1)
             return True
 
@@ -336,4 +382,21 @@ def upload_image_api(image_path: str = None) -> bool:
                         pass
                 os.rmdir(tmp_dir)
             except Exception:
-                pass
\ No newline at end of file
+                pass
+
+
+def upload_queued_job(args: dict, files: dict) -> bool:
+    """
+    Aufruf durch den Upload-Worker (upload_queue): Varianten liegen bereits vor.
+    Zu alte Bilder werden verworfen (Status 4) statt erneut versucht.
+    """
+    if _is_mtime_too_old(float(args.get("source_mtime") or 0)):
+        log("Live-Bild in der Warteschlange zu alt, verworfen.")
+        _log_upload_status_to_influx(4)
+        return True
+
+    ok = _upload_variants_to_api(files)
+    if ok:
+        upload_ledger.record("image", args.get("fingerprint"))
+    _log_upload_status_to_influx(1 if ok else 2)
+    return ok
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# askutils/uploader/image_upload_service.py
+#
+# Live-Bild-Upload als Dauerdienst statt Cron-Intervall:
+# - beobachtet image.jpg/latest.jpg (bzw. .png) per inotify (Fallback: Polling)
+# - wartet, bis die Datei kurz stabil ist (Entprellen halb geschriebener Bilder)
+# - laedt jedes neue Bild hoch, hoechstens alle IMAGE_SERVICE_MIN_INTERVAL_SECONDS;
+#   dazwischen eintreffende Bilder werden zusammengefasst (nur das neueste zaehlt)
+# - Upload selbst laeuft ueber die bestehenden Funktionen der Uploader-Module
+#   (Alters-Check, Jitter, Dedup, Warteschlange bleiben unveraendert)
+# - Latenz Bild (mtime) -> Server-Bestaetigung wird gemessen und periodisch
+#   nach tmp/image_upload_service.json geschrieben
+
+import importlib
+import json
+import os
+import signal
+import time
+
+from askutils import config
+from askutils.utils import http_client
+from askutils.utils.filewatch import open_watcher
+from askutils.utils.latency import LatencyHistogram
+
+UPLOADERS = {
+    "api": ("askutils.uploader.image_upload_api", "upload_image_api"),
+    "tj": ("askutils.uploader.image_upload_tj_api", "upload_image_tj_api"),
+    "indi": ("askutils.uploader.image_upload_indi_api", "upload_image_indi_api"),
+}
+
+UPLOAD_LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _get_status_path():
+    path = getattr(config, "IMAGE_SERVICE_STATUS_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "image_upload_service.json")
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ImageUploadService:
+
+    def __init__(self, uploader=None):
+        uploader = (uploader or getattr(config, "IMAGE_SERVICE_UPLOADER", "api") or "api").strip().lower()
+        if uploader not in UPLOADERS:
+            raise ValueError("Unbekannter Uploader: %s (erlaubt: %s)" % (uploader, ", ".join(UPLOADERS)))
+
+        module_name, func_name = UPLOADERS[uploader]
+        self.uploader = uploader
+        self.module = importlib.import_module(module_name)
+        self.upload_func = getattr(self.module, func_name)
+
+        self.min_interval = max(0.0, _cfg_float("IMAGE_SERVICE_MIN_INTERVAL_SECONDS", 30.0))
+        self.debounce = max(0.0, _cfg_float("IMAGE_SERVICE_DEBOUNCE_SECONDS", 1.0))
+        self.poll_seconds = max(0.1, _cfg_float("IMAGE_SERVICE_POLL_SECONDS", 1.0))
+        self.status_seconds = max(5.0, _cfg_float("IMAGE_SERVICE_STATUS_SECONDS", 60.0))
+        self.prefer_inotify = bool(getattr(config, "IMAGE_SERVICE_INOTIFY", True))
+
+        self.stop_requested = False
+        self.watchers = {}
+        self.names = {}
+
+        # Entprellen: letztes Ereignis und Dateisignatur zu diesem Zeitpunkt
+        self.pending = False
+        self.pending_since = 0.0
+        self.pending_sig = None
+        self.pending_path = None
+
+        self.last_upload_start = None
+        self.latency = LatencyHistogram(buckets_ms=UPLOAD_LATENCY_BUCKETS_MS)
+        self.dispatch = LatencyHistogram(buckets_ms=UPLOAD_LATENCY_BUCKETS_MS)
+        self.counts = {
+            "events": 0,
+            "uploads": 0,
+            "queued": 0,
+            "skipped": 0,
+            "failed": 0,
+            "coalesced": 0,
+        }
+        self.started_utc = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._last_status_write = 0.0
+
+    # ----------------------------------------------------------------
+    # Beobachtung
+    # ----------------------------------------------------------------
+
+    def _open_watchers(self):
+        self._close_watchers()
+        self.names = {}
+        for path in self.module._build_candidate_paths():
+            self.names.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+
+        for directory in self.names:
+            if not os.path.isdir(directory):
+                continue
+            watcher = open_watcher(directory, poll_seconds=self.poll_seconds, prefer_inotify=self.prefer_inotify)
+            self.watchers[directory] = watcher
+            log("Live-Bild-Dienst: beobachte %s (%s)" % (directory, watcher.kind))
+
+    def _close_watchers(self):
+        for watcher in self.watchers.values():
+            watcher.close()
+        self.watchers = {}
+
+    def _wait_for_events(self, timeout):
+        if not self.watchers:
+            time.sleep(timeout)
+            self._open_watchers()
+            return []
+
+        hits = []
+        # Meist nur ein Verzeichnis; bei mehreren wird die Wartezeit aufgeteilt
+        share = timeout / float(len(self.watchers))
+        for directory, watcher in list(self.watchers.items()):
+            for name in watcher.wait(share):
+                if name in self.names.get(directory, ()):
+                    hits.append(os.path.join(directory, name))
+            if watcher.gone:
+                log("Live-Bild-Dienst: Verzeichnis %s verschwunden, neu oeffnen." % directory)
+                self._open_watchers()
+                break
+        return hits
+
+    def _mark_pending(self, path):
+        if self.pending:
+            self.counts["coalesced"] += 1
+        self.pending = True
+        self.pending_since = time.monotonic()
+        self.pending_path = path
+        self.pending_sig = _signature(path)
+
+    # ----------------------------------------------------------------
+    # Upload
+    # ----------------------------------------------------------------
+
+    def _ready(self, now):
+        if not self.pending:
+            return False
+        if now - self.pending_since < self.debounce:
+            return False
+
+        sig = _signature(self.pending_path)
+        if sig != self.pending_sig:
+            # Datei hat sich seit dem Ereignis noch veraendert -> weiter warten
+            self.pending_since = now
+            self.pending_sig = sig
+            return False
+
+        if self.last_upload_start is not None and now - self.last_upload_start < self.min_interval:
+            return False
+        return True
+
+    def _upload(self):
+        self.pending = False
+        image_path = self.module._get_default_image_path()
+        if not image_path:
+            return
+
+        try:
+            frame_time = os.path.getmtime(image_path)
+        except OSError:
+            frame_time = None
+
+        self.last_upload_start = time.monotonic()
+        if frame_time is not None:
+            self.dispatch.record(time.time() - frame_time)
+
+        self.module._last_status = None
+        try:
+            ok = self.upload_func(image_path)
+        except Exception as e:
+            log("Live-Bild-Dienst: Upload-Fehler: %s" % e)
+            ok = False
+        status = self.module._last_status
+
+        if status == 1:
+            self.counts["uploads"] += 1
+            if frame_time is not None:
+                self.latency.record(time.time() - frame_time)
+        elif status is None and ok:
+            self.counts["queued"] += 1
+        elif ok or status in (4, 5):
+            self.counts["skipped"] += 1
+        else:
+            self.counts["failed"] += 1
+
+    # ----------------------------------------------------------------
+    # Status
+    # ----------------------------------------------------------------
+
+    def write_status(self):
+        self._last_status_write = time.monotonic()
+        path = _get_status_path()
+        data = {
+            "uploader": self.uploader,
+            "watchers": {d: w.kind for d, w in self.watchers.items()},
+            "started_utc": self.started_utc,
+            "min_interval_seconds": self.min_interval,
+            "counts": dict(self.counts),
+            "latency": self.latency.to_dict(),
+            "dispatch": self.dispatch.to_dict(),
+            "http": http_client.stats(),
+            "updated_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            log("Live-Bild-Dienst: Status konnte nicht geschrieben werden: %s" % e)
+
+    def request_stop(self, *_args):
+        self.stop_requested = True
+
+    def run(self):
+        self._open_watchers()
+        if not self.watchers:
+            log("Live-Bild-Dienst: kein Bildverzeichnis gefunden, warte ...")
+
+        # Beim Start aktuellen Stand einmal pruefen (Dedup verhindert Doppel-Upload)
+        current = self.module._get_default_image_path()
+        if current:
+            self._mark_pending(current)
+
+        while not self.stop_requested:
+            for path in self._wait_for_events(self.poll_seconds):
+                self.counts["events"] += 1
+                self._mark_pending(path)
+
+            if self._ready(time.monotonic()):
+                self._upload()
+
+            if time.monotonic() - self._last_status_write >= self.status_seconds:
+                self.write_status()
+
+        self.write_status()
+        self._close_watchers()
+        log("Live-Bild-Dienst: beendet.")
+        return True
+
+
+def run_image_upload_service(uploader=None):
+    service = ImageUploadService(uploader)
+    signal.signal(signal.SIGTERM, service.request_stop)
+    signal.signal(signal.SIGINT, service.request_stop)
+    return service.run()
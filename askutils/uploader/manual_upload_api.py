@@ -7,9 +7,10 @@ import tempfile
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
-import requests
-
 from askutils import config
+from askutils.utils import http_client
+from askutils.utils.image_variants import create_jpeg_variants
+from askutils.utils.multipart_stream import MultipartStream, progress_logger
 
 try:
     from askutils.ASKsecret import API_KEY
@@ -144,12 +145,13 @@ def _create_three_variants(src: str, tmp_dir: str, prefix: str) -> Dict[str, str
         "mobile": os.path.join(tmp_dir, f"{prefix}_mobile.jpg"),
         "thumb": os.path.join(tmp_dir, f"{prefix}_thumb.jpg"),
     }
+    widths = {"fullhd": FULLHD_WIDTH, "mobile": MOBILE_WIDTH, "thumb": THUMB_WIDTH}
 
-    _create_jpeg_derivative(src, out["fullhd"], FULLHD_WIDTH)
-    _create_jpeg_derivative(src, out["mobile"], MOBILE_WIDTH)
-    _create_jpeg_derivative(src, out["thumb"], THUMB_WIDTH)
-
-    return out
+    return create_jpeg_variants(
+        src,
+        {name: (path, widths[name]) for name, path in out.items()},
+        _create_jpeg_derivative,
+    )
 
 
 # ---------------------------------------------------------------------
@@ -237,6 +239,20 @@ def _prepare_video_and_thumb(src_video: str, tmp_dir: str) -> Tuple[str, str]:
 # ---------------------------------------------------------------------
 # HTTPS Upload
 # ---------------------------------------------------------------------
+def _post_stream(api_url: str, asset: str, fields: Dict[str, str], files: Dict[str, Tuple[str, str, str]]):
+    # Multipart-Body wird beim Senden blockweise aus den Dateien gelesen
+    body = MultipartStream(fields, files, progress=progress_logger(log, asset))
+    with body:
+        return http_client.post(
+            api_url,
+            label=f"manual_{asset}",
+            headers={"X-API-Key": API_KEY, "Content-Type": body.content_type},
+            data=body,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            verify=HTTP_VERIFY_SSL,
+        )
+
+
 def _post_triple_jpg(asset: str, date_str: str, files_map: Dict[str, str]) -> bool:
     api_url = _get_api_url()
     if not api_url or not API_KEY:
@@ -244,22 +260,16 @@ def _post_triple_jpg(asset: str, date_str: str, files_map: Dict[str, str]) -> bo
         return False
 
     try:
-        with open(files_map["fullhd"], "rb") as f1, \
-             open(files_map["mobile"], "rb") as f2, \
-             open(files_map["thumb"], "rb") as f3:
-
-            response = requests.post(
-                api_url,
-                headers={"X-API-Key": API_KEY},
-                data={"date": date_str, "asset": asset},
-                files={
-                    "fullhd": ("fullhd.jpg", f1, "image/jpeg"),
-                    "mobile": ("mobile.jpg", f2, "image/jpeg"),
-                    "thumb": ("thumb.jpg", f3, "image/jpeg"),
-                },
-                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
-                verify=HTTP_VERIFY_SSL,
-            )
+        response = _post_stream(
+            api_url,
+            asset,
+            {"date": date_str, "asset": asset},
+            {
+                "fullhd": ("fullhd.jpg", files_map["fullhd"], "image/jpeg"),
+                "mobile": ("mobile.jpg", files_map["mobile"], "image/jpeg"),
+                "thumb": ("thumb.jpg", files_map["thumb"], "image/jpeg"),
+            },
+        )
 
         try:
             payload = response.json()
@@ -289,18 +299,15 @@ def _post_video(asset: str, date_str: str, video_path: str, thumb_path: str) ->
     video_mime = "video/mp4" if video_ext == ".mp4" else "video/webm"
 
     try:
-        with open(video_path, "rb") as fv, open(thumb_path, "rb") as ft:
-            response = requests.post(
-                api_url,
-                headers={"X-API-Key": API_KEY},
-                data={"date": date_str, "asset": asset},
-                files={
-                    "file": (os.path.basename(video_path), fv, video_mime),
-                    "thumb": ("thumb.jpg", ft, "image/jpeg"),
-                },
-                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
-                verify=HTTP_VERIFY_SSL,
-            )
+        response = _post_stream(
+            api_url,
+            asset,
+            {"date": date_str, "asset": asset},
+            {
+                "file": (os.path.basename(video_path), video_path, video_mime),
+                "thumb": ("thumb.jpg", thumb_path, "image/jpeg"),
+            },
+        )
 
         try:
             payload = response.json()
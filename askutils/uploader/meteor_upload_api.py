@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import base64
+import json
 import os
 import random
 import time
@@ -9,6 +10,8 @@ import time
 import requests
 
 from askutils import config
+from askutils.utils import http_client
+from askutils.utils.multipart_stream import MultipartStream
 
 try:
     from askutils.ASKsecret import API_KEY
@@ -24,6 +27,21 @@ HTTP_CONNECT_TIMEOUT = 20
 HTTP_READ_TIMEOUT = 180
 HTTP_VERIFY_SSL = True
 
+# Dateien je Kandidat (Feldname -> (Dateiname, MIME))
+CANDIDATE_FILES = (
+    ("candidate_json", "candidate.json", "application/json"),
+    ("current_fullhd", "current_fullhd.jpg", "image/jpeg"),
+    ("current_small", "current_small.jpg", "image/jpeg"),
+    ("previous_small", "previous_small.jpg", "image/jpeg"),
+    ("diff_small", "diff_small.jpg", "image/jpeg"),
+    ("boxed_small", "boxed_small.jpg", "image/jpeg"),
+)
+
+# Statuscodes, bei denen der Server den Sammel-Upload nicht kennt.
+# 400 gehoert nicht dazu: Endpunkt existiert, nur diese Anfrage ist fehlerhaft
+# (Body wird geloggt, kein Einzel-Upload-Fallback, der den Fehler verdecken wuerde)
+BATCH_UNSUPPORTED_STATUS = (404, 405, 501)
+
 
 def log(msg):
     print(msg, flush=True)
@@ -33,6 +51,22 @@ def _get_api_url():
     return base64.b64decode(_DEFAULT_ENC_METEOR_UPLOAD_API_URL).decode().strip()
 
 
+def _is_batch_enabled():
+    return bool(getattr(config, "METEOR_UPLOAD_BATCH", False))
+
+
+def _get_batch_size():
+    try:
+        size = int(getattr(config, "METEOR_UPLOAD_BATCH_SIZE", 10))
+    except Exception:
+        size = 10
+    return max(1, size)
+
+
+def _get_batch_url():
+    return str(getattr(config, "METEOR_BATCH_UPLOAD_URL", "") or "").strip() or _get_api_url()
+
+
 def _get_kamera_id():
     return str(getattr(config, "KAMERA_ID", None) or getattr(config, "KAMERA", None) or "")
 
@@ -123,8 +157,9 @@ def _upload_candidate(day_dir_name, day_dir, candidate_id):
                 "day_index": ("index.json", f_index, "application/json"),
             }
 
-            response = requests.post(
+            response = http_client.post(
                 url,
+                label="meteor",
                 headers=headers,
                 data=data,
                 files=files,
@@ -158,31 +193,170 @@ def _upload_candidate(day_dir_name, day_dir, candidate_id):
     return True
 
 
-def upload_pending_meteor_candidates(day_dir_name, day_dir):
-    _apply_upload_jitter()
+def _pending_ids_from_index(day_dir):
+    # Offene Kandidaten aus index.json statt jedes Kandidatenverzeichnis abzufragen
+    index_path = os.path.join(day_dir, "index.json")
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index_data = json.load(f)
+    except Exception as e:
+        log("Meteor-Upload: index.json nicht lesbar: %s" % str(e))
+        return []
+
+    ids = []
+    for c in index_data.get("candidates") or []:
+        candidate_id = c.get("candidate_id")
+        if candidate_id and not c.get("uploaded"):
+            ids.append(candidate_id)
+    return sorted(ids)
+
+
+# -----------------------------------------------------------
+# Sammel-Upload
+#
+# Ein Request pro Batch (multipart, beim Senden aus den Dateien gestreamt):
+#   Felder:  kamera, asset="meteor_batch", day,
+#            manifest = {"candidates": [{"candidate_id": "...",
+#                                        "files": {"candidate_json": "c0_candidate_json", ...}}]}
+#   Dateien: c<i>_<feld> je Kandidat, day_index (index.json) nur einmal
+#   Antwort: {"ok": true, "results": {"<candidate_id>": {"ok": true} | {"ok": false, "error": "..."}}}
+# Nur Kandidaten mit results[id].ok == true gelten als hochgeladen.
+# -----------------------------------------------------------
+def _batch_ready_ids(day_dir, candidate_ids):
+    ready = []
+    for candidate_id in candidate_ids:
+        paths = _candidate_paths(day_dir, candidate_id)
+        if os.path.isfile(paths["uploaded_ok"]):
+            continue
+        missing = [paths[key] for key, _name, _mime in CANDIDATE_FILES if not os.path.isfile(paths[key])]
+        if missing:
+            log("Meteor-Upload: Datei fehlt: %s" % missing[0])
+            continue
+        ready.append(candidate_id)
+    return ready
+
+
+def _upload_batch(day_dir_name, day_dir, candidate_ids):
+    """
+    Laedt mehrere Kandidaten in einem Request hoch.
+    Gibt die vom Server bestaetigten IDs zurueck, oder None wenn der Server
+    den Sammel-Upload nicht unterstuetzt.
+    """
+    manifest = []
+    files = {}
+    for i, candidate_id in enumerate(candidate_ids):
+        paths = _candidate_paths(day_dir, candidate_id)
+        names = {}
+        for key, filename, mime in CANDIDATE_FILES:
+            part = "c%d_%s" % (i, key)
+            files[part] = (filename, paths[key], mime)
+            names[key] = part
+        manifest.append({"candidate_id": candidate_id, "files": names})
+    files["day_index"] = ("index.json", os.path.join(day_dir, "index.json"), "application/json")
 
+    data = {
+        "kamera": _get_kamera_id(),
+        "asset": "meteor_batch",
+        "day": day_dir_name,
+        "manifest": json.dumps({"candidates": manifest}),
+    }
+
+    try:
+        body = MultipartStream(data, files)
+        with body:
+            response = http_client.post(
+                _get_batch_url(),
+                label="meteor_batch",
+                headers={"X-API-Key": API_KEY, "Content-Type": body.content_type},
+                data=body,
+                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                verify=HTTP_VERIFY_SSL,
+            )
+    except requests.RequestException as e:
+        log("Meteor-Sammel-Upload fehlgeschlagen (Request): %s" % str(e))
+        return []
+    except Exception as e:
+        log("Meteor-Sammel-Upload fehlgeschlagen (Prepare): %s" % str(e))
+        return []
+
+    if response.status_code in BATCH_UNSUPPORTED_STATUS:
+        log("Meteor-Sammel-Upload vom Server abgelehnt (HTTP %s), Einzel-Upload." % response.status_code)
+        return None
+
+    if response.status_code != 200:
+        body_text = (response.text or "")[:1000].replace("\n", " ").replace("\r", " ")
+        log("Meteor-Sammel-Upload HTTP-Fehler %s: %s" % (response.status_code, body_text))
+        return []
+
+    try:
+        result = response.json()
+    except Exception:
+        log("Meteor-Sammel-Upload: API antwortet nicht mit JSON: %s" % ((response.text or "")[:500]))
+        return []
+
+    results = result.get("results") if isinstance(result, dict) else None
+    if not isinstance(results, dict):
+        log("Meteor-Sammel-Upload: Antwort ohne results: %s" % str(result)[:1000])
+        return []
+
+    acked = []
+    for candidate_id in candidate_ids:
+        entry = results.get(candidate_id)
+        if isinstance(entry, dict) and entry.get("ok") is True:
+            acked.append(candidate_id)
+        else:
+            error = entry.get("error") if isinstance(entry, dict) else "keine Bestaetigung"
+            log("Meteor-Sammel-Upload: %s nicht angenommen: %s" % (candidate_id, error))
+
+    log("Meteor-Sammel-Upload: %d/%d Kandidaten bestaetigt." % (len(acked), len(candidate_ids)))
+    return acked
+
+
+def upload_pending_meteor_candidates(day_dir_name, day_dir, candidate_ids=None, on_uploaded=None):
+    """
+    Laedt offene Kandidaten hoch und gibt die hochgeladenen IDs zurueck.
+    on_uploaded(ids) wird nach jedem bestaetigten Upload bzw. Batch gerufen,
+    damit der Aufrufer sofort markieren kann.
+    """
     uploaded_ids = []
 
     if not os.path.isdir(day_dir):
         return uploaded_ids
 
-    for name in sorted(os.listdir(day_dir)):
-        candidate_dir = os.path.join(day_dir, name)
-        if not os.path.isdir(candidate_dir):
-            continue
-        if name == "quicklook":
-            continue
+    if candidate_ids is None:
+        candidate_ids = _pending_ids_from_index(day_dir)
 
-        candidate_json = os.path.join(candidate_dir, "candidate.json")
-        uploaded_ok = os.path.join(candidate_dir, "uploaded.ok")
+    if not candidate_ids:
+        return uploaded_ids
 
-        if not os.path.isfile(candidate_json):
-            continue
-        if os.path.isfile(uploaded_ok):
-            continue
+    if not API_KEY:
+        log("Meteor-Upload: API_KEY fehlt.")
+        return uploaded_ids
 
-        ok = _upload_candidate(day_dir_name, day_dir, name)
-        if ok:
-            uploaded_ids.append(name)
+    _apply_upload_jitter()
 
-    return uploaded_ids
\ No newline at end of file
+    def _done(ids):
+        if ids:
+            uploaded_ids.extend(ids)
+            if on_uploaded is not None:
+                on_uploaded(ids)
+
+    remaining = list(candidate_ids)
+
+    if _is_batch_enabled():
+        ready = _batch_ready_ids(day_dir, remaining)
+        size = _get_batch_size()
+        remaining = []
+        for start in range(0, len(ready), size):
+            acked = _upload_batch(day_dir_name, day_dir, ready[start:start + size])
+            if acked is None:
+                # Server kennt den Sammel-Upload nicht -> Rest einzeln
+                remaining = ready[start:]
+                break
+            _done(acked)
+
+    for name in remaining:
+        if _upload_candidate(day_dir_name, day_dir, name):
+            _done([name])
+
+    return uploaded_ids
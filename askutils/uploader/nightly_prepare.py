@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# askutils/uploader/nightly_prepare.py
+#
+# Vorbereitung der Nightly-Assets (Keogramm, Startrail, Video) fuer die
+# nightly_upload_*_api Module:
+# - Stabilitaets-Checks laufen fuer alle Assets gleichzeitig (jeder Check
+#   wartet bis zu NIGHTLY_STABLE_WINDOW_SECONDS, meist nur mit sleep)
+# - sobald ein Asset bereit ist, startet seine Aufbereitung in einem kleinen
+#   Worker-Pool (NIGHTLY_PREPARE_WORKERS), so ueberlappen Bildvarianten mit
+#   dem langen Video-Transcode
+# - Zeit je Stufe und Asset wird geloggt
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from askutils import config
+
+
+def _get_workers():
+    try:
+        workers = int(getattr(config, "NIGHTLY_PREPARE_WORKERS", 2))
+    except Exception:
+        workers = 2
+    return max(1, workers)
+
+
+class StageTimer:
+    """Sammelt Dauer je (Stufe, Asset), thread-sicher."""
+
+    def __init__(self, log):
+        self.log = log
+        self.started = time.monotonic()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, asset):
+        t0 = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            seconds = time.monotonic() - t0
+            with self._lock:
+                self.stages.append((name, asset, seconds, ok))
+            self.log(f"timing stage={name} asset={asset} seconds={seconds:.1f} ok={ok}")
+
+    def summary(self):
+        total = time.monotonic() - self.started
+        with self._lock:
+            busy = sum(s for _n, _a, s, _ok in self.stages)
+            parts = " ".join(f"{n}:{a}={s:.1f}" for n, a, s, _ok in self.stages)
+        # busy > total heisst: Stufen liefen parallel
+        self.log(f"prepare_timing total={total:.1f} sum_stages={busy:.1f} {parts}")
+        return total
+
+
+def prepare_assets(assets, file_ready, prepare_one, log):
+    """
+    assets:      [(asset, pfad), ...]
+    file_ready:  file_ready(pfad) -> bool (Alter/Stabilitaet)
+    prepare_one: prepare_one(asset, pfad, timer) -> dict(asset=, files=, tmp=)
+
+    Gibt (prepared, not_ready, failed) zurueck; prepared in der Reihenfolge
+    von assets, not_ready/failed als Listen von Asset-Namen.
+    """
+    timer = StageTimer(log)
+    results = {}
+    not_ready = []
+    failed = []
+    lock = threading.Lock()
+
+    prepare_pool = ThreadPoolExecutor(max_workers=_get_workers(), thread_name_prefix="nightly-prepare")
+
+    def _prepare(idx, asset, path):
+        try:
+            job = prepare_one(asset, path, timer)
+        except Exception as e:
+            log(f"prepare_failed asset={asset} error={e}")
+            with lock:
+                failed.append(asset)
+            return
+        log(f"prepare_ok asset={asset}")
+        with lock:
+            results[idx] = job
+
+    def _check(idx, asset, path):
+        log(f"prepare_start asset={asset} path={path}")
+        try:
+            with timer.stage("stable", asset):
+                ready = file_ready(path)
+        except Exception as e:
+            log(f"prepare_check_failed asset={asset} error={e}")
+            ready = False
+        if not ready:
+            log(f"prepare_skip_not_ready asset={asset} path={path}")
+            with lock:
+                not_ready.append(asset)
+            return None
+        return prepare_pool.submit(_prepare, idx, asset, path)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(assets)), thread_name_prefix="nightly-stable") as check_pool:
+            checks = [check_pool.submit(_check, idx, asset, path) for idx, (asset, path) in enumerate(assets)]
+            prepares = [c.result() for c in checks]
+        for p in prepares:
+            if p is not None:
+                p.result()
+    finally:
+        prepare_pool.shutdown(wait=True)
+
+    timer.summary()
+    prepared = [results[idx] for idx in sorted(results)]
+    return prepared, not_ready, failed
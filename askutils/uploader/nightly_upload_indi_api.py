@@ -14,6 +14,10 @@ from datetime import datetime, timedelta
 
 import requests
 from askutils import config
+from askutils.uploader import chunked_upload, nightly_prepare, upload_queue
+from askutils.utils import http_client, video_reduce
+from askutils.utils.image_variants import create_jpeg_variants
+from askutils.utils.multipart_stream import MultipartStream, progress_logger
 
 try:
     from askutils.utils import influx_writer
@@ -35,8 +39,6 @@ THUMB_WIDTH = 480
 JPEG_QSCALE = 2
 VIDEO_CRF = 26
 VIDEO_PRESET = "medium"
-VIDEO_CODEC = "libx264"
-VIDEO_PIXEL_FORMAT = "yuv420p"
 
 MIN_FILE_AGE_MINUTES = int(getattr(config, "NIGHTLY_MIN_FILE_AGE_MINUTES", 5))
 STABLE_WINDOW_SECONDS = int(getattr(config, "NIGHTLY_STABLE_WINDOW_SECONDS", 90))
@@ -323,11 +325,11 @@ def _create_three(src, tmp):
     m = os.path.join(tmp, "mobile.jpg")
     t = os.path.join(tmp, "thumb.jpg")
 
-    _create_jpg(src, f, FULLHD_WIDTH)
-    _create_jpg(src, m, MOBILE_WIDTH)
-    _create_jpg(src, t, THUMB_WIDTH)
-
-    return dict(fullhd=f, mobile=m, thumb=t)
+    return create_jpeg_variants(
+        src,
+        dict(fullhd=(f, FULLHD_WIDTH), mobile=(m, MOBILE_WIDTH), thumb=(t, THUMB_WIDTH)),
+        _create_jpg,
+    )
 
 
 def _video_duration(path):
@@ -341,24 +343,6 @@ def _video_duration(path):
     return float(out)
 
 
-def _reduce_video(src, dst):
-    cmd = [
-        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
-        "-i", src,
-        "-vf", _scale_filter(FULLHD_WIDTH),
-        "-c:v", VIDEO_CODEC,
-        "-preset", VIDEO_PRESET,
-        "-crf", str(VIDEO_CRF),
-        "-pix_fmt", VIDEO_PIXEL_FORMAT,
-        "-profile:v", "main",
-        "-level", "4.0",
-        "-movflags", "+faststart",
-        "-an",
-        dst
-    ]
-    subprocess.check_call(cmd)
-
-
 def _video_thumb(src, dst):
     mid = _video_duration(src) / 2.0
 
@@ -375,30 +359,76 @@ def _video_thumb(src, dst):
 
 
 def _prepare_video(src, tmp):
-    ext = os.path.splitext(src)[1].lower()
-    reduced = os.path.join(tmp, "video" + ext)
+    # Probe, Profilwahl und Fallback-Kette: askutils/utils/video_reduce.py
+    final_video, _stats = video_reduce.reduce_video(src, tmp, FULLHD_WIDTH, VIDEO_CRF, VIDEO_PRESET, log)
+
     thumb = os.path.join(tmp, "thumb.jpg")
+    _video_thumb(final_video, thumb)
+    return final_video, thumb
+
+
+# -----------------------------------------------------------
+# Vorbereitung
+# -----------------------------------------------------------
+def _prepare_asset(asset, path, timer):
+    tmp = tempfile.mkdtemp(prefix="nightly_{0}_".format(asset))
 
-    _reduce_video(src, reduced)
+    try:
+        if asset in ("keogram", "startrail"):
+            with timer.stage("variants", asset):
+                files = _create_three(path, tmp)
+
+        elif asset == "video":
+            with timer.stage("video", asset):
+                files = _prepare_video(path, tmp)
 
-    src_size = os.path.getsize(src)
-    reduced_size = os.path.getsize(reduced)
+        else:
+            raise ValueError("unknown_asset")
 
-    if reduced_size >= src_size * 0.95:
-        final_video = os.path.join(tmp, "video_original" + ext)
-        shutil.copy2(src, final_video)
-        _video_thumb(final_video, thumb)
-        log("video_keep_original original_size={0} reduced_size={1}".format(src_size, reduced_size))
-        return final_video, thumb
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
 
-    _video_thumb(reduced, thumb)
-    log("video_use_reduced original_size={0} reduced_size={1}".format(src_size, reduced_size))
-    return reduced, thumb
+    return dict(asset=asset, files=files, tmp=tmp)
 
 
 # -----------------------------------------------------------
 # Upload
 # -----------------------------------------------------------
+def _upload_video_chunked(asset, date, video, thumb, mime, publish_last):
+    # Fortsetzbarer Upload in Teilstuecken (NIGHTLY_UPLOAD_CHUNKED)
+    uploader = chunked_upload.ChunkedUploader(
+        chunked_upload.get_chunk_url(),
+        API_KEY,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        verify=HTTP_VERIFY_SSL,
+    )
+    fields = {
+        "date": date,
+        "asset": asset,
+        "publish_last": "1" if publish_last else "0",
+    }
+    ok = uploader.upload(video, thumb, fields, mime)
+    if ok:
+        log("upload_ok asset={0} mode=chunked".format(asset))
+    return ok
+
+
+def _post_stream(url, asset, headers, data, files):
+    # Multipart-Body wird beim Senden blockweise aus den Dateien gelesen
+    body = MultipartStream(data, files, progress=progress_logger(log, f"asset={asset}"))
+    with body:
+        return http_client.post(
+            url,
+            label=f"nightly_{asset}",
+            headers=dict(headers, **{"Content-Type": body.content_type}),
+            data=body,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            verify=HTTP_VERIFY_SSL,
+        )
+
+
 def _upload(asset, date, datafiles, publish_last):
     url = _get_api_url()
 
@@ -435,27 +465,21 @@ def _upload(asset, date, datafiles, publish_last):
                 )
             )
 
-            with open(v, "rb") as fh_video, open(t, "rb") as fh_thumb:
-                files = {
-                    "file": (os.path.basename(v), fh_video, video_mime),
-                    "thumb": ("thumb.jpg", fh_thumb, "image/jpeg"),
-                }
-
-                data = {
-                    "date": date,
-                    "asset": asset,
-                    "publish_last": "1" if publish_last else "0",
-                    "kamera": str(_get_camera_id() or ""),
-                }
-
-                r = requests.post(
-                    url,
-                    headers=headers,
-                    data=data,
-                    files=files,
-                    timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
-                    verify=HTTP_VERIFY_SSL,
-                )
+            if chunked_upload.is_enabled():
+                return _upload_video_chunked(asset, date, v, t, video_mime, publish_last)
+
+            data = {
+                "date": date,
+                "asset": asset,
+                "publish_last": "1" if publish_last else "0",
+                "kamera": str(_get_camera_id() or ""),
+            }
+
+            files = {
+                "file": (os.path.basename(v), v, video_mime),
+                "thumb": ("thumb.jpg", t, "image/jpeg"),
+            }
+            r = _post_stream(url, asset, headers, data, files)
 
         else:
             fullhd = datafiles["fullhd"]
@@ -476,31 +500,19 @@ def _upload(asset, date, datafiles, publish_last):
                 )
             )
 
-            with open(fullhd, "rb") as fh_fullhd, \
-                 open(mobile, "rb") as fh_mobile, \
-                 open(thumb, "rb") as fh_thumb:
-
-                files = {
-                    "fullhd": ("fullhd.jpg", fh_fullhd, "image/jpeg"),
-                    "mobile": ("mobile.jpg", fh_mobile, "image/jpeg"),
-                    "thumb": ("thumb.jpg", fh_thumb, "image/jpeg"),
-                }
-
-                data = {
-                    "date": date,
-                    "asset": asset,
-                    "publish_last": "1" if publish_last else "0",
-                    "kamera": str(_get_camera_id() or ""),
-                }
-
-                r = requests.post(
-                    url,
-                    headers=headers,
-                    data=data,
-                    files=files,
-                    timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
-                    verify=HTTP_VERIFY_SSL,
-                )
+            data = {
+                "date": date,
+                "asset": asset,
+                "publish_last": "1" if publish_last else "0",
+                "kamera": str(_get_camera_id() or ""),
+            }
+
+            files = {
+                "fullhd": ("fullhd.jpg", fullhd, "image/jpeg"),
+                "mobile": ("mobile.jpg", mobile, "image/jpeg"),
+                "thumb": ("thumb.jpg", thumb, "image/jpeg"),
+            }
+            r = _post_stream(url, asset, headers, data, files)
 
     except requests.RequestException as e:
         log("upload_request_exception {0} error={1}".format(asset, e))
@@ -564,17 +576,22 @@ def _collect(date):
 # -----------------------------------------------------------
 # Jitter
 # -----------------------------------------------------------
-def _apply_jitter(date):
+def _jitter_slot(date):
     window = int(getattr(config, "NIGHTLY_UPLOAD_JITTER_MAX_SECONDS", 3600))
     if window <= 0:
-        log("jitter_seconds=0")
-        return
+        return 0
 
     kamera = _get_camera_id() or "ASK000"
     seed = "{0}|{1}".format(kamera, date).encode()
     slot = int(hashlib.sha256(seed).hexdigest()[:8], 16) % window
+    return slot
+
+
+def _apply_jitter(date):
+    slot = _jitter_slot(date)
     log("jitter_seconds={0}".format(slot))
-    time.sleep(slot)
+    if slot > 0:
+        time.sleep(slot)
 
 
 # -----------------------------------------------------------
@@ -593,39 +610,20 @@ def upload_nightly_batch(date=None):
         _log_nightly_status(3, "batch")
         return False
 
-    prepared = []
-
-    for asset, path in assets:
-        log("prepare_start asset={0} path={1}".format(asset, path))
-
-        if not _file_ready(path):
-            log("prepare_skip_not_ready asset={0} path={1}".format(asset, path))
-            _log_nightly_status(4, asset)
-            continue
-
-        tmp = tempfile.mkdtemp(prefix="nightly_{0}_".format(asset))
-
-        try:
-            if asset in ("keogram", "startrail"):
-                variants = _create_three(path, tmp)
-                prepared.append(dict(asset=asset, files=variants, tmp=tmp))
-
-            elif asset == "video":
-                video, thumb = _prepare_video(path, tmp)
-                prepared.append(dict(asset=asset, files=(video, thumb), tmp=tmp))
-
-            log("prepare_ok asset={0}".format(asset))
-
-        except Exception as e:
-            log("prepare_failed asset={0} error={1}".format(asset, e))
-            _log_nightly_status(2, asset)
-            shutil.rmtree(tmp, ignore_errors=True)
+    prepared, not_ready, failed = nightly_prepare.prepare_assets(assets, _file_ready, _prepare_asset, log)
+    for asset in not_ready:
+        _log_nightly_status(4, asset)
+    for asset in failed:
+        _log_nightly_status(2, asset)
 
     if not prepared:
         log("nothing_prepared")
         _log_nightly_status(2, "batch")
         return False
 
+    if upload_queue.is_enabled():
+        return _enqueue_prepared(date, prepared)
+
     _apply_jitter(date)
 
     any_success = False
@@ -666,4 +664,52 @@ def upload_nightly_batch(date=None):
     else:
         _log_nightly_status(2, "batch")
 
-    return any_success
\ No newline at end of file
+    return any_success
+
+
+# -----------------------------------------------------------
+# Upload-Warteschlange
+# -----------------------------------------------------------
+def _enqueue_prepared(date, prepared):
+    # Jitter-Slot wird zum fruehesten Startzeitpunkt im Worker
+    slot = _jitter_slot(date)
+    not_before = time.time() + slot
+    any_queued = False
+
+    for job in prepared:
+        files = job["files"]
+        if job["asset"] == "video":
+            files = {"video": files[0], "thumb": files[1]}
+
+        try:
+            upload_queue.enqueue(
+                "nightly", "%s/%s" % (date, job["asset"]), __name__,
+                args={"asset": job["asset"], "date": date},
+                files=files,
+                not_before=not_before,
+                supersede=True,
+            )
+            any_queued = True
+            log("queued asset={0} not_before=+{1}s".format(job["asset"], slot))
+        except Exception as e:
+            log("queue_failed asset={0} error={1}".format(job["asset"], e))
+            _log_nightly_status(2, job["asset"])
+        finally:
+            shutil.rmtree(job["tmp"], ignore_errors=True)
+
+    log("nightly_queued")
+    return any_queued
+
+
+def upload_queued_job(args, files):
+    asset = args["asset"]
+    datafiles = (files["video"], files["thumb"]) if asset == "video" else files
+
+    ok = _upload(asset, args["date"], datafiles, True)
+    if ok:
+        _log_nightly_status(1, asset)
+    return ok
+
+
+def upload_queued_job_failed(args):
+    _log_nightly_status(2, args.get("asset"))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# askutils/uploader/upload_ledger.py
+#
+# Kleines Upload-Journal fuer das Live-Bild: merkt sich pro Kanal den zuletzt
+# hochgeladenen Quell-Stand (Pfad, mtime, Groesse, Kurz-Hash).
+# Steht die Aufnahme-Software oder liefert sie identische Bilder, werden
+# Variantenerzeugung und HTTP-Upload uebersprungen.
+#
+# Kurz-Hash: blake2b ueber Groesse + ersten und letzten Block der Datei.
+# Das reicht, um "gleiche Datei neu geschrieben" von "neues Bild" zu
+# unterscheiden, ohne das ganze Bild zu lesen.
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+from askutils import config
+
+HASH_BLOCK_BYTES = 64 * 1024
+
+
+def is_enabled() -> bool:
+    return bool(getattr(config, "IMAGE_UPLOAD_DEDUP", True))
+
+
+def _get_ledger_path() -> str:
+    path = getattr(config, "IMAGE_UPLOAD_LEDGER_FILE", None)
+    if path:
+        return path
+    # AllSkyKamera/tmp/image_upload_ledger.json (relativ zum Repo)
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "image_upload_ledger.json")
+
+
+def fingerprint(path: str) -> dict:
+    """
+    Liefert path, mtime_ns, size und hash der Datei.
+    """
+    st = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(st.st_size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(HASH_BLOCK_BYTES))
+        if st.st_size > 2 * HASH_BLOCK_BYTES:
+            f.seek(-HASH_BLOCK_BYTES, os.SEEK_END)
+            h.update(f.read(HASH_BLOCK_BYTES))
+        elif st.st_size > HASH_BLOCK_BYTES:
+            h.update(f.read())
+    return {
+        "path": os.path.abspath(path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "hash": h.hexdigest(),
+    }
+
+
+def _load() -> dict:
+    try:
+        with open(_get_ledger_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def check(channel: str, path: str) -> Tuple[bool, Optional[dict]]:
+    """
+    (unveraendert, fingerprint). unveraendert=True, wenn der Quell-Stand
+    dem zuletzt hochgeladenen entspricht. Bei Lesefehlern wird normal
+    hochgeladen.
+    """
+    last = _load().get(channel)
+    if not isinstance(last, dict):
+        last = {}
+
+    try:
+        st = os.stat(path)
+        # Schnellweg: gleiche Datei, gleiche mtime und Groesse -> kein Lesen noetig
+        if (last.get("path") == os.path.abspath(path)
+                and last.get("mtime_ns") == st.st_mtime_ns
+                and last.get("size") == st.st_size):
+            return True, last
+        fp = fingerprint(path)
+    except Exception:
+        return False, None
+
+    # neu geschrieben, aber gleicher Inhalt -> ebenfalls unveraendert
+    unchanged = last.get("size") == fp["size"] and last.get("hash") == fp["hash"]
+    return unchanged, fp
+
+
+def record(channel: str, fp: Optional[dict]) -> None:
+    """
+    Merkt fp als zuletzt hochgeladenen Stand fuer channel.
+    """
+    if not fp:
+        return
+    path = _get_ledger_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = _load()
+        data[channel] = dict(fp, uploaded=int(time.time()))
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        # Journal ist nur Optimierung; Upload nie daran scheitern lassen
+        pass
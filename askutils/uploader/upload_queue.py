@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# askutils/uploader/upload_queue.py
+#
+# Persistente Upload-Warteschlange (Spool-Verzeichnis):
+# - Produzenten (Live-Bild, Meteor, Nightly) bereiten Dateien vor, legen einen
+#   Job ab und kehren sofort zurueck
+# - ein Worker-Dienst arbeitet die Jobs nach Prioritaet ab
+#   (Live-Bild > Meteor > Nightly), mit exponentiellem Backoff
+# - jeder Job ist ein Verzeichnis mit job.json und den vorbereiteten Dateien;
+#   Anlegen per atomarem rename, Aenderungen per os.replace
+# - Speicherplatz ist begrenzt (UPLOAD_QUEUE_MAX_MB), aelteste Jobs fallen zuerst
+
+import contextlib
+import fcntl
+import importlib
+import json
+import os
+import random
+import shutil
+import signal
+import time
+import uuid
+
+from askutils import config
+
+PRIORITIES = {
+    "image": 0,
+    "meteor": 1,
+    "nightly": 2,
+}
+
+JOB_FILE = "job.json"
+ACTIVE_FILE = "active"
+LOCK_FILE = ".worker.lock"
+QUEUE_LOCK_FILE = ".queue.lock"
+STATUS_FILE = "status.json"
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def is_enabled():
+    return bool(getattr(config, "UPLOAD_QUEUE_ENABLE", False))
+
+
+def _get_queue_dir():
+    return getattr(config, "UPLOAD_QUEUE_DIR", "/home/pi/AllSkyKamera/upload_queue")
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _dir_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat().st_size
+    except OSError:
+        pass
+    return total
+
+
+# -----------------------------------------------------------
+# Jobs lesen
+# -----------------------------------------------------------
+def _job_dirs(queue_dir):
+    try:
+        names = sorted(os.listdir(queue_dir))
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(queue_dir, name) for name in names
+        if not name.startswith(".") and os.path.isdir(os.path.join(queue_dir, name))
+    ]
+
+
+def _read_job(job_dir):
+    try:
+        with open(os.path.join(job_dir, JOB_FILE), "r", encoding="utf-8") as f:
+            job = json.load(f)
+    except Exception:
+        return None
+    job["dir"] = job_dir
+    return job
+
+
+def list_jobs(queue_dir=None):
+    jobs = []
+    for job_dir in _job_dirs(queue_dir or _get_queue_dir()):
+        job = _read_job(job_dir)
+        if job is not None:
+            jobs.append(job)
+    return jobs
+
+
+def _save_job(job):
+    data = {k: v for k, v in job.items() if k != "dir"}
+    _write_json(os.path.join(job["dir"], JOB_FILE), data)
+
+
+def _is_active(job):
+    return os.path.isfile(os.path.join(job["dir"], ACTIVE_FILE))
+
+
+@contextlib.contextmanager
+def _queue_lock(queue_dir):
+    # Kurz gehalten: Produzenten beim Verwerfen, Worker beim Uebernehmen eines Jobs
+    os.makedirs(queue_dir, exist_ok=True)
+    with open(os.path.join(queue_dir, QUEUE_LOCK_FILE), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _remove_job(job, reason):
+    shutil.rmtree(job["dir"], ignore_errors=True)
+    log(f"upload_queue: Job {job.get('id')} ({job.get('kind')}/{job.get('name')}) entfernt: {reason}")
+
+
+# -----------------------------------------------------------
+# Produzenten
+# -----------------------------------------------------------
+def _enforce_limits(queue_dir, keep_id):
+    max_bytes = _cfg_float("UPLOAD_QUEUE_MAX_MB", 500.0) * 1024 * 1024
+    if max_bytes <= 0:
+        return
+
+    jobs = [j for j in list_jobs(queue_dir) if j.get("id") != keep_id and not _is_active(j)]
+    sizes = {j["id"]: _dir_size(j["dir"]) for j in jobs}
+    total = sum(sizes.values()) + _dir_size(os.path.join(queue_dir, keep_id))
+
+    for job in sorted(jobs, key=lambda j: j.get("created", 0)):
+        if total <= max_bytes:
+            break
+        total -= sizes[job["id"]]
+        _remove_job(job, "Speicherlimit UPLOAD_QUEUE_MAX_MB")
+
+
+def enqueue(kind, name, handler, args=None, files=None, not_before=None, supersede=False):
+    """
+    Legt einen Upload-Job an.
+
+    kind:      "image" | "meteor" | "nightly" (bestimmt die Prioritaet)
+    name:      Kennung fuer Log und Ersetzen (z.B. "image", "20260101/video")
+    handler:   Modul mit upload_queued_job(args, files) -> bool
+    files:     {schluessel: pfad}; Dateien werden in den Job verschoben
+    not_before: Epoch-Sekunden, frueheste Ausfuehrung (z.B. Jitter)
+    supersede: aeltere wartende Jobs mit gleichem kind/name verwerfen
+
+    Gibt die Job-ID zurueck.
+    """
+    queue_dir = _get_queue_dir()
+    os.makedirs(queue_dir, exist_ok=True)
+
+    now = time.time()
+    job_id = "%d-%013d-%s" % (PRIORITIES.get(kind, 9), int(now * 1000), uuid.uuid4().hex[:8])
+    staging = os.path.join(queue_dir, "." + job_id)
+    os.makedirs(staging)
+
+    stored = {}
+    try:
+        for key, path in (files or {}).items():
+            # Dateiname bleibt erhalten (wird z.B. beim Video-Upload mitgeschickt)
+            target = os.path.basename(path)
+            if target in stored.values() or target == JOB_FILE:
+                target = "%s_%s" % (key, target)
+            shutil.move(path, os.path.join(staging, target))
+            stored[key] = target
+
+        _write_json(os.path.join(staging, JOB_FILE), {
+            "id": job_id,
+            "kind": kind,
+            "name": name,
+            "handler": handler,
+            "args": args or {},
+            "files": stored,
+            "priority": PRIORITIES.get(kind, 9),
+            "created": now,
+            "not_before": float(not_before or now),
+            "attempts": 0,
+            "last_error": None,
+        })
+        os.rename(staging, os.path.join(queue_dir, job_id))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Unter der Queue-Sperre: der Worker uebernimmt keinen Job, der gerade verworfen wird
+    with _queue_lock(queue_dir):
+        if supersede:
+            for job in list_jobs(queue_dir):
+                if job["id"] != job_id and job.get("kind") == kind and job.get("name") == name \
+                        and not _is_active(job):
+                    _remove_job(job, "durch neueren Job ersetzt")
+
+        _enforce_limits(queue_dir, job_id)
+    log(f"upload_queue: Job {job_id} ({kind}/{name}) angelegt.")
+    return job_id
+
+
+def has_pending(kind, name):
+    return any(j.get("kind") == kind and j.get("name") == name for j in list_jobs())
+
+
+# -----------------------------------------------------------
+# Worker
+# -----------------------------------------------------------
+class UploadWorker:
+
+    def __init__(self):
+        self.queue_dir = _get_queue_dir()
+        self.poll_seconds = max(0.5, _cfg_float("UPLOAD_QUEUE_POLL_SECONDS", 5.0))
+        self.backoff_base = max(1.0, _cfg_float("UPLOAD_QUEUE_BACKOFF_BASE_SECONDS", 30.0))
+        self.backoff_max = max(self.backoff_base, _cfg_float("UPLOAD_QUEUE_BACKOFF_MAX_SECONDS", 1800.0))
+        self.max_attempts = int(_cfg_float("UPLOAD_QUEUE_MAX_ATTEMPTS", 20))
+        self.stop_requested = False
+        self.done = 0
+        self.failed = 0
+        self._lock_fh = None
+
+    def request_stop(self, *_args):
+        self.stop_requested = True
+
+    def _acquire_lock(self):
+        os.makedirs(self.queue_dir, exist_ok=True)
+        self._lock_fh = open(os.path.join(self.queue_dir, LOCK_FILE), "w")
+        try:
+            fcntl.flock(self._lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_fh.close()
+            self._lock_fh = None
+            return False
+        return True
+
+    def _next_job(self):
+        now = time.time()
+        due = [j for j in list_jobs(self.queue_dir) if float(j.get("not_before", 0)) <= now]
+        if not due:
+            return None
+        return min(due, key=lambda j: (j.get("priority", 9), j.get("created", 0)))
+
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _run_job(self, job):
+        files = {key: os.path.join(job["dir"], name) for key, name in (job.get("files") or {}).items()}
+        module = importlib.import_module(job["handler"])
+        return bool(module.upload_queued_job(job.get("args") or {}, files))
+
+    def process(self, job):
+        active = os.path.join(job["dir"], ACTIVE_FILE)
+        # Job unter der Queue-Sperre uebernehmen; ein Produzent kann ihn seit
+        # _next_job() ersetzt oder wegen des Speicherlimits geloescht haben
+        with _queue_lock(self.queue_dir):
+            try:
+                open(active, "w").close()
+            except OSError:
+                log(f"upload_queue: Job {job.get('id')} nicht mehr vorhanden, uebersprungen")
+                return False
+
+        started = time.monotonic()
+        error = None
+        try:
+            ok = self._run_job(job)
+        except Exception as e:
+            ok = False
+            error = str(e)
+        elapsed = time.monotonic() - started
+
+        if ok:
+            self.done += 1
+            _remove_job(job, "hochgeladen in %.1fs" % elapsed)
+            return True
+
+        job["attempts"] = int(job.get("attempts", 0)) + 1
+        job["last_error"] = error or "upload_failed"
+        if self.max_attempts > 0 and job["attempts"] >= self.max_attempts:
+            self.failed += 1
+            self._give_up(job)
+            _remove_job(job, "maximale Versuche erreicht")
+            return False
+
+        delay = self._backoff(job["attempts"])
+        job["not_before"] = time.time() + delay
+        try:
+            _save_job(job)
+            os.remove(active)
+        except OSError:
+            pass
+        log(f"upload_queue: Job {job['id']} fehlgeschlagen (Versuch {job['attempts']}), "
+            f"naechster Versuch in {delay:.0f}s")
+        return False
+
+    def _give_up(self, job):
+        try:
+            module = importlib.import_module(job["handler"])
+            give_up = getattr(module, "upload_queued_job_failed", None)
+            if give_up is not None:
+                give_up(job.get("args") or {})
+        except Exception:
+            pass
+
+    def _recover(self):
+        # Abbruch waehrend eines Uploads: Job bleibt, Marker weg
+        for job in list_jobs(self.queue_dir):
+            try:
+                os.remove(os.path.join(job["dir"], ACTIVE_FILE))
+            except OSError:
+                pass
+        # Reste abgebrochener enqueue()-Aufrufe
+        for name in os.listdir(self.queue_dir):
+            path = os.path.join(self.queue_dir, name)
+            if name.startswith(".") and os.path.isdir(path) and time.time() - os.path.getmtime(path) > 3600:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def write_status(self):
+        jobs = list_jobs(self.queue_dir)
+        pending = {}
+        for job in jobs:
+            pending[job.get("kind")] = pending.get(job.get("kind"), 0) + 1
+        _write_json(os.path.join(self.queue_dir, STATUS_FILE), {
+            "pending": pending,
+            "bytes": sum(_dir_size(j["dir"]) for j in jobs),
+            "done": self.done,
+            "failed": self.failed,
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def run(self):
+        if not self._acquire_lock():
+            log("upload_queue: Worker laeuft bereits.")
+            return False
+
+        self._recover()
+        log(f"upload_queue: Worker gestartet ({self.queue_dir})")
+
+        while not self.stop_requested:
+            job = self._next_job()
+            if job is None:
+                time.sleep(self.poll_seconds)
+                continue
+            try:
+                self.process(job)
+                self.write_status()
+            except Exception as e:
+                # Worker-Thread darf nicht sterben, sonst stehen alle Uploads
+                log(f"upload_queue: Fehler bei Job {job.get('id')}: {e}")
+                time.sleep(self.poll_seconds)
+
+        self.write_status()
+        log("upload_queue: Worker beendet.")
+        return True
+
+
+def run_upload_worker():
+    worker = UploadWorker()
+    signal.signal(signal.SIGTERM, worker.request_stop)
+    signal.signal(signal.SIGINT, worker.request_stop)
+    return worker.run()
@@ -0,0 +1,170 @@
+# askutils/utils/filewatch.py
+#
+# Verzeichnisueberwachung fuer Dienste (Meteor, Live-Bild):
+# - Linux inotify per ctypes (keine Zusatzpakete)
+# - Polling als Fallback, falls inotify nicht verfuegbar ist
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        _libc = ctypes.CDLL(name, use_errno=True)
+    return _libc
+
+
+class InotifyWatcher:
+    """
+    Meldet Dateinamen, die in einem Verzeichnis fertig geschrieben
+    (IN_CLOSE_WRITE) oder hineinverschoben (IN_MOVED_TO) wurden.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, directory, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        self.directory = directory
+        libc = _get_libc()
+
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_init1: %s" % os.strerror(err))
+
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            self._fd = -1
+            raise OSError(err, "inotify_add_watch %s: %s" % (directory, os.strerror(err)))
+
+        self.gone = False
+
+    def wait(self, timeout):
+        if self._fd < 0:
+            time.sleep(timeout)
+            return []
+
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, float(timeout)))
+        if not ready:
+            return []
+
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return []
+            raise
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self.gone = True
+                continue
+            if mask & IN_ISDIR or not raw_name:
+                continue
+
+            name = os.fsdecode(raw_name)
+            if name not in names:
+                names.append(name)
+
+        return names
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    Fallback: listet das Verzeichnis periodisch und meldet neue oder
+    geaenderte Dateien, sobald ihre Groesse zwischen zwei Durchlaeufen
+    stabil ist (kein halb geschriebenes Bild).
+    """
+
+    kind = "polling"
+
+    def __init__(self, directory, poll_seconds=1.0):
+        self.directory = directory
+        self.poll_seconds = max(0.1, float(poll_seconds))
+        self.gone = False
+        self._pending = {}
+        self._seen = self._snapshot()
+
+    def _snapshot(self):
+        entries = {}
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    entries[entry.name] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            self.gone = True
+        return entries
+
+    def wait(self, timeout):
+        time.sleep(min(self.poll_seconds, max(0.0, float(timeout))))
+
+        current = self._snapshot()
+        names = []
+
+        for name, sig in current.items():
+            if self._seen.get(name) == sig:
+                continue
+            if self._pending.get(name) == sig:
+                names.append(name)
+                self._seen[name] = sig
+                self._pending.pop(name, None)
+            else:
+                self._pending[name] = sig
+
+        for name in list(self._seen):
+            if name not in current:
+                self._seen.pop(name, None)
+
+        return sorted(names)
+
+    def close(self):
+        self._seen = {}
+        self._pending = {}
+
+
+def open_watcher(directory, poll_seconds=1.0, prefer_inotify=True, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+    if prefer_inotify:
+        try:
+            return InotifyWatcher(directory, mask=mask)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, poll_seconds=poll_seconds)
@@ -0,0 +1,171 @@
+# askutils/utils/http_client.py
+#
+# Gemeinsamer HTTP-Client fuer die API-Uploader:
+# - eine requests.Session pro Prozess (Keep-Alive, Connection-Pool),
+#   spart pro Upload den TCP- und TLS-Handshake zum selben Server
+# - Retries mit Backoff nur fuer Verbindungsfehler und 502/503/504
+#   (Request kam nicht an bzw. Server ueberlastet)
+# - Zeitmessung je Request (Dauer, Bytes, Status) fuer Log und Statistik
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib3.util.retry import Retry
+except Exception:
+    Retry = None
+
+from askutils import config
+
+RETRY_STATUS = (502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_int(key, default):
+    try:
+        return int(getattr(config, key, default))
+    except Exception:
+        return int(default)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _build_retry():
+    retries = max(0, _cfg_int("HTTP_RETRIES", 2))
+    if Retry is None or retries <= 0:
+        return 0
+
+    kwargs = dict(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=_cfg_float("HTTP_RETRY_BACKOFF", 1.0),
+        status_forcelist=RETRY_STATUS,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    methods = frozenset(["GET", "HEAD", "POST", "PUT"])
+    try:
+        return Retry(allowed_methods=methods, **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=methods, **kwargs)
+
+
+def _create_session():
+    session = requests.Session()
+    pool_size = max(1, _cfg_int("HTTP_POOL_SIZE", 4))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_build_retry(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _request_bytes(response):
+    body = getattr(getattr(response, "request", None), "body", None)
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def _record(label, elapsed_ms, status, sent_bytes):
+    with _stats_lock:
+        entry = _stats.setdefault(label, {
+            "count": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "bytes": 0,
+            "last_status": None,
+        })
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["bytes"] += sent_bytes
+        entry["last_status"] = status
+        if status is None or status >= 400:
+            entry["errors"] += 1
+
+
+def stats():
+    with _stats_lock:
+        result = {}
+        for label, entry in _stats.items():
+            item = dict(entry)
+            item["total_ms"] = round(item["total_ms"], 1)
+            item["max_ms"] = round(item["max_ms"], 1)
+            item["mean_ms"] = round(entry["total_ms"] / entry["count"], 1) if entry["count"] else None
+            result[label] = item
+        return result
+
+
+def request(method, url, label=None, **kwargs):
+    """
+    Wie requests.request, aber ueber die gemeinsame Session.
+    Fehler werden wie bei requests geworfen (requests.RequestException).
+    """
+    label = label or method.lower()
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.RequestException:
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        _record(label, elapsed_ms, None, 0)
+        if bool(getattr(config, "HTTP_LOG_TIMING", True)):
+            log(f"HTTP {method} {label}: Fehler nach {elapsed_ms:.0f} ms")
+        raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    sent_bytes = _request_bytes(response)
+    _record(label, elapsed_ms, response.status_code, sent_bytes)
+    if bool(getattr(config, "HTTP_LOG_TIMING", True)):
+        log(f"HTTP {method} {label}: {response.status_code} in {elapsed_ms:.0f} ms, {sent_bytes} Bytes")
+    return response
+
+
+def post(url, label=None, **kwargs):
+    return request("POST", url, label=label, **kwargs)
+
+
+def get(url, label=None, **kwargs):
+    return request("GET", url, label=label, **kwargs)
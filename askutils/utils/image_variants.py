@@ -0,0 +1,108 @@
+# askutils/utils/image_variants.py
+#
+# Erzeugt aus einem Quellbild (JPG/PNG) mehrere verkleinerte JPG-Varianten
+# (fullhd, mobile, thumb) in einem Durchgang:
+# - Quelle wird nur einmal dekodiert (JPEG draft: DCT-Skalierung beim Laden)
+# - Varianten werden verkettet verkleinert: fullhd -> mobile -> thumb
+# - ffmpeg bleibt als Fallback (Pillow fehlt, Bild nicht lesbar, Config)
+
+import os
+from typing import Callable, Dict, List, Tuple
+
+from askutils import config
+
+DEFAULT_JPEG_QUALITY = 92
+
+
+def _get_backend() -> str:
+    backend = str(getattr(config, "IMAGE_VARIANTS_BACKEND", "pillow") or "pillow").strip().lower()
+    return backend if backend in ("pillow", "ffmpeg") else "pillow"
+
+
+def _get_quality() -> int:
+    try:
+        quality = int(getattr(config, "IMAGE_VARIANTS_JPEG_QUALITY", DEFAULT_JPEG_QUALITY))
+    except Exception:
+        quality = DEFAULT_JPEG_QUALITY
+    return max(1, min(95, quality))
+
+
+def _target_size(width: int, height: int, max_width: int) -> Tuple[int, int]:
+    """
+    Wie der ffmpeg-Filter scale='if(gt(iw,W),W,iw)':-2:
+    nur verkleinern, Seitenverhaeltnis halten, Hoehe gerade.
+    """
+    new_w = min(width, max_width)
+    new_h = max(2, int(round(height * new_w / float(width) / 2.0)) * 2)
+    return new_w, new_h
+
+
+def _open_rgb(src: str, max_width: int):
+    from PIL import Image
+
+    img = Image.open(src)
+    orig_size = img.size
+
+    if img.format == "JPEG":
+        # DCT-Skalierung 1/2, 1/4, 1/8: liefert mindestens die angeforderte Groesse
+        img.draft("RGB", _target_size(orig_size[0], orig_size[1], max_width))
+
+    # PNG mit Alpha auf schwarz flatten (wie _png_to_temp_jpg)
+    if img.mode in ("RGBA", "LA") or ("transparency" in getattr(img, "info", {})):
+        img = img.convert("RGBA")
+        bg = Image.new("RGBA", img.size, (0, 0, 0, 255))
+        return Image.alpha_composite(bg, img).convert("RGB"), orig_size
+
+    if img.mode != "RGB":
+        # z.B. 16-Bit-PNG ("I;16"): erst auf 8 Bit bringen
+        if img.mode.startswith("I"):
+            img = img.point(lambda v: v * (1.0 / 256.0)).convert("L")
+        img = img.convert("RGB")
+    else:
+        img.load()
+    return img, orig_size
+
+
+def _create_with_pillow(src: str, targets: List[Tuple[str, int]]) -> None:
+    from PIL import Image
+
+    ordered = sorted(targets, key=lambda t: t[1], reverse=True)
+    img, (base_w, base_h) = _open_rgb(src, ordered[0][1])
+    quality = _get_quality()
+
+    # Zielgroessen beziehen sich auf die Originalgroesse, nicht auf das Draft-Bild
+    level = img
+    for dst, width in ordered:
+        size = _target_size(base_w, base_h, width)
+        if level.size != size:
+            level = level.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        level.save(dst, format="JPEG", quality=quality, subsampling="4:2:0")
+
+
+def create_jpeg_variants(
+    src: str,
+    targets: Dict[str, Tuple[str, int]],
+    ffmpeg_fallback: Callable[[str, str, int], None],
+) -> Dict[str, str]:
+    """
+    targets: {"fullhd": (pfad, 1920), "mobile": (pfad, 960), ...}
+    ffmpeg_fallback(src, dst, width): bisheriger ffmpeg-Aufruf des Moduls
+
+    Gibt {name: pfad} zurueck. Bei Fehlern im Pillow-Pfad werden alle
+    Varianten per ffmpeg erzeugt; ffmpeg-Fehler werden weitergereicht.
+    """
+    result = {name: dst for name, (dst, _width) in targets.items()}
+
+    if _get_backend() == "pillow":
+        try:
+            _create_with_pillow(src, list(targets.values()))
+            if all(os.path.isfile(dst) and os.path.getsize(dst) > 0 for dst in result.values()):
+                return result
+        except ImportError:
+            print("Pillow fehlt, Varianten per ffmpeg.", flush=True)
+        except Exception as e:
+            print(f"Varianten per Pillow fehlgeschlagen ({e}), Fallback ffmpeg.", flush=True)
+
+    for _name, (dst, width) in targets.items():
+        ffmpeg_fallback(src, dst, width)
+    return result
@@ -1,33 +1,343 @@
 # askutils/utils/influx_writer.py
+#
+# Schreibt Messwerte gepuffert nach InfluxDB:
+# - ein Client pro Prozess (Verbindung wird wiederverwendet, gzip)
+# - Punkte werden gesammelt und als Batch geschrieben, sobald
+#   INFLUX_BATCH_SIZE erreicht ist, spaetestens nach INFLUX_FLUSH_SECONDS
+#   und immer beim Prozessende
+# - was nicht geschrieben werden kann, landet als Line-Protocol in einem
+#   Spool (tmp/influx_spool.lp, max. INFLUX_SPOOL_MAX_MB) und wird nach dem
+#   naechsten erfolgreichen Schreiben nachgeliefert
+# - Spool-Tiefe wird als Messung "influxspool" mitgeschrieben
+# - INFLUX_TRANSPORT = "socket": log_metric gibt den Punkt nur per
+#   Unix-Datagramm an den lokalen Sammeldienst (metrics_daemon) ab;
+#   laeuft der Dienst nicht, wird wie bisher direkt geschrieben
 
-from influxdb_client import InfluxDBClient, Point
+import atexit
+import fcntl
+import os
+import socket
+import threading
+import time
+
+from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 from askutils import config
 from askutils.utils.logger import log, error
 
-def _get_client():
-    if not config.INFLUX_URL or not config.INFLUX_TOKEN:
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_SECONDS = 10.0
+DEFAULT_SPOOL_MAX_MB = 20
+SPOOL_REPLAY_LINES = 5000
+
+_lock = threading.RLock()
+_buffer = []
+_client = None
+_write_api = None
+_timer = None
+_socket = None
+_dropped_reported = 0
+_config_missing_logged = False
+_stats = {
+    "written": 0,
+    "batches": 0,
+    "failed_batches": 0,
+    "spooled": 0,
+    "replayed": 0,
+    "dropped": 0,
+    "socket_sent": 0,
+    "socket_fallback": 0,
+}
+
+
+def _cfg_int(key, default):
+    try:
+        return int(getattr(config, key, default))
+    except Exception:
+        return int(default)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _get_spool_path():
+    path = getattr(config, "INFLUX_SPOOL_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "influx_spool.lp")
+
+
+def get_socket_path():
+    path = getattr(config, "METRICS_SOCKET", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "metrics.sock")
+
+
+def _use_socket():
+    return str(getattr(config, "INFLUX_TRANSPORT", "direct") or "direct").strip().lower() == "socket"
+
+
+def _is_configured():
+    global _config_missing_logged
+    if getattr(config, "INFLUX_URL", None) and getattr(config, "INFLUX_TOKEN", None):
+        return True
+    if not _config_missing_logged:
         error("Influx-Konfiguration fehlt.")
+        _config_missing_logged = True
+    return False
+
+
+def _get_client():
+    global _client, _write_api
+    if not _is_configured():
         return None
-    return InfluxDBClient(
-        url=config.INFLUX_URL,
-        token=config.INFLUX_TOKEN,
-        org=config.INFLUX_ORG
+    if _client is None:
+        _client = InfluxDBClient(
+            url=config.INFLUX_URL,
+            token=config.INFLUX_TOKEN,
+            org=config.INFLUX_ORG,
+            enable_gzip=bool(getattr(config, "INFLUX_GZIP", True)),
+        )
+        _write_api = _client.write_api(write_options=SYNCHRONOUS)
+    return _client
+
+
+def _write_lines(lines):
+    _write_api.write(bucket=config.INFLUX_BUCKET, record=lines, write_precision=WritePrecision.NS)
+
+
+# -----------------------------------------------------------
+# Spool
+# -----------------------------------------------------------
+class _SpoolLock:
+    # Mehrere Cron-Prozesse teilen sich den Spool -> flock
+    def __enter__(self):
+        path = _get_spool_path() + ".lock"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.fh = open(path, "a")
+        fcntl.flock(self.fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *_exc):
+        fcntl.flock(self.fh, fcntl.LOCK_UN)
+        self.fh.close()
+
+
+def _spool(lines):
+    path = _get_spool_path()
+    max_bytes = _cfg_float("INFLUX_SPOOL_MAX_MB", DEFAULT_SPOOL_MAX_MB) * 1024 * 1024
+    data = "".join(line + "\n" for line in lines)
+    try:
+        with _SpoolLock():
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size + len(data) > max_bytes:
+                _stats["dropped"] += len(lines)
+                error(f"Influx-Spool voll ({size} Bytes), {len(lines)} Punkte verworfen")
+                return
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(data)
+        _stats["spooled"] += len(lines)
+        log(f"Influx nicht erreichbar, {len(lines)} Punkte im Spool")
+    except Exception as e:
+        _stats["dropped"] += len(lines)
+        error(f"Influx-Spool nicht beschreibbar: {e}")
+
+
+def spool_depth():
+    """
+    (Punkte, Bytes) im Spool.
+    """
+    path = _get_spool_path()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return 0, 0
+    return data.count(b"\n"), len(data)
+
+
+def _replay_spool():
+    """
+    Liefert den Spool in Bloecken nach; bricht beim ersten Fehler ab,
+    der Rest bleibt liegen. Gibt die Anzahl nachgelieferter Punkte zurueck.
+    """
+    path = _get_spool_path()
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+
+    replayed = 0
+    with _SpoolLock():
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.rstrip("\n") for line in f if line.strip()]
+        try:
+            for start in range(0, len(lines), SPOOL_REPLAY_LINES):
+                _write_lines(lines[start:start + SPOOL_REPLAY_LINES])
+                replayed += len(lines[start:start + SPOOL_REPLAY_LINES])
+        except Exception as e:
+            error(f"Influx-Spool Nachlieferung abgebrochen: {e}")
+
+        rest = lines[replayed:]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in rest)
+        os.replace(tmp, path)
+
+    _stats["replayed"] += replayed
+    log(f"Influx-Spool: {replayed} Punkte nachgeliefert, {len(lines) - replayed} offen")
+    return replayed
+
+
+def _spool_point(replayed):
+    points, size = spool_depth()
+    point = (
+        Point("influxspool")
+        .tag("kamera", config.KAMERA_ID)
+        .field("points", points)
+        .field("bytes", size)
+        .field("replayed", replayed)
+        .field("dropped", _stats["dropped"])
+        .time(time.time_ns(), WritePrecision.NS)
     )
+    return point.to_line_protocol()
+
+
+# -----------------------------------------------------------
+# Puffer
+# -----------------------------------------------------------
+def flush():
+    """
+    Schreibt alle gepufferten Punkte; bei Fehlern gehen sie in den Spool.
+    """
+    global _buffer, _dropped_reported
+    with _lock:
+        _cancel_timer()
+        lines, _buffer = _buffer, []
+        if not lines:
+            return True
+
+        # Ohne Influx-Konfiguration verwerfen wie bisher; gespoolt wird nur bei
+        # Uebertragungsfehlern (sonst schreibt eine Station ohne Influx die SD-Karte voll)
+        if not _is_configured():
+            return False
+
+        try:
+            _get_client()
+            _write_lines(lines)
+        except Exception as e:
+            _stats["failed_batches"] += 1
+            error(f"Influx Write fehlgeschlagen: {e}")
+            _spool(lines)
+            return False
+
+        _stats["written"] += len(lines)
+        _stats["batches"] += 1
+
+        # Verbindung steht -> Spool nachliefern und Tiefe melden;
+        # verworfene Punkte nur melden, wenn seit der letzten Meldung neue dazukamen
+        try:
+            dropped = _stats["dropped"]
+            if os.path.exists(_get_spool_path()) and os.path.getsize(_get_spool_path()) > 0:
+                replayed = _replay_spool()
+                _write_lines([_spool_point(replayed)])
+                _dropped_reported = dropped
+            elif dropped > _dropped_reported:
+                _write_lines([_spool_point(0)])
+                _dropped_reported = dropped
+        except Exception as e:
+            error(f"Influx-Spool Fehler: {e}")
+        return True
+
+
+def _cancel_timer():
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+
+
+def _schedule_flush():
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(_cfg_float("INFLUX_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS), flush)
+        _timer.daemon = True
+        _timer.start()
+
+
+def close():
+    """
+    Restliche Punkte schreiben und Client schliessen (atexit).
+    """
+    global _client, _write_api
+    flush()
+    with _lock:
+        if _client is not None:
+            try:
+                _client.close()
+            except Exception:
+                pass
+        _client = None
+        _write_api = None
+
+
+atexit.register(close)
+
+
+def stats():
+    points, size = spool_depth()
+    with _lock:
+        return dict(_stats, buffered=len(_buffer), spool_points=points, spool_bytes=size)
+
+
+def _send_socket(line):
+    """
+    Gibt den Punkt an den Sammeldienst ab (nicht blockierend).
+    False, wenn der Dienst nicht laeuft oder seine Warteschlange voll ist.
+    """
+    global _socket
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _socket.setblocking(False)
+        _socket.sendto(line.encode("utf-8"), get_socket_path())
+    except OSError:
+        _stats["socket_fallback"] += 1
+        return False
+    _stats["socket_sent"] += 1
+    return True
+
+
+def write_lines(lines):
+    """
+    Fertiges Line-Protocol puffern (z.B. vom Sammeldienst), ohne Socket-Umweg.
+    """
+    lines = [line for line in lines if line]
+    if not lines:
+        return
+
+    with _lock:
+        _buffer.extend(lines)
+        full = len(_buffer) >= max(1, _cfg_int("INFLUX_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        if not full:
+            _schedule_flush()
+
+    if full:
+        flush()
+
 
 def log_metric(measurement, fields: dict, tags: dict = None):
     """
-    Speichert einen oder mehrere Werte in InfluxDB.
+    Speichert einen oder mehrere Werte in InfluxDB (gepuffert).
     :param measurement: z.B. "raspistatus"
     :param fields: Messwerte als dict, z.B. {"temp": 42.0}
     :param tags: optionale weitere Tags, z.B. {"host": "host1"}
     """
-    client = _get_client()
-    if not client:
-        return
-
-    write_api = client.write_api(write_options=SYNCHRONOUS)
-
     point = Point(measurement).tag("kamera", config.KAMERA_ID)
 
     if tags:
@@ -37,10 +347,16 @@ def log_metric(measurement, fields: dict, tags: dict = None):
     for key, val in fields.items():
         point = point.field(key, val)
 
-    try:
-        write_api.write(bucket=config.INFLUX_BUCKET, record=point)
-        log(f"{measurement}: {fields} -> Influx geschrieben")
-    except Exception as e:
-        error(f"Influx Write fehlgeschlagen: {e}")
-    finally:
-        client.close()
+    # Zeitstempel beim Messen, nicht beim (evtl. spaeteren) Schreiben
+    point = point.time(time.time_ns(), WritePrecision.NS)
+
+    line = point.to_line_protocol()
+    if not line:
+        return
+
+    if _use_socket() and _send_socket(line):
+        log(f"{measurement}: {fields} -> Sammeldienst")
+        return
+
+    write_lines([line])
+    log(f"{measurement}: {fields} -> Influx gepuffert")
@@ -0,0 +1,56 @@
+# askutils/utils/latency.py
+#
+# Latenz-Histogramm fuer Dauerdienste (Meteor, Live-Bild):
+# feste Buckets plus p50/p95 ueber die letzten Werte
+
+from collections import deque
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Latenz vom Eintreffen eines Bildes (mtime) bis zur fertigen Verarbeitung."""
+
+    def __init__(self, recent=1000, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent = deque(maxlen=recent)
+
+    def record(self, seconds):
+        ms = max(0.0, float(seconds) * 1000.0)
+        idx = len(self.buckets_ms)
+        for i, limit in enumerate(self.buckets_ms):
+            if ms <= limit:
+                idx = i
+                break
+
+        self.counts[idx] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self._recent.append(ms)
+
+    def _percentile(self, values, q):
+        if not values:
+            return None
+        pos = int(round((len(values) - 1) * q))
+        return round(values[pos], 1)
+
+    def to_dict(self):
+        recent = sorted(self._recent)
+        buckets = {}
+        for i, limit in enumerate(self.buckets_ms):
+            buckets["<=%dms" % limit] = self.counts[i]
+        buckets[">%dms" % self.buckets_ms[-1]] = self.counts[-1]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1) if self.count else None,
+            "p50_ms": self._percentile(recent, 0.50),
+            "p95_ms": self._percentile(recent, 0.95),
+            "buckets": buckets,
+        }
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# askutils/utils/metrics_daemon.py
+#
+# Lokaler Sammeldienst fuer Messwerte:
+# - lauscht auf einem Unix-Datagramm-Socket (tmp/metrics.sock, METRICS_SOCKET)
+# - nimmt Line-Protocol (eine oder mehrere Zeilen) oder JSON an:
+#     {"measurement": "...", "fields": {...}, "tags": {...}, "time": <ns>}
+#   (auch als Liste)
+# - fasst Punkte derselben Serie mit gleichem Zeitstempel zusammen
+#   (Felder werden vereinigt) und verwirft exakte Duplikate
+# - leitet alle METRICS_FLUSH_SECONDS als Batch an influx_writer weiter
+#   (eine Verbindung, gzip, Spool bei Ausfall)
+#
+# Absender: influx_writer.log_metric mit INFLUX_TRANSPORT = "socket"
+
+import json
+import os
+import select
+import signal
+import socket
+import time
+
+from askutils import config
+from askutils.utils import influx_writer
+
+MAX_DATAGRAM = 65536
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _get_status_path():
+    path = getattr(config, "METRICS_STATUS_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "metrics_daemon.json")
+
+
+# -----------------------------------------------------------
+# Line-Protocol
+# -----------------------------------------------------------
+def _split_unquoted(text, sep, maxsplit=-1):
+    # Trennt an sep ausserhalb von "..." und nicht nach Backslash
+    parts = []
+    start = 0
+    quoted = False
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"':
+            quoted = not quoted
+        elif c == sep and not quoted and (maxsplit < 0 or len(parts) < maxsplit):
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_line(line, now_ns):
+    """
+    (serie, {feld: rohwert}, zeit_ns) oder None bei ungueltiger Zeile.
+    """
+    parts = _split_unquoted(line.strip(), " ", 2)
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        return None
+
+    series, field_text = parts[0], parts[1]
+    ts = now_ns
+    if len(parts) == 3 and parts[2]:
+        try:
+            ts = int(parts[2])
+        except ValueError:
+            return None
+
+    fields = {}
+    for item in _split_unquoted(field_text, ","):
+        key, sep, value = item.partition("=")
+        if not sep or not key or not value:
+            return None
+        fields[key] = value
+    return series, fields, ts
+
+
+def _json_lines(data, now_ns):
+    points = data if isinstance(data, list) else [data]
+    lines = []
+    for p in points:
+        if not isinstance(p, dict) or not p.get("measurement") or not isinstance(p.get("fields"), dict):
+            lines.append(None)
+            continue
+        point = influx_writer.Point(p["measurement"])
+        tags = dict(p.get("tags") or {})
+        tags.setdefault("kamera", config.KAMERA_ID)
+        for k, v in tags.items():
+            point = point.tag(k, v)
+        for k, v in p["fields"].items():
+            point = point.field(k, v)
+        point = point.time(int(p.get("time") or now_ns), influx_writer.WritePrecision.NS)
+        lines.append(point.to_line_protocol() or None)
+    return lines
+
+
+class MetricsCollector:
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or influx_writer.get_socket_path()
+        self.flush_seconds = max(0.5, _cfg_float("METRICS_FLUSH_SECONDS", 10.0))
+        self.status_seconds = max(5.0, _cfg_float("METRICS_STATUS_SECONDS", 60.0))
+        self.max_pending = max(1, int(_cfg_float("METRICS_MAX_PENDING", 5000)))
+
+        self.sock = None
+        self.stop_requested = False
+        # (serie, zeit_ns) -> {feld: rohwert}; dict behaelt die Reihenfolge
+        self.pending = {}
+        self.counts = {
+            "datagrams": 0,
+            "points": 0,
+            "invalid": 0,
+            "coalesced": 0,
+            "forwarded": 0,
+            "batches": 0,
+        }
+        self.started_utc = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._last_flush = time.monotonic()
+        self._last_status_write = 0.0
+
+    # ----------------------------------------------------------------
+    # Socket
+    # ----------------------------------------------------------------
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o666)
+        self.sock.setblocking(False)
+        log("Metrik-Dienst: lausche auf %s" % self.socket_path)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    # ----------------------------------------------------------------
+    # Annahme
+    # ----------------------------------------------------------------
+
+    def _add(self, series, fields, ts):
+        key = (series, ts)
+        current = self.pending.get(key)
+        if current is None:
+            self.pending[key] = dict(fields)
+            return
+        self.counts["coalesced"] += 1
+        current.update(fields)
+
+    def handle(self, data):
+        self.counts["datagrams"] += 1
+        now_ns = time.time_ns()
+        text = data.decode("utf-8", errors="replace").strip()
+        if not text:
+            return
+
+        if text[0] in "[{":
+            try:
+                lines = _json_lines(json.loads(text), now_ns)
+            except Exception:
+                lines = [None]
+        else:
+            lines = text.split("\n")
+
+        for line in lines:
+            parsed = parse_line(line, now_ns) if line else None
+            if parsed is None:
+                self.counts["invalid"] += 1
+                continue
+            self.counts["points"] += 1
+            self._add(*parsed)
+
+    def _drain(self):
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except BlockingIOError:
+                return
+            self.handle(data)
+            if len(self.pending) >= self.max_pending:
+                self.flush()
+
+    # ----------------------------------------------------------------
+    # Weiterleitung
+    # ----------------------------------------------------------------
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        lines = [
+            "%s %s %d" % (series, ",".join("%s=%s" % kv for kv in fields.items()), ts)
+            for (series, ts), fields in pending.items()
+        ]
+        influx_writer.write_lines(lines)
+        influx_writer.flush()
+        self.counts["forwarded"] += len(lines)
+        self.counts["batches"] += 1
+
+    def write_status(self):
+        self._last_status_write = time.monotonic()
+        path = _get_status_path()
+        data = {
+            "socket": self.socket_path,
+            "started_utc": self.started_utc,
+            "flush_seconds": self.flush_seconds,
+            "counts": dict(self.counts),
+            "pending": len(self.pending),
+            "influx": influx_writer.stats(),
+            "updated_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            log("Metrik-Dienst: Status konnte nicht geschrieben werden: %s" % e)
+
+    def request_stop(self, *_args):
+        self.stop_requested = True
+
+    def run(self):
+        self.open()
+        try:
+            while not self.stop_requested:
+                timeout = max(0.0, self._last_flush + self.flush_seconds - time.monotonic())
+                try:
+                    readable, _w, _x = select.select([self.sock], [], [], min(timeout, 1.0))
+                except InterruptedError:
+                    readable = []
+                if readable:
+                    self._drain()
+
+                if time.monotonic() - self._last_flush >= self.flush_seconds:
+                    self.flush()
+
+                if time.monotonic() - self._last_status_write >= self.status_seconds:
+                    self.write_status()
+
+            # Reste im Socket noch annehmen, dann alles weiterleiten
+            self._drain()
+            self.flush()
+            self.write_status()
+        finally:
+            self.close()
+        log("Metrik-Dienst: beendet.")
+        return True
+
+
+def run_metrics_daemon():
+    # Der Dienst selbst schreibt immer direkt
+    config.INFLUX_TRANSPORT = "direct"
+    collector = MetricsCollector()
+    signal.signal(signal.SIGTERM, collector.request_stop)
+    signal.signal(signal.SIGINT, collector.request_stop)
+    return collector.run()
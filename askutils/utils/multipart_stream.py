@@ -0,0 +1,178 @@
+# askutils/utils/multipart_stream.py
+#
+# Multipart/form-data Body, der beim Senden blockweise aus den Dateien liest.
+# requests baut bei files=... den kompletten Body im Speicher auf; bei einem
+# 200 MB Zeitraffer bedeutet das 200+ MB RSS. MultipartStream ist ein
+# dateiaehnliches Objekt (read/seek/tell/len) und wird als data= uebergeben:
+# - Content-Length ist vorab bekannt (kein chunked Transfer-Encoding)
+# - seek/tell erlauben urllib3, den Body bei Retries zurueckzuspulen
+# - progress(gesendet, gesamt) wird beim Lesen aufgerufen
+
+import os
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from askutils import config
+
+DEFAULT_BLOCK_KB = 256
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _get_block_size() -> int:
+    try:
+        kb = int(getattr(config, "UPLOAD_STREAM_BLOCK_KB", DEFAULT_BLOCK_KB))
+    except Exception:
+        kb = DEFAULT_BLOCK_KB
+    return max(16, kb) * 1024
+
+
+def _quote(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\r", "").replace("\n", "")
+
+
+class MultipartStream:
+    """
+    fields: {name: wert}
+    files:  {name: (dateiname, pfad, mime)}
+    Dateien werden erst beim Lesen geoeffnet; close() schliesst sie.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        files: Dict[str, Tuple[str, str, str]],
+        progress: Optional[ProgressCallback] = None,
+        block_size: Optional[int] = None,
+    ):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary=" + self.boundary
+        self.block_size = block_size or _get_block_size()
+        self.progress = progress
+
+        # Segmente: ("bytes", daten) oder ("file", pfad, groesse)
+        self._segments = []
+        for name, value in (fields or {}).items():
+            head = (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+            ).encode("utf-8")
+            self._segments.append(("bytes", head + str(value).encode("utf-8") + b"\r\n"))
+
+        for name, (filename, path, mime) in (files or {}).items():
+            head = (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                f"Content-Type: {mime}\r\n\r\n"
+            ).encode("utf-8")
+            self._segments.append(("bytes", head))
+            self._segments.append(("file", path, os.path.getsize(path)))
+            self._segments.append(("bytes", b"\r\n"))
+
+        self._segments.append(("bytes", f"--{self.boundary}--\r\n".encode("utf-8")))
+
+        self._starts = []
+        total = 0
+        for seg in self._segments:
+            self._starts.append(total)
+            total += len(seg[1]) if seg[0] == "bytes" else seg[2]
+        self.total = total
+
+        self._pos = 0
+        self._index = 0
+        self._fh = None
+
+    # ---------------------------------------------------------------
+    # Dateiaehnliche Schnittstelle
+    # ---------------------------------------------------------------
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self):
+        while True:
+            block = self.read(self.block_size)
+            if not block:
+                return
+            yield block
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.total
+        self._pos = max(0, min(self.total, int(offset)))
+        self._close_file()
+        self._index = 0
+        while self._index + 1 < len(self._segments) and self._starts[self._index + 1] <= self._pos:
+            self._index += 1
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.total - self._pos
+        size = min(size, self.block_size)
+
+        out = b""
+        while len(out) < size and self._index < len(self._segments):
+            seg = self._segments[self._index]
+            inner = self._pos - self._starts[self._index]
+            want = size - len(out)
+
+            if seg[0] == "bytes":
+                chunk = seg[1][inner:inner + want]
+            else:
+                if self._fh is None:
+                    self._fh = open(seg[1], "rb")
+                self._fh.seek(inner)
+                chunk = self._fh.read(min(want, seg[2] - inner))
+                if not chunk and inner < seg[2]:
+                    raise IOError(f"Datei waehrend des Uploads gekuerzt: {seg[1]}")
+
+            out += chunk
+            self._pos += len(chunk)
+            seg_len = len(seg[1]) if seg[0] == "bytes" else seg[2]
+            if self._pos - self._starts[self._index] >= seg_len:
+                self._close_file()
+                self._index += 1
+
+        if out and self.progress is not None:
+            self.progress(self._pos, self.total)
+        return out
+
+    def _close_file(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def close(self) -> None:
+        self._close_file()
+
+
+def progress_logger(log: Callable[[str], None], label: str, step_percent: int = 10) -> ProgressCallback:
+    """
+    Liefert einen progress-Callback, der alle step_percent Prozent loggt.
+    """
+    state = {"next": step_percent, "sent": 0}
+
+    def _progress(sent: int, total: int) -> None:
+        if total <= 0:
+            return
+        if sent < state["sent"]:
+            # Body wurde fuer einen Retry zurueckgespult
+            state["next"] = step_percent
+        state["sent"] = sent
+        percent = sent * 100 // total
+        if sent >= total or percent >= state["next"]:
+            log(f"upload_progress {label} {percent}% ({sent}/{total} Bytes)")
+            state["next"] = (percent // step_percent + 1) * step_percent
+
+    return _progress
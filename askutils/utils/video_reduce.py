@@ -0,0 +1,314 @@
+# askutils/utils/video_reduce.py
+#
+# Verkleinert Nightly-Zeitraffer fuer den Upload:
+# - ffprobe liest Codec, Aufloesung, Bildrate und Bitrate der Quelle
+# - daraus wird die Groesse nach dem Encode geschaetzt (Bits pro Pixel);
+#   lohnt die Verkleinerung nicht (< NIGHTLY_VIDEO_MIN_GAIN), wird gar nicht
+#   erst encodiert: kompatible Videos werden nur umverpackt (Stream-Copy,
+#   faststart), alle anderen unveraendert uebernommen
+# - Encoder-Profile mit fester Fallback-Kette, z.B.
+#     v4l2m2m (Pi-Hardware) -> x264_veryfast -> Original
+# - Dauer, Profil und Kompressionsrate werden je Nacht protokolliert
+#   (tmp/nightly_video_stats.jsonl, Influx "nightlyvideo")
+
+import json
+import os
+import shutil
+import subprocess
+import time
+
+from askutils import config
+
+try:
+    from askutils.utils import influx_writer
+except Exception:
+    influx_writer = None
+
+DEFAULT_PROFILE = "x264"
+DEFAULT_MIN_GAIN = 0.05
+DEFAULT_EXPECTED_BPP = 0.06
+
+PROFILES = ("auto", "x264", "x264_fast", "x264_veryfast", "v4l2m2m")
+
+_encoders = None
+
+
+def _cfg_float(key, default):
+    try:
+        return float(getattr(config, key, default))
+    except Exception:
+        return float(default)
+
+
+def _get_profile():
+    profile = str(getattr(config, "NIGHTLY_VIDEO_PROFILE", DEFAULT_PROFILE) or DEFAULT_PROFILE).strip().lower()
+    return profile if profile in PROFILES else DEFAULT_PROFILE
+
+
+def _get_stats_path():
+    path = getattr(config, "NIGHTLY_VIDEO_STATS_FILE", None)
+    if path:
+        return path
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "tmp"))
+    return os.path.join(base, "nightly_video_stats.jsonl")
+
+
+def _scale_filter(w):
+    return f"scale='if(gt(iw,{w}),{w},iw)':-2"
+
+
+# -----------------------------------------------------------
+# Probe / Vorhersage
+# -----------------------------------------------------------
+def _parse_rate(value):
+    try:
+        num, _, den = str(value).partition("/")
+        return float(num) / float(den or 1)
+    except Exception:
+        return 0.0
+
+
+def probe(path):
+    """
+    ffprobe-Daten des ersten Videostreams; None wenn ffprobe fehlt/scheitert.
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,width,height,pix_fmt,bit_rate,avg_frame_rate,r_frame_rate",
+        "-show_entries", "format=duration,bit_rate,size,format_name",
+        "-of", "json",
+        path,
+    ]
+    try:
+        data = json.loads(subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode())
+    except Exception:
+        return None
+
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+    stream = streams[0]
+    fmt = data.get("format") or {}
+
+    duration = float(fmt.get("duration") or 0)
+    size = int(fmt.get("size") or 0) or os.path.getsize(path)
+    bit_rate = int(stream.get("bit_rate") or fmt.get("bit_rate") or 0)
+    if not bit_rate and duration > 0:
+        bit_rate = int(size * 8 / duration)
+
+    return {
+        "codec": stream.get("codec_name"),
+        "width": int(stream.get("width") or 0),
+        "height": int(stream.get("height") or 0),
+        "pix_fmt": stream.get("pix_fmt"),
+        "fps": _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate")),
+        "bit_rate": bit_rate,
+        "duration": duration,
+        "format": fmt.get("format_name") or "",
+    }
+
+
+def _output_size(width, height, max_width):
+    if width <= max_width:
+        return width, height
+    return max_width, max(2, int(round(height * max_width / float(width) / 2.0)) * 2)
+
+
+def is_compliant(info, max_width):
+    # Kann ohne Encode ausgeliefert werden (H.264, yuv420p, MP4, nicht zu breit)
+    return (
+        info.get("codec") == "h264"
+        and info.get("pix_fmt") == "yuv420p"
+        and "mp4" in info.get("format", "")
+        and 0 < info.get("width", 0) <= max_width
+    )
+
+
+def predict(info, max_width):
+    """
+    Erwartete Bitrate nach dem Encode und Verhaeltnis zur Quelle.
+    Modell: Bits pro Pixel (NIGHTLY_VIDEO_EXPECTED_BPP) * Pixel * Bildrate.
+    """
+    out_w, out_h = _output_size(info["width"], info["height"], max_width)
+    fps = info.get("fps") or 25.0
+    expected = _cfg_float("NIGHTLY_VIDEO_EXPECTED_BPP", DEFAULT_EXPECTED_BPP) * out_w * out_h * fps
+    source = info.get("bit_rate") or 0
+    ratio = expected / source if source > 0 else 0.0
+    return int(expected), ratio
+
+
+# -----------------------------------------------------------
+# Encoder
+# -----------------------------------------------------------
+def _available_encoders():
+    global _encoders
+    if _encoders is None:
+        try:
+            out = subprocess.check_output(["ffmpeg", "-hide_banner", "-encoders"], stderr=subprocess.DEVNULL)
+            _encoders = out.decode(errors="replace")
+        except Exception:
+            _encoders = ""
+    return _encoders
+
+
+def _has_v4l2m2m():
+    # Hardware-Encoder des Pi: ffmpeg muss ihn kennen und das Geraet existieren
+    return "h264_v4l2m2m" in _available_encoders() and os.path.exists("/dev/video11")
+
+
+def encoder_chain(profile):
+    """
+    Reihenfolge der Encode-Versuche; am Ende steht immer "original".
+    """
+    if profile == "auto":
+        chain = (["v4l2m2m"] if _has_v4l2m2m() else []) + ["x264_veryfast"]
+    elif profile == "v4l2m2m":
+        chain = ["v4l2m2m", "x264_veryfast"]
+    else:
+        chain = [profile]
+    return chain + ["original"]
+
+
+def _encode_cmd(profile, src, dst, max_width, crf, preset, bit_rate):
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", src,
+    ]
+
+    if profile == "copy":
+        return cmd + ["-c:v", "copy", "-movflags", "+faststart", "-an", dst]
+
+    cmd += ["-vf", _scale_filter(max_width)]
+
+    if profile == "v4l2m2m":
+        cmd += ["-c:v", "h264_v4l2m2m", "-b:v", str(int(bit_rate))]
+    else:
+        x264_preset = {"x264_fast": "fast", "x264_veryfast": "veryfast"}.get(profile, preset)
+        cmd += [
+            "-c:v", "libx264",
+            "-preset", x264_preset,
+            "-crf", str(crf),
+            "-profile:v", "main",
+            "-level", "4.0",
+        ]
+
+    return cmd + ["-pix_fmt", "yuv420p", "-movflags", "+faststart", "-an", dst]
+
+
+# -----------------------------------------------------------
+# Statistik
+# -----------------------------------------------------------
+def _record(stats):
+    path = _get_stats_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(stats) + "\n")
+    except Exception:
+        pass
+
+    try:
+        if influx_writer is None:
+            return
+        influx_writer.log_metric(
+            "nightlyvideo",
+            {
+                "transcode_seconds": float(stats["transcode_seconds"]),
+                "ratio": float(stats["ratio"]),
+                "predicted_ratio": float(stats["predicted_ratio"] or 0.0),
+            },
+            tags={"host": "host1", "profile": stats["used"]},
+        )
+    except Exception:
+        # Statistik darf den Upload nie abbrechen
+        pass
+
+
+# -----------------------------------------------------------
+# Haupteinstieg
+# -----------------------------------------------------------
+def reduce_video(src, tmp, max_width, crf, preset, log):
+    """
+    Liefert den Pfad des hochzuladenden Videos in tmp und die Statistik.
+    """
+    ext = os.path.splitext(src)[1].lower()
+    src_size = os.path.getsize(src)
+    min_gain = _cfg_float("NIGHTLY_VIDEO_MIN_GAIN", DEFAULT_MIN_GAIN)
+    profile = _get_profile()
+
+    info = probe(src)
+    expected_bps, predicted_ratio = (None, None)
+    chain = encoder_chain(profile)
+
+    if info is not None and info.get("width"):
+        expected_bps, predicted_ratio = predict(info, max_width)
+        log(
+            f"video_probe codec={info['codec']} size={info['width']}x{info['height']} "
+            f"fps={info['fps']:.2f} bit_rate={info['bit_rate']} "
+            f"expected_bit_rate={expected_bps} predicted_ratio={predicted_ratio:.2f}"
+        )
+        if predicted_ratio > 1.0 - min_gain:
+            # Encode wuerde kaum etwas sparen -> gar nicht erst versuchen
+            chain = (["copy"] if is_compliant(info, max_width) else []) + ["original"]
+    else:
+        log("video_probe_failed -> ohne Vorhersage")
+
+    log(f"video_chain profile={profile} chain={'>'.join(chain)}")
+
+    started = time.monotonic()
+    final_video = None
+    used = "original"
+
+    for step in chain:
+        if step == "original":
+            break
+
+        out = os.path.join(tmp, "video" + (ext if step == "copy" else ".mp4"))
+        t0 = time.monotonic()
+        try:
+            subprocess.check_call(_encode_cmd(
+                step, src, out, max_width, crf, preset,
+                expected_bps or (info or {}).get("bit_rate") or 4000000,
+            ))
+        except Exception as e:
+            log(f"video_encode_failed profile={step} seconds={time.monotonic() - t0:.1f} error={e}")
+            continue
+
+        out_size = os.path.getsize(out)
+        if step != "copy" and out_size >= src_size * (1.0 - min_gain):
+            # naechstes Profil versuchen (z.B. libx264 CRF nach Hardware-Encoder mit Zielbitrate)
+            log(f"video_encode_no_gain profile={step} original_size={src_size} reduced_size={out_size}")
+            try:
+                os.remove(out)
+            except OSError:
+                pass
+            continue
+
+        final_video = out
+        used = step
+        break
+
+    if final_video is None:
+        final_video = os.path.join(tmp, "video_original" + ext)
+        shutil.copy2(src, final_video)
+
+    out_size = os.path.getsize(final_video)
+    stats = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": os.path.basename(src),
+        "profile": profile,
+        "used": used,
+        "chain": chain,
+        "source_size": src_size,
+        "output_size": out_size,
+        "ratio": round(out_size / float(src_size), 3) if src_size else 1.0,
+        "predicted_ratio": round(predicted_ratio, 3) if predicted_ratio is not None else None,
+        "transcode_seconds": round(time.monotonic() - started, 1),
+    }
+    log(
+        f"video_result used={used} original_size={src_size} output_size={out_size} "
+        f"ratio={stats['ratio']} seconds={stats['transcode_seconds']}"
+    )
+    _record(stats)
+    return final_video, stats
@@ -47,6 +47,8 @@ def main():
 
     all_results = []
 
+    # Chip pruefen, dann alle gueltigen Sensoren gemeinsam auslesen
+    valid = []
     for sensor in sensors:
         sensor_name = sensor.get("name", "BME280")
         sensor_addr = int(sensor.get("address", 0x76))
@@ -54,7 +56,6 @@ def main():
         try:
             chip = bme280.get_chip_id(sensor_addr)
             chip_id = chip[0]
-            chip_version = chip[1]
 
             if chip_id not in [0x60, 0x58]:
                 warn(
@@ -64,8 +65,27 @@ def main():
                     )
                 )
                 continue
+        except Exception as e:
+            error(
+                "Fehler bei Sensor '{}' an Adresse {}: {}".format(
+                    sensor_name, hex(sensor_addr), e
+                )
+            )
+            continue
+
+        valid.append(sensor)
+
+    readings = bme280.read_sensors(valid)
+
+    for sensor, reading in zip(valid, readings):
+        sensor_name = sensor.get("name", "BME280")
+        sensor_addr = int(sensor.get("address", 0x76))
+
+        try:
+            if isinstance(reading, Exception):
+                raise reading
 
-            temp, pressure, hum = bme280.read_sensor(sensor)
+            temp, pressure, hum = reading
             taupunkt = bme280.calculate_dew_point(temp, hum)
 
             print("Standort: {} ({})".format(config.STANDORT_NAME, config.KAMERA_ID))
@@ -29,13 +29,35 @@ def _atomic_write_json(path: str, data: dict):
     os.replace(tmp, path)
 
 
+_sensor = None
+
+
+def _get_sensor():
+    # Im Sensor-Dienst bleibt der Bus zwischen den Messungen offen
+    global _sensor
+    if _sensor is None:
+        _sensor = HTU21()
+    return _sensor
+
+
+def _reset_sensor():
+    # Nach Lesefehler Bus schliessen und beim naechsten Mal neu oeffnen
+    global _sensor
+    if _sensor is not None:
+        try:
+            _sensor.bus.close()
+        except Exception:
+            pass
+    _sensor = None
+
+
 def main():
     if not config.HTU21_ENABLED:
         print("HTU21 ist deaktiviert. Test wird uebersprungen.")
         return
 
     try:
-        sensor = HTU21()
+        sensor = _get_sensor()
     except Exception as e:
         error(f"Sensor nicht erreichbar: {e}")
         return
@@ -96,6 +118,7 @@ def main():
 
     except Exception as e:
         error(f"Fehler beim Auslesen oder Schreiben der HTU21-Daten: {e}")
+        _reset_sensor()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+import sys
+
+from askutils.uploader.image_upload_service import run_image_upload_service
+
+if __name__ == "__main__":
+    # optional: api | tj | indi (Default: IMAGE_SERVICE_UPLOADER bzw. api)
+    run_image_upload_service(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+from askutils.meteor.service import run_meteor_service
+
+if __name__ == "__main__":
+    run_meteor_service()
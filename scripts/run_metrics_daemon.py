@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+from askutils.utils.metrics_daemon import run_metrics_daemon
+
+if __name__ == "__main__":
+    run_metrics_daemon()
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+from askutils.sensors.scheduler import run_sensor_daemon
+
+if __name__ == "__main__":
+    run_sensor_daemon()
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+from askutils.uploader.upload_queue import run_upload_worker
+
+if __name__ == "__main__":
+    run_upload_worker()
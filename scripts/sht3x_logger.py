@@ -29,13 +29,35 @@ def _atomic_write_json(path: str, data: dict):
     os.replace(tmp, path)
 
 
+_sensor = None
+
+
+def _get_sensor():
+    # Keeps the bus open between measurements in the sensor daemon
+    global _sensor
+    if _sensor is None:
+        _sensor = SHT3x()
+    return _sensor
+
+
+def _reset_sensor():
+    # After a read error close the bus and reopen it on the next run
+    global _sensor
+    if _sensor is not None:
+        try:
+            _sensor.bus.close()
+        except Exception:
+            pass
+    _sensor = None
+
+
 def main():
     if not getattr(config, "SHT3X_ENABLED", False):
         print("SHT3x is disabled. Skipping measurement.")
         return
 
     try:
-        sensor = SHT3x()
+        sensor = _get_sensor()
     except Exception as e:
         error(f"SHT3x sensor not reachable: {e}")
         return
@@ -95,6 +117,7 @@ def main():
 
     except Exception as e:
         error(f"Error while reading or writing SHT3x data: {e}")
+        _reset_sensor()
 
 
 if __name__ == "__main__":
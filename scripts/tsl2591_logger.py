@@ -38,6 +38,7 @@ def main():
     print(f"CloudIndex       : {data.get('cloud_index', -1)} (0=clear .. 3=overcast)")
     print(f"Gain             : {data['gain']}")
     print(f"Integration      : {data['integration_ms']} ms (Auto-Range: {data['autorange']} / {data['autorange_reason']})")
+    print(f"Time to reading  : {data['read_seconds']:.2f} s ({data['autorange_steps']} autorange steps)")
 
     # Numeric gain code for easier plotting
     gain_numeric_map = {"LOW": 1, "MED": 25, "HIGH": 428, "MAX": 9876}
@@ -79,6 +80,10 @@ def main():
         "GainCode": int(gain_code),
         "AutoRange": 1 if data["autorange"] else 0,
         "GoodRead": int(good_read),
+
+        # Autorange cost
+        "ReadSeconds": float(data["read_seconds"]),
+        "AutorangeSteps": int(data["autorange_steps"]),
     }
 
     influx_writer.log_metric("tsl2591", fields, tags=tags)
@@ -273,6 +273,8 @@ def load_config_data() -> Dict[str, Any]:
         },
 
         "sensors": {
+            "sensor_daemon_enabled": bool(_safe_get(module, "SENSOR_DAEMON_ENABLED", False)),
+
             "bme280_enabled": bool(_safe_get(module, "BME280_ENABLED", False)),
             "bme280_name": _safe_get(module, "BME280_NAME"),
             "bme280_i2c_address": _safe_get(module, "BME280_I2C_ADDRESS"),
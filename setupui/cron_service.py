@@ -349,6 +349,22 @@ def build_sensor_jobs(config_data: Dict[str, Any]) -> List[Dict[str, str]]:
     sensors = config_data.get("sensors", {})
     jobs = []
 
+    # Sensor-Dienst: ein Prozess fuer alle Sensoren statt je ein Cronjob.
+    # Cron startet ihn jede Minute; flock -n beendet den Start sofort,
+    # solange der Dienst laeuft.
+    if sensors.get("sensor_daemon_enabled"):
+        module = "scripts.run_sensor_daemon"
+        jobs.append({
+            "comment": "Sensor Daemon",
+            "schedule": "* * * * *",
+            "module": module,
+            "command": (
+                f"cd {PROJECT_ROOT} && mkdir -p tmp && "
+                f"flock -n tmp/sensor_daemon.lock {PYTHON_BIN} -m {module} >> tmp/sensor_daemon.log 2>&1"
+            ),
+        })
+        return jobs
+
     def add_job(enabled, comment, schedule, module):
         if enabled:
             jobs.append({
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera BME280 driver benchmark
+
+Counts I2C transactions per reading for the old read path (chip ID,
+control registers and 32 bytes of calibration on every reading) and for
+the cached driver in askutils/sensors/bme280.py:
+
+- cron cold start without calibration cache
+- cron cold start with tmp/bme280_calibration.json
+- sensor daemon, forced mode (ctrl_meas + one burst read)
+- sensor daemon, normal mode (one burst read)
+
+It also checks that the new compensation returns exactly the old values,
+that the driver recovers from a chip reset (ctrl_hum / ctrl_meas back to
+0) in both modes, and times the compensation for several sensors (numpy
+vs. one by one).
+
+    cd ~/AllSkyKamera
+    python3 tests/bme280_benchmark.py              # real sensor at 0x76
+    python3 tests/bme280_benchmark.py --simulate   # no hardware needed
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from ctypes import c_short
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Calibration block of a real BME280 (0x88..0xA1, 0xE1..0xE7)
+SIM_CAL1 = [0x70, 0x6B, 0x43, 0x67, 0x18, 0xFC, 0x7D, 0x8E, 0x43, 0xD6, 0xD0, 0x0B,
+            0x27, 0x0B, 0x8C, 0x00, 0xF9, 0xFF, 0x8C, 0x3C, 0xF8, 0xC6, 0x70, 0x17]
+SIM_CAL2 = [0x4B]
+SIM_CAL3 = [0x6E, 0x01, 0x00, 0x13, 0x2C, 0x03, 0x1E]
+
+
+class SimulatedBus:
+    """
+    Register map of one or more BME280. Writing ctrl_meas with a mode
+    copies the pending sample into the data registers; without ctrl_hum
+    the humidity reads 0x8000. After reset() the chip sleeps and keeps
+    returning the reset values.
+    """
+
+    def __init__(self, addresses):
+        self.regs = {}
+        self.pending = {}
+        for addr in addresses:
+            regs = {0xD0: 0x60, 0xD1: 0x00}
+            for i, b in enumerate(SIM_CAL1):
+                regs[0x88 + i] = b
+            regs[0xA1] = SIM_CAL2[0]
+            for i, b in enumerate(SIM_CAL3):
+                regs[0xE1 + i] = b
+            self.regs[addr] = regs
+            self.new_sample(addr)
+
+    def new_sample(self, addr):
+        pres = random.randint(300000, 420000)
+        temp = random.randint(480000, 560000)
+        hum = random.randint(20000, 40000)
+        data = [pres >> 12, (pres >> 4) & 0xFF, (pres & 0x0F) << 4,
+                temp >> 12, (temp >> 4) & 0xFF, (temp & 0x0F) << 4,
+                hum >> 8, hum & 0xFF]
+        self.pending[addr] = data
+        if self.regs[addr].get(0xF4, 0) & 0x03 == 0x03:
+            self._measure(addr)     # normal mode measures continuously
+
+    def _measure(self, addr):
+        data = list(self.pending[addr])
+        if not self.regs[addr].get(0xF2):
+            data[6:8] = [0x80, 0x00]
+        for i, b in enumerate(data):
+            self.regs[addr][0xF7 + i] = b
+
+    def reset(self, addr):
+        for reg in (0xF2, 0xF4, 0xF5):
+            self.regs[addr][reg] = 0
+        for i, b in enumerate([0x80, 0, 0, 0x80, 0, 0, 0x80, 0]):
+            self.regs[addr][0xF7 + i] = b
+
+    def read_i2c_block_data(self, addr, reg, length):
+        return [self.regs[addr].get(reg + i, 0) for i in range(length)]
+
+    def write_byte_data(self, addr, reg, value):
+        self.regs[addr][reg] = value
+        if reg == 0xF4 and value & 0x03:
+            self._measure(addr)
+
+
+class CountingBus:
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def transactions(self):
+        return self.reads + self.writes
+
+    def reset(self):
+        self.reads = 0
+        self.writes = 0
+
+    def read_i2c_block_data(self, addr, reg, length):
+        self.reads += 1
+        return self.bus.read_i2c_block_data(addr, reg, length)
+
+    def write_byte_data(self, addr, reg, value):
+        self.writes += 1
+        return self.bus.write_byte_data(addr, reg, value)
+
+
+def legacy_read(bus, addr):
+    """The read path before the driver (chip ID check as in the logger)."""
+    def get_short(d, i):
+        return c_short((d[i + 1] << 8) + d[i]).value
+
+    def get_ushort(d, i):
+        return (d[i + 1] << 8) + d[i]
+
+    def get_char(d, i):
+        return d[i] - 256 if d[i] > 127 else d[i]
+
+    bus.read_i2c_block_data(addr, 0xD0, 2)
+    bus.write_byte_data(addr, 0xF2, 2)
+    bus.write_byte_data(addr, 0xF4, (2 << 5) | (2 << 2) | 1)
+    cal1 = bus.read_i2c_block_data(addr, 0x88, 24)
+    cal2 = bus.read_i2c_block_data(addr, 0xA1, 1)
+    cal3 = bus.read_i2c_block_data(addr, 0xE1, 7)
+
+    T1, T2, T3 = get_ushort(cal1, 0), get_short(cal1, 2), get_short(cal1, 4)
+    P = [get_ushort(cal1, 6)] + [get_short(cal1, 8 + 2 * i) for i in range(8)]
+    H1, H2, H3 = cal2[0] & 0xFF, get_short(cal3, 0), cal3[2] & 0xFF
+    H4 = ((get_char(cal3, 3) << 24) >> 20) | (get_char(cal3, 4) & 0x0F)
+    H5 = ((get_char(cal3, 5) << 24) >> 20) | ((cal3[4] & 0xFF) >> 4 & 0x0F)
+    H6 = get_char(cal3, 6)
+
+    time.sleep((1.25 + 2.3 * 2 + 2.3 * 2 + 0.575 + 2.3 * 2 + 0.575) / 1000.0)
+    data = bus.read_i2c_block_data(addr, 0xF7, 8)
+    pres_raw = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
+    temp_raw = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
+    hum_raw = (data[6] << 8) | data[7]
+
+    var1 = ((((temp_raw >> 3) - (T1 << 1))) * T2) >> 11
+    var2 = (((((temp_raw >> 4) - T1) * ((temp_raw >> 4) - T1)) >> 12) * T3) >> 14
+    t_fine = var1 + var2
+    temperature = float(((t_fine * 5) + 128) >> 8) / 100.0
+
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * P[5] / 32768.0
+    var2 = var2 + var1 * P[4] * 2.0
+    var2 = var2 / 4.0 + P[3] * 65536.0
+    var1 = (P[2] * var1 * var1 / 524288.0 + P[1] * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * P[0]
+    if var1 == 0:
+        pressure = 0.0
+    else:
+        pressure = ((1048576.0 - pres_raw - var2 / 4096.0) * 6250.0 / var1)
+        var1 = P[8] * pressure * pressure / 2147483648.0
+        var2 = pressure * P[7] / 32768.0
+        pressure = (pressure + (var1 + var2 + P[6]) / 16.0) / 100.0
+
+    humidity = t_fine - 76800.0
+    humidity = ((hum_raw - (H4 * 64.0 + H5 / 16384.0 * humidity))
+                * (H2 / 65536.0 * (1.0 + H6 / 67108864.0 * humidity * (1.0 + H3 / 67108864.0 * humidity))))
+    humidity = humidity * (1.0 - H1 * humidity / 524288.0)
+    humidity = max(0.0, min(humidity, 100.0))
+    return round(temperature, 2), round(pressure, 2), round(humidity, 2)
+
+
+def _install(simulate, cache_file, addresses):
+    cfg = types.ModuleType("askutils.config")
+    cfg.BME280_CALIBRATION_CACHE_FILE = cache_file
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+
+    if simulate:
+        fake = types.ModuleType("smbus")
+        fake.SMBus = lambda _n: SimulatedBus(addresses)
+        sys.modules["smbus"] = fake
+
+    from askutils.sensors import bme280
+    counting = CountingBus(bme280.bus)
+    bme280.bus = counting
+    return cfg, bme280, counting
+
+
+def _per_reading(counting, fn, readings):
+    counting.reset()
+    for _ in range(readings):
+        fn()
+    return counting.transactions / float(readings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BME280 driver benchmark")
+    parser.add_argument("--simulate", action="store_true", help="Use a simulated sensor")
+    parser.add_argument("--address", type=lambda v: int(v, 0), default=0x76)
+    parser.add_argument("--readings", type=int, default=20)
+    parser.add_argument("--sensors", type=int, default=4, help="Simulated sensors for the compensation timing")
+    args = parser.parse_args()
+
+    addresses = [args.address] + [0x40 + i for i in range(max(0, args.sensors - 1))]
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg, bme280, bus = _install(args.simulate, os.path.join(tmp, "bme280_calibration.json"), addresses)
+        addr = args.address
+        sensor = {"address": addr}
+
+        legacy = _per_reading(bus, lambda: legacy_read(bus, addr), args.readings)
+
+        def cold():
+            bme280._devices.clear()
+            bme280.read_sensor(sensor)
+
+        cfg.BME280_CALIBRATION_MAX_AGE_HOURS = 0
+        cold_nocache = _per_reading(bus, cold, args.readings)
+        cfg.BME280_CALIBRATION_MAX_AGE_HOURS = 24
+        cold()
+        cold_cache = _per_reading(bus, cold, args.readings)
+
+        bme280._devices.clear()
+        bme280.read_sensor(sensor)
+        forced = _per_reading(bus, lambda: bme280.read_sensor(sensor), args.readings)
+
+        cfg.BME280_MODE = "normal"
+        bme280._devices.clear()
+        bme280.read_sensor(sensor)
+        normal = _per_reading(bus, lambda: bme280.read_sensor(sensor), args.readings)
+        cfg.BME280_MODE = "forced"
+
+        # Gleiche Werte wie der alte Lesepfad
+        bme280._devices.clear()
+        for _ in range(args.readings):
+            if args.simulate:
+                bus.bus.new_sample(addr)
+            old = legacy_read(bus, addr)
+            new = bme280.read_sensor(sensor)
+            if old != new:
+                failures.append("values differ: old %s new %s" % (old, new))
+                break
+
+        # Chip-Reset waehrend der Dienst laeuft: Treiber muss sich neu konfigurieren
+        if args.simulate:
+            for mode in ("forced", "normal"):
+                cfg.BME280_MODE = mode
+                bme280._devices.clear()
+                bme280.read_sensor(sensor)
+                bus.bus.reset(addr)
+                bus.bus.new_sample(addr)
+                new = bme280.read_sensor(sensor)
+                old = legacy_read(bus, addr)
+                if old != new:
+                    failures.append("%s mode after chip reset: old %s new %s" % (mode, old, new))
+            cfg.BME280_MODE = "forced"
+
+        # Kompensation fuer mehrere Sensoren: numpy vs. einzeln
+        if args.simulate:
+            import numpy as np
+            cal = bme280.parse_calibration(SIM_CAL1, SIM_CAL2, SIM_CAL3)
+            n = 1000 * args.sensors
+            raws = [(random.randint(300000, 420000), random.randint(480000, 560000),
+                     random.randint(20000, 40000)) for _ in range(n)]
+            t0 = time.perf_counter()
+            single = [bme280.compensate(cal, *r) for r in raws]
+            t_single = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            stacked = {k: np.full(n, v, dtype=np.int64) for k, v in cal.items()}
+            arr = np.array(raws, dtype=np.int64)
+            t, p, h = bme280.compensate(stacked, arr[:, 0], arr[:, 1], arr[:, 2])
+            t_vector = time.perf_counter() - t0
+            if any(abs(a - b) > 1e-9 for s, v in zip(single, zip(t, p, h)) for a, b in zip(s, v)):
+                failures.append("numpy compensation differs from scalar compensation")
+
+            sensors = [{"address": a} for a in addresses]
+            bme280._devices.clear()
+            bme280.read_sensors(sensors)
+            multi = _per_reading(bus, lambda: bme280.read_sensors(sensors), args.readings) / len(sensors)
+
+    print()
+    print("BME280 I2C transactions per reading (%s)" % ("simulated" if args.simulate else hex(args.address)))
+    print("  old read path              : %.1f" % legacy)
+    print("  cron, no calibration cache : %.1f" % cold_nocache)
+    print("  cron, calibration cache    : %.1f" % cold_cache)
+    print("  daemon, forced mode        : %.1f" % forced)
+    print("  daemon, normal mode        : %.1f" % normal)
+    if args.simulate:
+        print("  daemon, %d sensors (each)   : %.1f" % (len(addresses), multi))
+        print()
+        print("Compensation of %d readings" % n)
+        print("  one by one : %.2f ms" % (t_single * 1000))
+        print("  numpy      : %.2f ms" % (t_vector * 1000))
+    for failure in failures:
+        print("  FAIL: %s" % failure)
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
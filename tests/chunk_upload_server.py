@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera chunked upload stand-in server
+
+Local stand-in for the resumable nightly video upload protocol used by
+askutils/uploader/chunked_upload.py (init / chunk / status / finish).
+Finished files are written to --store. With --fail-every N every N-th
+chunk request is cut off after half of its body, to simulate a dropped
+LTE link.
+
+Run as server:
+    cd ~/AllSkyKamera
+    python3 tests/chunk_upload_server.py --port 8765 --store /tmp/chunk_store
+    # config.py:
+    #   NIGHTLY_UPLOAD_CHUNKED = True
+    #   NIGHTLY_CHUNK_UPLOAD_URL = "http://127.0.0.1:8765/nightly_chunk"
+
+Self test (no config.py needed, runs everything in-process):
+    python3 tests/chunk_upload_server.py --selftest [--size-mb 24]
+
+The self test uploads a random file through a flaky server, aborts the
+first attempt, resumes it in a second attempt from the acknowledged
+offset and checks the stored file. It then lets the server answer every
+chunk with 409 and the same offset and checks that the uploader gives up
+after its retry limit instead of looping.
+"""
+
+import argparse
+import email.parser
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+class ChunkStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.chunk_requests = 0
+        self.stuck = False      # 409 mit unveraendertem Offset auf jedes Stueck
+        os.makedirs(directory, exist_ok=True)
+
+    def init(self, fields):
+        key = (fields.get("date"), fields.get("asset"), fields.get("sha256"))
+        with self.lock:
+            for upload_id, session in self.sessions.items():
+                if session["key"] == key and not session["done"]:
+                    return upload_id, session["offset"]
+
+            upload_id = uuid.uuid4().hex
+            self.sessions[upload_id] = {
+                "key": key,
+                "size": int(fields.get("size") or 0),
+                "sha256": fields.get("sha256"),
+                "filename": os.path.basename(fields.get("filename") or "upload.bin"),
+                "offset": 0,
+                "done": False,
+                "part": os.path.join(self.directory, upload_id + ".part"),
+            }
+            open(self.sessions[upload_id]["part"], "wb").close()
+            return upload_id, 0
+
+
+def _parse_multipart(content_type, body):
+    msg = email.parser.BytesParser().parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    fields = {}
+    for part in msg.get_payload():
+        name = part.get_param("name", header="content-disposition")
+        if part.get_filename() is None:
+            fields[name] = part.get_payload(decode=True).decode()
+    return fields
+
+
+def make_handler(store, fail_every):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _action(self):
+            return parse_qs(urlparse(self.path).query).get("action", [""])[0]
+
+        def _session(self):
+            upload_id = self.headers.get("X-Upload-Id") or ""
+            return upload_id, store.sessions.get(upload_id)
+
+        def do_GET(self):
+            if self._action() != "status":
+                return self._reply(404, {"ok": False})
+            _, session = self._session()
+            if session is None:
+                return self._reply(404, {"ok": False, "error": "unknown_upload"})
+            return self._reply(200, {"ok": True, "offset": session["offset"]})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            action = self._action()
+
+            if action == "init":
+                fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+                upload_id, offset = store.init(fields)
+                return self._reply(200, {"ok": True, "upload_id": upload_id, "offset": offset})
+
+            if action == "finish":
+                fields = parse_qs(body.decode())
+                session = store.sessions.get(fields.get("upload_id", [""])[0])
+                if session is None or session["offset"] != session["size"]:
+                    return self._reply(409, {"ok": False, "error": "incomplete"})
+                h = hashlib.sha256()
+                with open(session["part"], "rb") as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b""):
+                        h.update(block)
+                if h.hexdigest() != session["sha256"]:
+                    return self._reply(422, {"ok": False, "error": "sha256_mismatch"})
+                final = os.path.join(store.directory, session["filename"])
+                os.replace(session["part"], final)
+                session["done"] = True
+                return self._reply(200, {"ok": True, "path": final})
+
+            return self._reply(404, {"ok": False})
+
+        def do_PUT(self):
+            if self._action() != "chunk":
+                return self._reply(404, {"ok": False})
+
+            length = int(self.headers.get("Content-Length") or 0)
+            store.chunk_requests += 1
+            if fail_every and store.chunk_requests % fail_every == 0:
+                # Verbindung mitten im Stueck abbrechen
+                self.rfile.read(length // 2)
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+
+            body = self.rfile.read(length)
+            _, session = self._session()
+            if session is None:
+                return self._reply(404, {"ok": False, "error": "unknown_upload"})
+
+            offset = int(self.headers.get("X-Upload-Offset") or -1)
+            if offset != session["offset"] or store.stuck:
+                return self._reply(409, {"ok": False, "offset": session["offset"]})
+            if hashlib.sha256(body).hexdigest() != self.headers.get("X-Chunk-Sha256"):
+                return self._reply(422, {"ok": False, "error": "chunk_sha256_mismatch"})
+
+            with open(session["part"], "r+b") as f:
+                f.seek(offset)
+                f.write(body)
+            session["offset"] = offset + len(body)
+            return self._reply(200, {"ok": True, "offset": session["offset"]})
+
+    return Handler
+
+
+def start_server(port, store_dir, fail_every=0):
+    store = ChunkStore(store_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(store, fail_every))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, store
+
+
+# --------------------------------------------------------------------
+# Self test
+# --------------------------------------------------------------------
+
+def selftest(size_mb):
+    cfg = types.ModuleType("askutils.config")
+    cfg.KAMERA_ID = "TEST"
+    cfg.NIGHTLY_UPLOAD_CHUNK_MB = 1
+    cfg.NIGHTLY_UPLOAD_CHUNK_MAX_MB = 8
+    cfg.NIGHTLY_UPLOAD_CHUNK_TARGET_SECONDS = 0.05
+    cfg.HTTP_LOG_TIMING = False
+    cfg.HTTP_RETRIES = 0
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+
+    from askutils.uploader import chunked_upload
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, store = start_server(0, os.path.join(tmp, "store"), fail_every=5)
+        url = "http://127.0.0.1:%d/nightly_chunk" % server.server_port
+
+        video = os.path.join(tmp, "video.mp4")
+        thumb = os.path.join(tmp, "thumb.jpg")
+        with open(video, "wb") as f:
+            f.write(os.urandom(int(size_mb * 1024 * 1024)))
+        with open(thumb, "wb") as f:
+            f.write(os.urandom(2048))
+
+        fields = {"date": "20260101", "asset": "video", "publish_last": "1"}
+        sizes = []
+
+        # 1. Versuch: bricht beim ersten Verbindungsabbruch ab
+        cfg.NIGHTLY_UPLOAD_CHUNK_RETRIES = 0
+        first = chunked_upload.ChunkedUploader(url, "key")
+        ok1 = first.upload(video, thumb, fields, "video/mp4", progress=lambda done, total: sizes.append(done))
+        offset1 = max(sizes) if sizes else 0
+
+        # 2. Versuch: neuer Prozess-Zustand, setzt am bestaetigten Offset fort
+        cfg.NIGHTLY_UPLOAD_CHUNK_RETRIES = 10
+        second = chunked_upload.ChunkedUploader(url, "key")
+        t0 = time.perf_counter()
+        ok2 = second.upload(video, thumb, fields, "video/mp4")
+        elapsed = time.perf_counter() - t0
+
+        stored = os.path.join(store.directory, "video.mp4")
+        with open(video, "rb") as a, open(stored, "rb") as b:
+            same = hashlib.sha256(a.read()).digest() == hashlib.sha256(b.read()).digest()
+
+        # 3. Server rueckt den Offset nie vor: muss nach den Wiederholungen aufgeben
+        with open(video, "ab") as f:
+            f.write(b"x")
+        store.stuck = True
+        cfg.NIGHTLY_UPLOAD_CHUNK_RETRIES = 3
+        chunked_upload.time = types.SimpleNamespace(sleep=lambda _s: None, monotonic=time.monotonic)
+        before = store.chunk_requests
+        ok3 = chunked_upload.ChunkedUploader(url, "key").upload(video, thumb, fields, "video/mp4")
+        stuck_requests = store.chunk_requests - before
+        chunked_upload.time = time
+
+        server.shutdown()
+
+    print()
+    print("Chunked upload self test (%.0f MB, every 5th chunk request dropped)" % size_mb)
+    print("  first attempt ok     : %s (stopped at %d bytes)" % (ok1, offset1))
+    print("  resumed attempt ok   : %s in %.2f s" % (ok2, elapsed))
+    print("  chunk requests total : %d" % store.chunk_requests)
+    print("  final chunk size     : %d bytes" % second.sizer.size)
+    print("  stored file matches  : %s" % same)
+    print("  stuck server gave up : %s after %d chunk requests" % (not ok3, stuck_requests))
+    return 0 if (not ok1 and offset1 > 0 and ok2 and same and not ok3 and stuck_requests <= 10) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked upload stand-in server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--store", default=os.path.join(tempfile.gettempdir(), "chunk_store"))
+    parser.add_argument("--fail-every", type=int, default=0, help="Drop every N-th chunk request")
+    parser.add_argument("--selftest", action="store_true")
+    parser.add_argument("--size-mb", type=float, default=24)
+    args = parser.parse_args()
+
+    if args.selftest:
+        return selftest(args.size_mb)
+
+    server, _store = start_server(args.port, args.store, args.fail_every)
+    print("Chunk upload server on http://127.0.0.1:%d/nightly_chunk (store: %s)" % (server.server_port, args.store))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
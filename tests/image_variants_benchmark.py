@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera image variant benchmark
+
+Compares the two ways of building the upload variants
+(fullhd 1920 / mobile 960 / thumb 480) from one source image:
+
+- ffmpeg: three ffmpeg processes, each decoding the full source again
+- pillow: one in-process decode (JPEG draft mode), chained resize
+  fullhd -> mobile -> thumb, three JPEG encodes
+
+Sources are synthetic all-sky like JPEG and PNG files of the given size.
+No camera, network or config.py is needed: a minimal config module is
+injected before askutils.utils.image_variants is imported.
+
+Usage:
+    cd ~/AllSkyKamera
+    python3 tests/image_variants_benchmark.py [--size 3000] [--repeat 3]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def _install_config(**values):
+    cfg = types.ModuleType("askutils.config")
+    for key, value in values.items():
+        setattr(cfg, key, value)
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+    return cfg
+
+
+_install_config(KAMERA_ID="BENCH")
+
+from askutils.utils import image_variants  # noqa: E402
+
+WIDTHS = {"fullhd": 1920, "mobile": 960, "thumb": 480}
+
+
+def ffmpeg_create_jpg(src, dst, width):
+    # same command as the uploader modules
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", src,
+        "-frames:v", "1",
+        "-vf", f"scale='if(gt(iw,{width}),{width},iw)':-2",
+        "-q:v", "2",
+        "-pix_fmt", "yuvj420p",
+        dst,
+    ]
+    subprocess.check_call(cmd)
+
+
+def make_source(path, size, seed=0):
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size]
+    r = np.hypot(xx - size / 2.0, yy - size / 2.0) / (size / 2.0)
+    sky = np.clip(40.0 - 25.0 * r, 0, None)[:, :, None] + rng.normal(0, 4, (size, size, 3))
+    stars = rng.integers(0, size, (4000, 2))
+    sky[stars[:, 0], stars[:, 1]] = 230
+    sky[r > 1.0] = 0
+    Image.fromarray(np.clip(sky, 0, 255).astype(np.uint8)).save(path)
+
+
+def _targets(tmp, prefix):
+    return {name: (os.path.join(tmp, f"{prefix}_{name}.jpg"), w) for name, w in WIDTHS.items()}
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _bench(func, repeat):
+    best_wall = None
+    best_cpu = None
+    for _ in range(repeat):
+        cpu0 = _cpu_seconds()
+        t0 = time.perf_counter()
+        func()
+        wall = time.perf_counter() - t0
+        cpu = _cpu_seconds() - cpu0
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+    return best_wall, best_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image variant benchmark")
+    parser.add_argument("--size", type=int, default=3000, help="Source edge length in pixels")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+
+    print("Upload variants from a %dx%d source" % (args.size, args.size))
+    print("  %-6s %-8s %10s %10s %s" % ("source", "backend", "wall [s]", "cpu [s]", "sizes"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("jpg", "png"):
+            src = os.path.join(tmp, "source." + ext)
+            make_source(src, args.size)
+
+            for backend in ("ffmpeg", "pillow"):
+                if backend == "ffmpeg" and not have_ffmpeg:
+                    print("  %-6s %-8s %10s" % (ext, backend, "skipped (ffmpeg not found)"))
+                    continue
+
+                image_variants.config.IMAGE_VARIANTS_BACKEND = backend
+                targets = _targets(tmp, backend)
+                wall, cpu = _bench(
+                    lambda: image_variants.create_jpeg_variants(src, targets, ffmpeg_create_jpg),
+                    args.repeat,
+                )
+
+                from PIL import Image
+                sizes = " ".join("%dx%d" % Image.open(dst).size for dst, _w in targets.values())
+                print("  %-6s %-8s %10.3f %10.3f %s" % (ext, backend, wall, cpu, sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera Influx stand-in server
+
+Minimal stand-in for the InfluxDB v2 write endpoint (/api/v2/write) used
+by askutils/utils/influx_writer.py. Received points are counted per
+measurement; gzip bodies are unpacked. With --down the server answers
+every write with 503, to exercise the local line-protocol spool.
+
+Run as server:
+    cd ~/AllSkyKamera
+    python3 tests/influx_spool_server.py --port 8086
+    # secrets / config.py: INFLUX_URL = "http://127.0.0.1:8086"
+
+Self test (no config.py needed, runs everything in-process):
+    python3 tests/influx_spool_server.py --selftest [--points 500]
+
+The self test writes points while the server is down (they must end up
+in the spool), brings the server back, writes again and checks that the
+spool was replayed without losing or duplicating points. It also compares
+the number of HTTP requests with the old one-request-per-point behaviour,
+and checks that one dropped point is reported once, not on every flush,
+and that nothing is spooled when INFLUX_URL / INFLUX_TOKEN are missing.
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+class InfluxStore:
+
+    def __init__(self, down=False):
+        self.down = down
+        self.lock = threading.Lock()
+        self.lines = []
+        self.requests = 0
+        self.gzip_requests = 0
+        self.bytes_received = 0
+
+    def measurements(self):
+        counts = {}
+        with self.lock:
+            for line in self.lines:
+                name = line.split(",", 1)[0].split(" ", 1)[0]
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+def make_handler(store):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):
+            pass
+
+        def _reply(self, status, body=b""):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            with store.lock:
+                store.requests += 1
+                store.bytes_received += length
+            if not self.path.startswith("/api/v2/write"):
+                return self._reply(404)
+            if store.down:
+                return self._reply(503, b'{"code":"unavailable","message":"down"}')
+            if self.headers.get("Content-Encoding") == "gzip":
+                store.gzip_requests += 1
+                body = gzip.decompress(body)
+            with store.lock:
+                store.lines.extend(line for line in body.decode().split("\n") if line.strip())
+            return self._reply(204)
+
+    return Handler
+
+
+def start_server(port, down=False):
+    store = InfluxStore(down)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(store))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, store
+
+
+# --------------------------------------------------------------------
+# Self test
+# --------------------------------------------------------------------
+
+def selftest(points):
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server, store = start_server(0, down=True)
+
+        cfg = types.ModuleType("askutils.config")
+        cfg.KAMERA_ID = "TEST"
+        cfg.INFLUX_URL = "http://127.0.0.1:%d" % server.server_port
+        cfg.INFLUX_TOKEN = "token"
+        cfg.INFLUX_ORG = "org"
+        cfg.INFLUX_BUCKET = "bucket"
+        cfg.INFLUX_BATCH_SIZE = 50
+        cfg.INFLUX_FLUSH_SECONDS = 60
+        cfg.INFLUX_SPOOL_FILE = os.path.join(tmp, "influx_spool.lp")
+
+        import askutils
+        sys.modules["askutils.config"] = cfg
+        askutils.config = cfg
+
+        from askutils.utils import influx_writer
+        from askutils.utils import logger
+        logger.log = influx_writer.log = lambda _msg: None
+
+        # 1. Server nicht erreichbar -> alles in den Spool
+        for i in range(points):
+            influx_writer.log_metric("selftest", {"value": float(i)}, tags={"host": "host1"})
+        influx_writer.flush()
+        spooled, spool_bytes = influx_writer.spool_depth()
+        if spooled != points:
+            failures.append("expected %d spooled points, got %d" % (points, spooled))
+
+        # 2. Server wieder da -> neuer Batch + Spool nachliefern
+        store.down = False
+        requests_before = store.requests
+        t0 = time.perf_counter()
+        for i in range(points, 2 * points):
+            influx_writer.log_metric("selftest", {"value": float(i)}, tags={"host": "host1"})
+        influx_writer.flush()
+        elapsed = time.perf_counter() - t0
+        requests_up = store.requests - requests_before
+
+        remaining, _bytes = influx_writer.spool_depth()
+        counts = store.measurements()
+        if remaining:
+            failures.append("spool not empty after replay (%d points)" % remaining)
+        if counts.get("selftest") != 2 * points:
+            failures.append("expected %d points at server, got %d" % (2 * points, counts.get("selftest", 0)))
+        if not counts.get("influxspool"):
+            failures.append("no influxspool depth point written")
+        if not store.gzip_requests:
+            failures.append("writes were not gzip compressed")
+
+        # 3. Spool voll -> Punkte verworfen; der Zaehler wird nur einmal gemeldet
+        store.down = True
+        cfg.INFLUX_SPOOL_MAX_MB = 0
+        influx_writer.log_metric("selftest", {"value": -1.0}, tags={"host": "host1"})
+        influx_writer.flush()
+        store.down = False
+        cfg.INFLUX_SPOOL_MAX_MB = 20
+        reports_before = store.measurements().get("influxspool", 0)
+        for i in range(3):
+            influx_writer.log_metric("selftest", {"value": float(i)}, tags={"host": "host1"})
+            influx_writer.flush()
+        drop_reports = store.measurements().get("influxspool", 0) - reports_before
+        if drop_reports != 1:
+            failures.append("dropped counter reported %d times for one drop" % drop_reports)
+
+        # 4. Ohne INFLUX_URL/TOKEN: verwerfen, nicht spoolen
+        url = cfg.INFLUX_URL
+        cfg.INFLUX_URL = ""
+        for i in range(10):
+            influx_writer.log_metric("unconfigured", {"value": float(i)}, tags={"host": "host1"})
+        influx_writer.flush()
+        unconfigured_spool, _bytes = influx_writer.spool_depth()
+        if unconfigured_spool:
+            failures.append("points spooled without Influx configuration (%d)" % unconfigured_spool)
+        cfg.INFLUX_URL = url
+
+        stats = influx_writer.stats()
+        influx_writer.close()
+        server.shutdown()
+
+    print()
+    print("Influx writer self test (%d points down, %d points up)" % (points, points))
+    print("  spooled while down   : %d points, %d bytes" % (spooled, spool_bytes))
+    print("  requests while up    : %d (one per point before: %d)" % (requests_up, points))
+    print("  write + replay time  : %.2f s" % elapsed)
+    print("  points at server     : %s" % counts)
+    print("  drop reports         : %d (3 flushes after one drop)" % drop_reports)
+    print("  spooled unconfigured : %d" % unconfigured_spool)
+    print("  writer stats         : %s" % stats)
+    for failure in failures:
+        print("  FAIL: %s" % failure)
+    return 0 if not failures else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Influx write stand-in server")
+    parser.add_argument("--port", type=int, default=8086)
+    parser.add_argument("--down", action="store_true", help="Answer every write with 503")
+    parser.add_argument("--selftest", action="store_true")
+    parser.add_argument("--points", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.selftest:
+        return selftest(args.points)
+
+    server, store = start_server(args.port, args.down)
+    print("Influx stand-in on http://127.0.0.1:%d/api/v2/write" % server.server_port)
+    try:
+        while True:
+            time.sleep(10)
+            print("points: %s" % store.measurements(), flush=True)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
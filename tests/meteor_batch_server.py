@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera meteor batch upload stand-in server
+
+Local stand-in for the meteor upload endpoint used by
+askutils/uploader/meteor_upload_api.py. It understands both the single
+candidate upload (asset=meteor) and the batch upload (asset=meteor_batch,
+one multipart request with a manifest and one file group per candidate).
+With --reject-every N every N-th candidate is answered with ok=false, to
+check that only acknowledged candidates get marked as uploaded.
+With --no-batch the server answers batch requests with 404, like an
+endpoint that does not know the batch mode yet.
+
+Run as server:
+    cd ~/AllSkyKamera
+    python3 tests/meteor_batch_server.py --port 8766 --reject-every 4
+    # config.py:
+    #   METEOR_UPLOAD_BATCH = True
+    #   METEOR_UPLOAD_BATCH_SIZE = 10
+    #   METEOR_BATCH_UPLOAD_URL = "http://127.0.0.1:8766/meteor_upload"
+
+Self test (no config.py needed, runs everything in-process):
+    python3 tests/meteor_batch_server.py --selftest [--candidates 12] [--batch-size 5]
+
+The self test uploads a fake day directory in batches with partial
+failures, retries the rejected candidates and finally checks the
+fallback to single uploads against a server without batch support.
+"""
+
+import argparse
+import email.parser
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+CANDIDATE_FIELDS = (
+    "candidate_json", "current_fullhd", "current_small",
+    "previous_small", "diff_small", "boxed_small",
+)
+
+
+class MeteorStore:
+
+    def __init__(self, reject_every=0, batch=True):
+        self.reject_every = reject_every
+        self.batch = batch
+        self.lock = threading.Lock()
+        self.accepted = {}
+        self.seen = 0
+        self.requests = {"meteor": 0, "meteor_batch": 0}
+        self.bytes_received = 0
+
+    def accept(self, candidate_id, parts):
+        with self.lock:
+            self.seen += 1
+            if self.reject_every and self.seen % self.reject_every == 0:
+                return {"ok": False, "error": "simulated_failure"}
+            missing = [name for name in CANDIDATE_FIELDS if not parts.get(name)]
+            if missing:
+                return {"ok": False, "error": "missing_" + missing[0]}
+            self.accepted[candidate_id] = sum(len(parts[name]) for name in CANDIDATE_FIELDS)
+            return {"ok": True}
+
+
+def _parse_multipart(content_type, body):
+    msg = email.parser.BytesParser().parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    fields = {}
+    files = {}
+    for part in msg.get_payload():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True)
+        if part.get_filename() is None:
+            fields[name] = payload.decode()
+        else:
+            files[name] = payload
+    return fields, files
+
+
+def make_handler(store):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            store.bytes_received += length
+            fields, files = _parse_multipart(self.headers.get("Content-Type", ""), body)
+            asset = fields.get("asset")
+
+            if asset == "meteor":
+                store.requests["meteor"] += 1
+                result = store.accept(fields.get("candidate_id"), files)
+                return self._reply(200, result)
+
+            if asset == "meteor_batch":
+                store.requests["meteor_batch"] += 1
+                if not store.batch:
+                    return self._reply(404, {"ok": False, "error": "unknown_asset"})
+                if "day_index" not in files:
+                    return self._reply(400, {"ok": False, "error": "missing_day_index"})
+                try:
+                    manifest = json.loads(fields.get("manifest") or "")
+                except ValueError:
+                    return self._reply(400, {"ok": False, "error": "bad_manifest"})
+
+                results = {}
+                for entry in manifest.get("candidates") or []:
+                    parts = {key: files.get(part) for key, part in (entry.get("files") or {}).items()}
+                    results[entry.get("candidate_id")] = store.accept(entry.get("candidate_id"), parts)
+                return self._reply(200, {"ok": True, "results": results})
+
+            return self._reply(400, {"ok": False, "error": "unknown_asset"})
+
+    return Handler
+
+
+def start_server(port, reject_every=0, batch=True):
+    store = MeteorStore(reject_every, batch)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(store))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, store
+
+
+# --------------------------------------------------------------------
+# Self test
+# --------------------------------------------------------------------
+
+def _make_day_dir(day_dir, count):
+    ids = []
+    for i in range(count):
+        candidate_id = "%06d_%02d" % (220000 + i, i)
+        candidate_dir = os.path.join(day_dir, candidate_id)
+        os.makedirs(candidate_dir)
+        with open(os.path.join(candidate_dir, "candidate.json"), "w") as f:
+            json.dump({"candidate_id": candidate_id}, f)
+        for name in CANDIDATE_FIELDS[1:]:
+            with open(os.path.join(candidate_dir, name + ".jpg"), "wb") as f:
+                f.write(os.urandom(60 * 1024 if name == "current_fullhd" else 8 * 1024))
+        ids.append(candidate_id)
+    with open(os.path.join(day_dir, "index.json"), "w") as f:
+        json.dump({"candidates": [{"candidate_id": c, "uploaded": False} for c in ids]}, f)
+    return ids
+
+
+def _run(meteor_upload_api, url, day_dir, candidate_ids):
+    meteor_upload_api._get_api_url = lambda: url
+    callbacks = []
+
+    def _on_uploaded(ids):
+        # wie detector.upload_pending_for_day: sofort markieren
+        callbacks.append(list(ids))
+        for candidate_id in ids:
+            open(os.path.join(day_dir, candidate_id, "uploaded.ok"), "w").close()
+
+    t0 = time.perf_counter()
+    uploaded = meteor_upload_api.upload_pending_meteor_candidates(
+        "20260101", day_dir, candidate_ids=candidate_ids, on_uploaded=_on_uploaded
+    )
+    return uploaded, callbacks, time.perf_counter() - t0
+
+
+def selftest(count, batch_size):
+    cfg = types.ModuleType("askutils.config")
+    cfg.KAMERA_ID = "TEST"
+    cfg.METEOR_UPLOAD_JITTER_MAX_SECONDS = 0
+    cfg.METEOR_UPLOAD_BATCH = True
+    cfg.METEOR_UPLOAD_BATCH_SIZE = batch_size
+    cfg.HTTP_LOG_TIMING = False
+    cfg.HTTP_RETRIES = 0
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+
+    from askutils.uploader import meteor_upload_api
+    meteor_upload_api.API_KEY = "key"
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server, store = start_server(0, reject_every=4)
+        url = "http://127.0.0.1:%d/meteor_upload" % server.server_port
+        cfg.METEOR_BATCH_UPLOAD_URL = url
+
+        day_dir = os.path.join(tmp, "20260101")
+        ids = _make_day_dir(day_dir, count)
+
+        # 1. Lauf: jeder 4. Kandidat wird abgelehnt
+        uploaded1, callbacks1, t1 = _run(meteor_upload_api, url, day_dir, ids)
+        batches1 = store.requests["meteor_batch"]
+        if sorted(uploaded1) != sorted(store.accepted):
+            failures.append("acknowledged ids differ from server state")
+        if len(callbacks1) != batches1:
+            failures.append("on_uploaded not called once per batch")
+
+        # 2. Lauf: nur die abgelehnten Kandidaten, Server nimmt jetzt alles an
+        store.reject_every = 0
+        rest = [c for c in ids if c not in uploaded1]
+        uploaded2, _callbacks2, t2 = _run(meteor_upload_api, url, day_dir, rest)
+        batches2 = store.requests["meteor_batch"] - batches1
+        if sorted(uploaded1 + uploaded2) != sorted(ids):
+            failures.append("not all candidates uploaded after retry")
+
+        # Bereits markierte Kandidaten werden nicht erneut gesendet
+        uploaded3, _callbacks3, _t3 = _run(meteor_upload_api, url, day_dir, ids)
+        if uploaded3:
+            failures.append("already uploaded candidates were sent again")
+        server.shutdown()
+
+        # 3. Server ohne Sammel-Upload -> Einzel-Upload
+        server, store_single = start_server(0, batch=False)
+        url = "http://127.0.0.1:%d/meteor_upload" % server.server_port
+        cfg.METEOR_BATCH_UPLOAD_URL = url
+        day_dir = os.path.join(tmp, "20260102")
+        ids_single = _make_day_dir(day_dir, count)
+        uploaded4, _callbacks4, t4 = _run(meteor_upload_api, url, day_dir, ids_single)
+        if sorted(uploaded4) != sorted(ids_single) or store_single.requests["meteor"] != count:
+            failures.append("fallback to single uploads failed")
+        server.shutdown()
+
+    print()
+    print("Meteor batch upload self test (%d candidates, batch size %d)" % (count, batch_size))
+    print("  run 1 (every 4th rejected) : %d/%d acked, %d batch requests, %.2f s"
+          % (len(uploaded1), count, batches1, t1))
+    print("  run 2 (retry rejected)     : %d/%d acked, %d batch requests, %.2f s"
+          % (len(uploaded2), len(rest), batches2, t2))
+    print("  run 3 (nothing pending)    : %d sent" % len(uploaded3))
+    print("  fallback (no batch support): %d/%d acked, %d single requests, %.2f s"
+          % (len(uploaded4), count, store_single.requests["meteor"], t4))
+    for failure in failures:
+        print("  FAIL: %s" % failure)
+    return 0 if not failures else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meteor batch upload stand-in server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--reject-every", type=int, default=0, help="Reject every N-th candidate")
+    parser.add_argument("--no-batch", action="store_true", help="Answer batch requests with 404")
+    parser.add_argument("--selftest", action="store_true")
+    parser.add_argument("--candidates", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.selftest:
+        return selftest(args.candidates, args.batch_size)
+
+    server, _store = start_server(args.port, args.reject_every, not args.no_batch)
+    print("Meteor upload server on http://127.0.0.1:%d/meteor_upload" % server.server_port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera meteor detector benchmark
+
+Runs the meteor detector building blocks on synthetic data and prints
+timings. No camera, network or config.py is needed: a minimal config
+module is injected before askutils.meteor.detector is imported.
+
+Benchmarks:
+
+- connected-component labelling: run-length union-find vs. pixel BFS
+  on synthetic threshold masks (noise + streaks). Both results must be
+  identical. "label" is the pure labelling time, "runs" includes
+  building the component dicts. "fit" is the vectorized line-fit
+  stage (second moments per label) on top of labelling.
+- frame decoding: RGB decode + grayscale per comparison (old behaviour,
+  two decodes per pair) vs. the sliding-window frame cache.
+- two-stage mode: frames/second of the JPEG draft prefilter (stage 1,
+  scale 2/4/8) and of the full-resolution path (stage 2).
+- background model: thresholded pixels, components and time per frame
+  on a twinkling star field with and without the star/hot-pixel mask.
+- candidate export: _save_candidate re-opening the source JPEGs vs.
+  reusing the decoded frames from the frame cache.
+
+Usage:
+    cd ~/AllSkyKamera
+    python3 tests/meteor_benchmark.py [--size 1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import types
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def _install_config(**values):
+    cfg = types.ModuleType("askutils.config")
+    for key, value in values.items():
+        setattr(cfg, key, value)
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+    return cfg
+
+
+_install_config(KAMERA_ID="BENCH")
+
+from askutils.meteor import detector  # noqa: E402
+
+
+# --------------------------------------------------------------------
+# Synthetic data
+# --------------------------------------------------------------------
+
+def make_mask(size, noise_density, streaks, seed=0):
+    rng = np.random.default_rng(seed)
+    mask = np.where(rng.random((size, size)) < noise_density, 255, 0).astype(np.uint8)
+
+    for _ in range(streaks):
+        x0, y0 = rng.integers(0, size, 2)
+        angle = rng.uniform(0, np.pi)
+        length = rng.integers(size // 20 + 5, size // 5 + 10)
+        t = np.arange(length)
+        xs = np.clip((x0 + t * np.cos(angle)).astype(int), 0, size - 1)
+        ys = np.clip((y0 + t * np.sin(angle)).astype(int), 0, size - 1)
+        mask[ys, xs] = 255
+        mask[np.clip(ys + 1, 0, size - 1), xs] = 255
+
+    return mask
+
+
+def _timed(func, *args, repeat=1):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return result, best
+
+
+# --------------------------------------------------------------------
+# Benchmarks
+# --------------------------------------------------------------------
+
+def bench_labelling(size, repeat):
+    print("Connected components (%dx%d)" % (size, size))
+    print("  %-10s %10s %10s %10s %10s %10s %8s %s" % (
+        "noise", "pixels", "label [s]", "runs [s]", "fit [s]", "bfs [s]", "speedup", "equal"
+    ))
+
+    for density in (0.0005, 0.005, 0.02, 0.05):
+        mask = make_mask(size, density, streaks=10)
+        pixels = int(np.count_nonzero(mask))
+
+        runs, t_label = _timed(detector._label_runs, mask, repeat=repeat)
+        fast, t_fast = _timed(detector._find_connected_components, mask, False, repeat=repeat)
+        _, t_fit = _timed(detector._line_fit_runs, *runs, repeat=repeat)
+        ref, t_ref = _timed(detector._find_connected_components_bfs, mask, repeat=1)
+
+        speedup = (t_ref / t_fast) if t_fast > 0 else float("inf")
+        print("  %-10s %10d %10.3f %10.3f %10.3f %10.3f %7.1fx %s" % (
+            density, pixels, t_label, t_fast, t_fit, t_ref, speedup, "ok" if fast == ref else "MISMATCH"
+        ))
+    print()
+
+
+def make_frames(directory, count, size, seed=0):
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        img = rng.integers(0, 40, (size, size, 3), dtype=np.uint8)
+        path = os.path.join(directory, "image-20260101%06d.jpg" % (i * 100))
+        Image.fromarray(img).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def bench_frame_cache(size, frames):
+    import tempfile
+
+    print("Frame decoding (%d frames, %dx%d)" % (frames, size, size))
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_frames(tmp, frames, size)
+
+        t0 = time.perf_counter()
+        for i in range(1, len(paths)):
+            detector._rgb_to_gray(detector._load_image_rgb(paths[i - 1])).astype(np.int16)
+            detector._rgb_to_gray(detector._load_image_rgb(paths[i])).astype(np.int16)
+        t_old = time.perf_counter() - t0
+
+        cache = detector._FrameCache(capacity=2)
+        t0 = time.perf_counter()
+        for i in range(1, len(paths)):
+            cache.get_gray(paths[i - 1])
+            cache.get_gray(paths[i])
+        t_new = time.perf_counter() - t0
+
+    stats = cache.stats()
+    print("  rgb per pair : %8.3f s (%d decodes)" % (t_old, 2 * (len(paths) - 1)))
+    print("  frame cache  : %8.3f s (%d decodes, %d hits)" % (t_new, stats["misses"], stats["hits"]))
+    print()
+
+
+def bench_prefilter(size, frames):
+    import tempfile
+
+    print("Two-stage detection (%d frames, %dx%d)" % (frames, size, size))
+    threshold = 80
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_frames(tmp, frames, size)
+
+        cache = detector._FrameCache(capacity=2)
+        mask = None
+        t0 = time.perf_counter()
+        for i in range(1, len(paths)):
+            g1 = cache.get_gray(paths[i - 1])
+            g2 = cache.get_gray(paths[i])
+            if mask is None:
+                mask = detector._create_circle_mask(*g1.shape)
+            _, _, thresh = detector._detect_positive_motion_gray(g1, g2, threshold, mask)
+            detector._filter_line_components(detector._find_connected_components(thresh))
+        t_full = time.perf_counter() - t0
+        print("  stage 2 full      : %8.1f frames/s" % ((len(paths) - 1) / t_full))
+
+        for scale in (2, 4, 8):
+            cache = detector._FrameCache(capacity=2, scale=scale)
+            mask = None
+            t0 = time.perf_counter()
+            for i in range(1, len(paths)):
+                g1 = cache.get_gray(paths[i - 1])
+                g2 = cache.get_gray(paths[i])
+                if mask is None:
+                    mask = detector._create_circle_mask(*g1.shape)
+                detector._detect_positive_motion_gray(g1, g2, threshold // 2, mask)
+            t_pre = time.perf_counter() - t0
+            print("  stage 1 scale 1/%d : %8.1f frames/s" % (scale, (len(paths) - 1) / t_pre))
+    print()
+
+
+def make_star_frames(size, count, stars=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    ys = rng.integers(0, size - 1, stars)
+    xs = rng.integers(0, size - 1, stars)
+    frames = []
+    for _ in range(count):
+        img = rng.integers(10, 30, (size, size)).astype(np.int16)
+        level = rng.integers(60, 255, stars)
+        for dy in (0, 1):
+            for dx in (0, 1):
+                img[ys + dy, xs + dx] = level
+        frames.append(img)
+    return frames
+
+
+def bench_background(size, frames):
+    import tempfile
+
+    print("Background model (%d frames, %dx%d, twinkling stars)" % (frames, size, size))
+    gray = make_star_frames(size, frames)
+    mask = detector._create_circle_mask(size, size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, use_model in (("off", False), ("on", True)):
+            model = detector._BackgroundModel(os.path.join(tmp, "background.npy")) if use_model else None
+            pixels = 0
+            components = 0
+            t0 = time.perf_counter()
+            for i in range(1, len(gray)):
+                keep = model.prepare(gray[i - 1]) if model is not None else None
+                count, _, thresh = detector._detect_positive_motion_gray(gray[i - 1], gray[i], 80, mask, keep)
+                components += len(detector._find_connected_components(thresh))
+                pixels += count
+                if model is not None:
+                    model.update(gray[i])
+            dt = (time.perf_counter() - t0) / (len(gray) - 1)
+            if model is not None:
+                model.close()
+            print("  mask %-3s : %8d px/frame %8d comps/frame %8.1f ms/frame" % (
+                label, pixels // (len(gray) - 1), components // (len(gray) - 1), dt * 1000.0
+            ))
+    print()
+
+
+def bench_candidate_save(size, repeat):
+    import tempfile
+
+    print("Candidate export (%dx%d)" % (size, size))
+    with tempfile.TemporaryDirectory() as tmp:
+        detector.config.METEOR_OUTPUT_DIR = os.path.join(tmp, "out")
+        prev_path, curr_path = make_frames(tmp, 2, size)
+        diff = make_mask(size, 0.001, streaks=3)
+        components = detector._filter_line_components(detector._find_connected_components(diff))
+
+        cache = detector._FrameCache(capacity=2, keep_rgb=True)
+        cache.get_gray(prev_path)
+        cache.get_gray(curr_path)
+
+        for label, prev_img, curr_img in (
+            ("re-decode", None, None),
+            ("reuse", cache.get_rgb(prev_path), cache.get_rgb(curr_path)),
+        ):
+            best = None
+            for _ in range(repeat):
+                _, save_ms = detector._save_candidate(
+                    "20260101", prev_path, curr_path, diff, int(np.count_nonzero(diff)), 0.0,
+                    components, prev_img=prev_img, curr_img=curr_img
+                )
+                best = save_ms if best is None else min(best, save_ms)
+            print("  %-10s : %8.1f ms/candidate" % (label, best))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meteor detector benchmark")
+    parser.add_argument("--size", type=int, default=1000, help="Mask edge length in pixels")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions for the fast path")
+    parser.add_argument("--frames", type=int, default=10, help="Number of synthetic frames")
+    args = parser.parse_args()
+
+    bench_labelling(args.size, args.repeat)
+    bench_frame_cache(args.size, args.frames)
+    bench_prefilter(args.size, args.frames)
+    bench_background(args.size, args.frames)
+    bench_candidate_save(args.size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
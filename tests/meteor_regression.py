@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera meteor detector regression run
+
+Generates synthetic all-sky night sequences and runs the full
+_detect_candidates_for_day path on them, offline, against a temporary
+ALLSKY_PATH / METEOR_OUTPUT_DIR. No camera, network or config.py is
+needed: a minimal config module is injected before
+askutils.meteor.detector is imported.
+
+Each synthetic frame contains:
+
+- a circular sky with vignetting, read noise and a slowly rotating,
+  twinkling star field
+- fixed hot pixels
+- drifting, low-frequency clouds
+- injected meteor streaks (ground truth, random angle/length/brightness)
+- aircraft: a blinking dotted track that continues over several frames
+
+Frame generation and detection run in separate spawned processes, so
+the reported peak RSS belongs to the detection run only (largest of the
+main process and its pool workers). Reported per resolution:
+
+- frames/s for the full detection path (decode, diff, labelling,
+  filter, candidate export, index)
+- peak RSS of the detection process
+- recall: injected meteors found (candidate on the meteor frame whose
+  best line overlaps the streak)
+- precision: share of candidates that are injected meteors (aircraft,
+  stars and clouds count as false positives)
+
+With --min-recall / --min-precision the script exits non-zero if a run
+falls below the limit, so it can be used as a regression gate.
+
+Usage:
+    cd ~/AllSkyKamera
+    python3 tests/meteor_regression.py [--sizes 640,1280] [--frames 40]
+    python3 tests/meteor_regression.py --set METEOR_PREFILTER_SCALE=4 --set METEOR_BACKGROUND_ENABLE=True
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+DAY = "20260101"
+
+
+def _install_config(**values):
+    cfg = types.ModuleType("askutils.config")
+    for key, value in values.items():
+        setattr(cfg, key, value)
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+    return cfg
+
+
+# --------------------------------------------------------------------
+# Synthetic sky
+# --------------------------------------------------------------------
+
+def _smooth_field(rng, size, cells):
+    # coarse random grid, bilinear upscaled = soft cloud structure
+    grid = rng.random((cells + 1, cells + 1))
+    pos = np.linspace(0, cells, size, endpoint=False)
+    i = pos.astype(int)
+    f = pos - i
+    rows = grid[i] * (1 - f)[:, None] + grid[i + 1] * f[:, None]
+    return rows[:, i] * (1 - f)[None, :] + rows[:, i + 1] * f[None, :]
+
+
+def _draw_line(img, x0, y0, x1, y1, width, value):
+    h, w = img.shape
+    length = int(np.hypot(x1 - x0, y1 - y0)) + 1
+    t = np.linspace(0.0, 1.0, length)
+    xs = x0 + (x1 - x0) * t
+    ys = y0 + (y1 - y0) * t
+    for dx in range(width):
+        for dy in range(width):
+            xi = np.clip((xs + dx - width // 2).astype(int), 0, w - 1)
+            yi = np.clip((ys + dy - width // 2).astype(int), 0, h - 1)
+            img[yi, xi] = np.maximum(img[yi, xi], value)
+
+
+class SkySequence:
+
+    def __init__(self, size, frames, meteors, aircraft, seed=0):
+        self.size = size
+        self.frames = frames
+        self.rng = np.random.default_rng(seed)
+
+        c = (size - 1) / 2.0
+        yy, xx = np.mgrid[0:size, 0:size]
+        r = np.hypot(xx - c, yy - c) / (size / 2.0)
+        self.sky = r <= 1.0
+        self.vignette = np.clip(1.0 - 0.35 * r * r, 0.0, 1.0)
+
+        n_stars = int(3000 * (size / 1000.0) ** 2)
+        self.star_r = np.sqrt(self.rng.random(n_stars)) * size * 0.48
+        self.star_a = self.rng.uniform(0, 2 * np.pi, n_stars)
+        self.star_level = self.rng.uniform(40, 230, n_stars)
+
+        n_hot = max(10, int(60 * (size / 1000.0) ** 2))
+        self.hot_y = self.rng.integers(0, size, n_hot)
+        self.hot_x = self.rng.integers(0, size, n_hot)
+
+        self.clouds = _smooth_field(self.rng, size * 2, 6)
+
+        # ground truth: frame index -> streak end points
+        self.meteors = {}
+        candidates = list(range(2, frames))
+        self.rng.shuffle(candidates)
+        for idx in sorted(candidates[:meteors]):
+            self.meteors[idx] = self._make_meteor()
+
+        self.aircraft = []
+        for _ in range(aircraft):
+            start = int(self.rng.integers(1, max(2, frames - 4)))
+            angle = self.rng.uniform(0, 2 * np.pi)
+            x = self.rng.uniform(0.25, 0.75) * size
+            y = self.rng.uniform(0.25, 0.75) * size
+            self.aircraft.append({"start": start, "span": 4, "x": x, "y": y, "angle": angle})
+
+    def _make_meteor(self):
+        size = self.size
+        length = self.rng.uniform(0.08, 0.3) * size
+        angle = self.rng.uniform(0, np.pi)
+        cx, cy = self.rng.uniform(0.3, 0.7, 2) * size
+        dx = np.cos(angle) * length / 2.0
+        dy = np.sin(angle) * length / 2.0
+        return {
+            "x0": cx - dx, "y0": cy - dy, "x1": cx + dx, "y1": cy + dy,
+            "width": max(2, size // 500),
+            "level": float(self.rng.uniform(150, 255)),
+        }
+
+    def frame(self, idx):
+        size = self.size
+        img = 15.0 + self.rng.normal(0.0, 3.0, (size, size))
+
+        shift = int(idx * size * 0.02) % size
+        clouds = self.clouds[shift:shift + size, shift // 2:shift // 2 + size]
+        img += 30.0 * np.clip(clouds - 0.4, 0.0, None)
+
+        angle = self.star_a + idx * 0.0044
+        c = (size - 1) / 2.0
+        sx = np.clip((c + self.star_r * np.cos(angle)).astype(int), 0, size - 2)
+        sy = np.clip((c + self.star_r * np.sin(angle)).astype(int), 0, size - 2)
+        level = self.star_level * self.rng.uniform(0.7, 1.0, self.star_level.size)
+        for oy in (0, 1):
+            for ox in (0, 1):
+                img[sy + oy, sx + ox] = np.maximum(img[sy + oy, sx + ox], level)
+
+        meteor = self.meteors.get(idx)
+        if meteor is not None:
+            _draw_line(img, meteor["x0"], meteor["y0"], meteor["x1"], meteor["y1"],
+                       meteor["width"], meteor["level"])
+
+        for plane in self.aircraft:
+            step = idx - plane["start"]
+            if not 0 <= step < plane["span"]:
+                continue
+            seg = size * 0.05
+            x0 = plane["x"] + np.cos(plane["angle"]) * seg * step
+            y0 = plane["y"] + np.sin(plane["angle"]) * seg * step
+            for k in range(0, 10, 2):
+                xa = x0 + np.cos(plane["angle"]) * seg * k / 10.0
+                ya = y0 + np.sin(plane["angle"]) * seg * k / 10.0
+                xb = x0 + np.cos(plane["angle"]) * seg * (k + 1) / 10.0
+                yb = y0 + np.sin(plane["angle"]) * seg * (k + 1) / 10.0
+                _draw_line(img, xa, ya, xb, yb, 2, 220.0)
+
+        img *= self.vignette
+        img[~self.sky] = 0.0
+        img[self.hot_y, self.hot_x] = 255.0
+        return np.clip(img, 0, 255).astype(np.uint8)
+
+    def write(self, directory):
+        from PIL import Image
+
+        os.makedirs(directory, exist_ok=True)
+        names = []
+        for idx in range(self.frames):
+            gray = self.frame(idx)
+            rgb = np.repeat(gray[:, :, None], 3, axis=2)
+            name = "image-%s%02d%02d00.jpg" % (DAY, 1 + idx // 60, idx % 60)
+            Image.fromarray(rgb).save(os.path.join(directory, name), quality=90)
+            names.append(name)
+        return names
+
+
+# --------------------------------------------------------------------
+# Scoring
+# --------------------------------------------------------------------
+
+def _overlaps(component, meteor, margin):
+    x_lo = min(meteor["x0"], meteor["x1"]) - margin
+    x_hi = max(meteor["x0"], meteor["x1"]) + margin
+    y_lo = min(meteor["y0"], meteor["y1"]) - margin
+    y_hi = max(meteor["y0"], meteor["y1"]) + margin
+    return not (
+        component["max_x"] < x_lo or component["min_x"] > x_hi or
+        component["max_y"] < y_lo or component["min_y"] > y_hi
+    )
+
+
+def score(candidates, meteors_by_name, margin):
+    found = set()
+    true_pos = 0
+    for data in candidates:
+        meteor = meteors_by_name.get(data.get("source_current_image"))
+        best = data.get("best_line")
+        if meteor is not None and best and _overlaps(best, meteor, margin):
+            true_pos += 1
+            found.add(data.get("source_current_image"))
+
+    recall = len(found) / len(meteors_by_name) if meteors_by_name else None
+    precision = true_pos / len(candidates) if candidates else None
+    return recall, precision, true_pos
+
+
+def _load_candidates(out_dir):
+    day_dir = os.path.join(out_dir, DAY)
+    result = []
+    if not os.path.isdir(day_dir):
+        return result
+    for name in sorted(os.listdir(day_dir)):
+        path = os.path.join(day_dir, name, "candidate.json")
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                result.append(json.load(f))
+    return result
+
+
+# --------------------------------------------------------------------
+# Runs (one spawned process per step, so ru_maxrss is per run)
+# --------------------------------------------------------------------
+
+def _generate(tmp, size, frames, meteors, aircraft, seed, queue):
+    seq = SkySequence(size, frames, meteors, aircraft, seed=seed)
+    names = seq.write(os.path.join(tmp, "images", DAY))
+    queue.put({names[idx]: m for idx, m in seq.meteors.items()})
+
+
+def _detect(tmp, size, overrides, queue):
+    values = {
+        "KAMERA_ID": "BENCH",
+        "ALLSKY_PATH": tmp,
+        "IMAGE_BASE_PATH": "images",
+        "METEOR_ENABLE": True,
+        "METEOR_OUTPUT_DIR": os.path.join(tmp, "meteordetect"),
+        "METEOR_STATE_FILE": os.path.join(tmp, "meteordetect", "meteor_state.json"),
+        "METEOR_INITIAL_LOOKBACK_MINUTES": 0,
+        # defaults are tuned for ~3000 px frames
+        "METEOR_MIN_PIXELS": max(60, size // 8),
+    }
+    values.update(overrides)
+    _install_config(**values)
+
+    from askutils.meteor import detector
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = detector._detect_candidates_for_day(DAY)
+    elapsed = time.perf_counter() - t0
+    # pool workers (METEOR_WORKERS > 1) are reported through RUSAGE_CHILDREN
+    rss_peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+    queue.put({
+        "comparisons": result.get("comparisons", 0),
+        "seconds": elapsed,
+        "rss_before_mb": rss_before / 1024.0,
+        "rss_peak_mb": rss_peak / 1024.0,
+    })
+
+
+def _in_process(ctx, target, *args):
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=args + (queue,))
+    proc.start()
+    try:
+        res = queue.get(timeout=3600)
+    except Exception:
+        res = None
+    proc.join()
+    return res
+
+
+def run_size(ctx, size, frames, meteors, aircraft, overrides, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        meteors_by_name = _in_process(ctx, _generate, tmp, size, frames, meteors, aircraft, seed)
+        if meteors_by_name is None:
+            return None
+
+        res = _in_process(ctx, _detect, tmp, size, overrides)
+        if res is None:
+            return None
+
+        candidates = _load_candidates(os.path.join(tmp, "meteordetect"))
+        recall, precision, true_pos = score(candidates, meteors_by_name, margin=max(4, size // 100))
+
+    res.update({
+        "size": size,
+        "fps": res["comparisons"] / res["seconds"] if res["seconds"] > 0 else 0.0,
+        "meteors": len(meteors_by_name),
+        "candidates": len(candidates),
+        "true_positives": true_pos,
+        "recall": recall,
+        "precision": precision,
+    })
+    return res
+
+
+def _parse_overrides(items):
+    overrides = {}
+    for item in items or []:
+        key, _, raw = item.partition("=")
+        try:
+            value = json.loads(raw.replace("True", "true").replace("False", "false"))
+        except ValueError:
+            value = raw
+        overrides[key.strip()] = value
+    return overrides
+
+
+def _fmt(value):
+    return "   n/a" if value is None else "%6.2f" % value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meteor detector regression run")
+    parser.add_argument("--sizes", default="640,1280", help="Comma separated frame edge lengths")
+    parser.add_argument("--frames", type=int, default=40, help="Frames per sequence")
+    parser.add_argument("--meteors", type=int, default=8, help="Injected meteors per sequence")
+    parser.add_argument("--aircraft", type=int, default=1, help="Aircraft tracks per sequence")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Config override, repeatable")
+    parser.add_argument("--min-recall", type=float, default=None)
+    parser.add_argument("--min-precision", type=float, default=None)
+    args = parser.parse_args()
+
+    overrides = _parse_overrides(args.set)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    ctx = multiprocessing.get_context("spawn")
+
+    print("Meteor regression (%d frames, %d meteors, %d aircraft)" % (args.frames, args.meteors, args.aircraft))
+    if overrides:
+        print("  config: %s" % overrides)
+    print("  %-6s %8s %10s %10s %8s %8s %9s %6s" % (
+        "size", "frames/s", "rss [MB]", "peak [MB]", "recall", "precis.", "cand/tp", "ok"
+    ))
+
+    failed = False
+    for size in sizes:
+        res = run_size(ctx, size, args.frames, args.meteors, args.aircraft, overrides, args.seed)
+
+        if res is None:
+            print("  %-6d  run failed" % size)
+            failed = True
+            continue
+
+        ok = True
+        if args.min_recall is not None and (res["recall"] or 0.0) < args.min_recall:
+            ok = False
+        if args.min_precision is not None and (res["precision"] or 0.0) < args.min_precision:
+            ok = False
+        failed = failed or not ok
+
+        print("  %-6d %8.1f %10.1f %10.1f %8s %8s %4d/%-4d %6s" % (
+            size, res["fps"], res["rss_before_mb"], res["rss_peak_mb"],
+            _fmt(res["recall"]), _fmt(res["precision"]),
+            res["candidates"], res["true_positives"], "ok" if ok else "FAIL",
+        ))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera metrics daemon benchmark
+
+Compares the time a caller spends in influx_writer.log_metric() when
+writing directly to Influx (one write per call, as the cron loggers did)
+with handing the point to the local metrics daemon over its Unix
+datagram socket (INFLUX_TRANSPORT = "socket").
+
+Influx is replaced by the stand-in from tests/influx_spool_server.py,
+so no network or config.py is needed:
+
+    cd ~/AllSkyKamera
+    python3 tests/metrics_daemon_benchmark.py [--points 300]
+
+Points that do not fit into the kernel socket queue fall back to the
+direct path; the number of fallbacks is printed. The run also checks
+that every point sent over the socket reaches the stand-in, and that
+points of the same series and timestamp are merged.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (PROJECT_ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from influx_spool_server import start_server  # noqa: E402
+
+
+def _install_config(**values):
+    cfg = types.ModuleType("askutils.config")
+    for key, value in values.items():
+        setattr(cfg, key, value)
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+    return cfg
+
+
+def _measure(log_metric, count, name, interval):
+    timings = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        log_metric(name, {"value": float(i), "temp": 20.0 + i % 7}, tags={"host": "host1"})
+        timings.append(time.perf_counter() - t0)
+        time.sleep(interval)
+    return timings
+
+
+def _fmt(timings):
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return "median %8.1f us   p95 %8.1f us" % (statistics.median(timings) * 1e6, p95 * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics daemon benchmark")
+    parser.add_argument("--points", type=int, default=300)
+    parser.add_argument("--interval-ms", type=float, default=1.0,
+                        help="Pause between points (the socket queue of the kernel is short)")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server, store = start_server(0)
+        cfg = _install_config(
+            KAMERA_ID="TEST",
+            INFLUX_URL="http://127.0.0.1:%d" % server.server_port,
+            INFLUX_TOKEN="token",
+            INFLUX_ORG="org",
+            INFLUX_BUCKET="bucket",
+            INFLUX_SPOOL_FILE=os.path.join(tmp, "influx_spool.lp"),
+            METRICS_SOCKET=os.path.join(tmp, "metrics.sock"),
+            METRICS_STATUS_FILE=os.path.join(tmp, "metrics_daemon.json"),
+            METRICS_FLUSH_SECONDS=0.5,
+            INFLUX_FLUSH_SECONDS=60,
+        )
+
+        from askutils.utils import influx_writer, logger, metrics_daemon
+        logger.log = influx_writer.log = metrics_daemon.log = lambda _msg: None
+
+        # 1. direkt, ein Write pro Aufruf (bisheriges Verhalten)
+        cfg.INFLUX_TRANSPORT = "direct"
+        cfg.INFLUX_BATCH_SIZE = 1
+        direct = _measure(influx_writer.log_metric, args.points, "direct", args.interval_ms / 1000.0)
+
+        # 2. ueber den Sammeldienst
+        collector = metrics_daemon.MetricsCollector()
+        thread = threading.Thread(target=collector.run, daemon=True)
+        thread.start()
+        while not os.path.exists(cfg.METRICS_SOCKET):
+            time.sleep(0.01)
+
+        cfg.INFLUX_BATCH_SIZE = 500
+        cfg.INFLUX_TRANSPORT = "socket"
+        via_socket = _measure(influx_writer.log_metric, args.points, "socket", args.interval_ms / 1000.0)
+
+        # Zwei JSON-Punkte derselben Serie und Zeit -> eine Zeile
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        for fields in ({"a": 1.0}, {"b": 2.0}):
+            point = {"measurement": "merged", "tags": {"host": "host1"}, "fields": fields, "time": 1700000000000000000}
+            sender.sendto(json.dumps(point).encode(), cfg.METRICS_SOCKET)
+        sender.sendto(b"not line protocol", cfg.METRICS_SOCKET)
+        sender.close()
+
+        time.sleep(0.2)
+        collector.request_stop()
+        thread.join(5)
+        influx_writer.flush()
+
+        writer_stats = influx_writer.stats()
+        counts = store.measurements()
+        merged = [line for line in store.lines if line.startswith("merged")]
+        if counts.get("direct") != args.points:
+            failures.append("direct points missing at server")
+        if counts.get("socket") != args.points:
+            failures.append("socket points missing at server (%s)" % counts.get("socket"))
+        if len(merged) != 1 or "a=1" not in merged[0] or "b=2" not in merged[0]:
+            failures.append("points of the same series were not merged: %s" % merged)
+        if collector.counts["invalid"] != 1:
+            failures.append("invalid datagram not counted")
+        server.shutdown()
+
+    print()
+    print("log_metric() caller time, %d points" % args.points)
+    print("  direct (1 write per call) : %s" % _fmt(direct))
+    print("  socket (metrics daemon)   : %s" % _fmt(via_socket))
+    print("  socket sent / fallback    : %d / %d" % (writer_stats["socket_sent"], writer_stats["socket_fallback"]))
+    print("  daemon counts             : %s" % collector.counts)
+    print("  Influx requests total     : %d" % store.requests)
+    for failure in failures:
+        print("  FAIL: %s" % failure)
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera multipart upload memory benchmark
+
+Posts a video-sized file plus a small thumbnail to a local HTTP server,
+once with requests' own files= encoding (whole body built in memory) and
+once with askutils.utils.multipart_stream.MultipartStream (body read in
+blocks while sending). Each upload runs in a fresh process so the peak
+RSS of that process is the number that matters on a 1 GB Pi.
+
+A small upload is also parsed on the server side and compared byte by
+byte with the source files to check the encoding.
+
+No camera, network or config.py is needed: a minimal config module is
+injected before the askutils modules are imported.
+
+Usage:
+    cd ~/AllSkyKamera
+    python3 tests/multipart_stream_benchmark.py [--sizes 16,64,256]
+"""
+
+import argparse
+import email.parser
+import hashlib
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def _install_config(**values):
+    cfg = types.ModuleType("askutils.config")
+    for key, value in values.items():
+        setattr(cfg, key, value)
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+    return cfg
+
+
+class _Sink(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    keep_body = False
+    last_body = None
+
+    def log_message(self, *_args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        remaining = length
+        kept = []
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            remaining -= len(block)
+            if _Sink.keep_body:
+                kept.append(block)
+        if _Sink.keep_body:
+            _Sink.last_body = (self.headers.get("Content-Type"), b"".join(kept))
+
+        body = b'{"ok": true}'
+        self.send_response(200 if remaining == 0 else 400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _client(mode, url, video, thumb, queue):
+    _install_config(KAMERA_ID="BENCH", HTTP_LOG_TIMING=False)
+    from askutils.utils import http_client
+    from askutils.utils.multipart_stream import MultipartStream
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fields = {"date": "20260101", "asset": "video", "publish_last": "1"}
+    t0 = time.perf_counter()
+
+    if mode == "requests":
+        with open(video, "rb") as fv, open(thumb, "rb") as ft:
+            r = http_client.post(url, data=fields, files={
+                "file": ("video.mp4", fv, "video/mp4"),
+                "thumb": ("thumb.jpg", ft, "image/jpeg"),
+            })
+    else:
+        calls = []
+        body = MultipartStream(fields, {
+            "file": ("video.mp4", video, "video/mp4"),
+            "thumb": ("thumb.jpg", thumb, "image/jpeg"),
+        }, progress=lambda sent, total: calls.append(sent))
+        with body:
+            r = http_client.post(url, data=body, headers={"Content-Type": body.content_type})
+
+    elapsed = time.perf_counter() - t0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((r.status_code, elapsed, base_rss / 1024.0, peak_rss / 1024.0))
+
+
+def _run(mode, url, video, thumb):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_client, args=(mode, url, video, thumb, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def _write_random(path, size_mb):
+    with open(path, "wb") as f:
+        for _ in range(int(size_mb)):
+            f.write(os.urandom(1024 * 1024))
+
+
+def _check_encoding(url, tmp):
+    _install_config(KAMERA_ID="BENCH", HTTP_LOG_TIMING=False)
+    from askutils.utils import http_client
+    from askutils.utils.multipart_stream import MultipartStream
+
+    video = os.path.join(tmp, "check.mp4")
+    thumb = os.path.join(tmp, "check.jpg")
+    _write_random(video, 3)
+    with open(thumb, "wb") as f:
+        f.write(os.urandom(5000))
+
+    fields = {"date": "20260101", "asset": 'vi"deo', "kamera": "ASK001"}
+    _Sink.keep_body = True
+    body = MultipartStream(fields, {
+        "file": ("check.mp4", video, "video/mp4"),
+        "thumb": ("thumb.jpg", thumb, "image/jpeg"),
+    })
+    with body:
+        http_client.post(url, data=body, headers={"Content-Type": body.content_type})
+    _Sink.keep_body = False
+
+    content_type, raw = _Sink.last_body
+    msg = email.parser.BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + raw)
+    parts = {p.get_param("name", header="content-disposition"): p for p in msg.get_payload()}
+
+    ok = len(raw) == len(body)
+    ok = ok and {k: parts[k].get_payload(decode=True).decode() for k in fields} == fields
+    for name, path in (("file", video), ("thumb", thumb)):
+        with open(path, "rb") as f:
+            ok = ok and hashlib.sha256(parts[name].get_payload(decode=True)).digest() == hashlib.sha256(f.read()).digest()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multipart upload memory benchmark")
+    parser.add_argument("--sizes", default="16,64,256", help="Video sizes in MB, comma separated")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Sink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/nightly_upload.php" % server.server_port
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Encoding check (fields + 2 files parsed on server): %s" % ("ok" if _check_encoding(url, tmp) else "FAILED"))
+        print()
+        print("  %8s %-9s %6s %9s %13s %13s" % ("size MB", "mode", "status", "time [s]", "base RSS MB", "peak RSS MB"))
+
+        thumb = os.path.join(tmp, "thumb.jpg")
+        with open(thumb, "wb") as f:
+            f.write(os.urandom(200 * 1024))
+
+        for size_mb in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            video = os.path.join(tmp, "video.mp4")
+            _write_random(video, size_mb)
+            for mode in ("requests", "stream"):
+                status, elapsed, base_rss, peak_rss = _run(mode, url, video, thumb)
+                print("  %8d %-9s %6d %9.2f %13.1f %13.1f" % (size_mb, mode, status, elapsed, base_rss, peak_rss))
+            os.remove(video)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera sensor CPU benchmark: cron jobs vs. sensor daemon
+
+Cron mode starts every enabled sensor logger as its own process
+("python3 -m scripts.<sensor>_logger", exactly like the crontab entries)
+a few times and measures the CPU time of the child processes. Scaled
+with each sensor's *_LOG_INTERVAL_MIN this gives CPU seconds per hour.
+
+The sensor daemon measures itself: run it for a while
+(python3 -m scripts.run_sensor_daemon, SENSOR_DAEMON_ENABLED = True)
+and this script reads cpu_seconds_per_hour from tmp/sensor_daemon.json.
+
+Run on the Pi with the sensors attached:
+    cd ~/AllSkyKamera
+    python3 tests/sensor_cpu_benchmark.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from askutils.sensors import scheduler  # noqa: E402
+
+
+def _children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure_cron(job, runs):
+    cpu = []
+    wall = []
+    for _ in range(runs):
+        c0 = _children_cpu()
+        t0 = time.monotonic()
+        subprocess.run(
+            [sys.executable, "-m", job.module_name],
+            cwd=PROJECT_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wall.append(time.monotonic() - t0)
+        cpu.append(_children_cpu() - c0)
+    return sum(cpu) / len(cpu), sum(wall) / len(wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor CPU benchmark (cron vs. daemon)")
+    parser.add_argument("--runs", type=int, default=3, help="Cron-style runs per sensor")
+    args = parser.parse_args()
+
+    jobs = scheduler.build_jobs()
+    if not jobs:
+        print("No sensors enabled in config.py.")
+        return 1
+
+    print()
+    print("Cron (one process per sensor and interval)")
+    print("  %-10s %8s %10s %10s %12s" % ("sensor", "every", "cpu/run", "wall/run", "cpu s/hour"))
+    total = 0.0
+    for job in jobs:
+        cpu, wall = measure_cron(job, max(1, args.runs))
+        per_hour = cpu * 60.0 / job.interval_min
+        total += per_hour
+        print("  %-10s %6d m %9.3fs %9.2fs %12.1f" % (job.name, job.interval_min, cpu, wall, per_hour))
+    print("  %-10s %44.1f" % ("total", total))
+
+    status_path = scheduler._get_status_path()
+    print()
+    print("Sensor daemon (%s)" % status_path)
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except Exception:
+        print("  no status file - start scripts/run_sensor_daemon.py for at least an hour first")
+        return 0
+
+    print("  uptime %.0f s, cpu %.1f s -> %.1f cpu s/hour" % (
+        status["uptime_seconds"], status["cpu_seconds"], status["cpu_seconds_per_hour"] or 0.0
+    ))
+    for name, job in sorted(status.get("jobs", {}).items()):
+        runs = job.get("runs") or 0
+        per_run = job["cpu_seconds"] / runs if runs else 0.0
+        print("  %-10s runs %5d  cpu/run %.3fs  errors %d" % (name, runs, per_run, job.get("errors", 0)))
+    if status.get("cpu_seconds_per_hour"):
+        print()
+        print("  cron / daemon: %.1fx" % (total / status["cpu_seconds_per_hour"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
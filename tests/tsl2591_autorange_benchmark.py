@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+AllSkyKamera TSL2591 autorange benchmark
+
+Compares the exhaustive autorange (TSL2591_AUTORANGE_MODE = "sweep",
+all 24 gain x integration combinations) with the predictive autorange
+(last setting from tmp/tsl2591_autorange.json, linear prediction,
+bounded binary search) over a simulated night: dusk, dark sky, a passing
+cloud lit by the town and dawn.
+
+The sensor and the clock are simulated (board, busio and adafruit_tsl2591
+are replaced in this script only), so the run takes a second and reports
+the time a real sensor would need per reading:
+
+    cd ~/AllSkyKamera
+    python3 tests/tsl2591_autorange_benchmark.py [--readings 60]
+
+Each reading must end with CH0 inside [TARGET_LOW .. TARGET_HIGH] whenever
+some gain x integration combination can reach it (early dusk is too bright).
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import types
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+GAIN_FACTORS = {"LOW": 1, "MED": 25, "HIGH": 428, "MAX": 9876}
+
+
+class VirtualClock:
+    """Replaces time.sleep / time.monotonic inside the driver."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1700000000.0 + self.now
+
+
+class SimulatedTSL2591:
+    """CH0 = sky flux x gain factor x integration ms, clipped at full scale."""
+
+    def __init__(self, _i2c):
+        self.gain = "LOW"
+        self.integration_time = 300
+        self.flux = 1.0
+        self.reads = 0
+
+    @property
+    def raw_luminosity(self):
+        self.reads += 1
+        ms = self.integration_time
+        full = 37888 if ms <= 100 else 65535
+        ch0 = min(full, int(self.flux * GAIN_FACTORS[self.gain] * ms))
+        return ch0, int(ch0 * 0.4)
+
+    @property
+    def lux(self):
+        return self.flux * 0.01
+
+    @property
+    def visible(self):
+        return 0
+
+    @property
+    def infrared(self):
+        return 0
+
+    @property
+    def full_spectrum(self):
+        return 0
+
+
+def _install(state_file):
+    board = types.ModuleType("board")
+    board.SCL, board.SDA = 3, 2
+    busio = types.ModuleType("busio")
+    busio.I2C = lambda scl, sda: object()
+    tsl = types.ModuleType("adafruit_tsl2591")
+    tsl.TSL2591 = SimulatedTSL2591
+    tsl.Gain = types.SimpleNamespace(LOW="LOW", MED="MED", HIGH="HIGH", MAX="MAX")
+    tsl.IntegrationTime = types.SimpleNamespace(**{"TIME_%dMS" % ms: ms for ms in range(100, 700, 100)})
+    sys.modules.update({"board": board, "busio": busio, "adafruit_tsl2591": tsl})
+
+    cfg = types.ModuleType("askutils.config")
+    cfg.TSL2591_AUTORANGE_STATE_FILE = state_file
+
+    import askutils
+    sys.modules["askutils.config"] = cfg
+    askutils.config = cfg
+
+    from askutils.sensors import tsl2591
+    clock = VirtualClock()
+    tsl2591.time = clock
+    return tsl2591, clock
+
+
+def night(readings):
+    """Sky flux (counts per gain factor and ms) for each reading."""
+    levels = []
+    for i in range(readings):
+        x = i / float(max(1, readings - 1))
+        # dusk -> dark -> dawn, about six decades
+        flux = 10 ** (2.5 - 6.0 * math.sin(math.pi * x))
+        if 0.45 < x < 0.55:
+            flux *= 30.0        # cloud lit by the town
+        levels.append(flux)
+    return levels
+
+
+def run(tsl2591, clock, mode, levels):
+    tsl2591.AR_MODE = mode
+    tsl2591._sensor = None
+    tsl2591._i2c = None
+    if os.path.exists(tsl2591.AR_STATE_FILE):
+        os.remove(tsl2591.AR_STATE_FILE)
+
+    seconds, steps, misses = [], [], 0
+    for flux in levels:
+        sensor = tsl2591._make_or_get_sensor()
+        sensor.flux = flux
+        t0 = clock.now
+        data = tsl2591.read_tsl2591()
+        seconds.append(clock.now - t0)
+        steps.append(data["autorange_steps"])
+        reachable = any(
+            tsl2591.AR_TARGET_LOW <= flux * sens <= tsl2591.AR_TARGET_HIGH for sens, _, _ in tsl2591._combos()
+        )
+        if reachable and not (tsl2591.AR_TARGET_LOW <= data["ch0"] <= tsl2591.AR_TARGET_HIGH):
+            misses += 1
+    return seconds, steps, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TSL2591 autorange benchmark (simulated)")
+    parser.add_argument("--readings", type=int, default=60, help="Readings over the simulated night")
+    args = parser.parse_args()
+
+    failures = []
+    levels = night(args.readings)
+    with tempfile.TemporaryDirectory() as tmp:
+        tsl2591, clock = _install(os.path.join(tmp, "tsl2591_autorange.json"))
+        results = {mode: run(tsl2591, clock, mode, levels) for mode in ("sweep", "predictive")}
+
+    print()
+    print("TSL2591 time to reading, %d simulated readings" % args.readings)
+    print("  %-11s %10s %10s %10s %8s" % ("mode", "mean s", "max s", "steps", "misses"))
+    for mode, (seconds, steps, misses) in results.items():
+        print("  %-11s %10.2f %10.2f %10.1f %8d" % (
+            mode, sum(seconds) / len(seconds), max(seconds), sum(steps) / float(len(steps)), misses
+        ))
+        if misses:
+            failures.append("%s: %d readings outside the target range" % (mode, misses))
+
+    predictive = results["predictive"]
+    if max(predictive[1]) > tsl2591.AR_MAX_STEPS:
+        failures.append("predictive autorange exceeded %d steps" % tsl2591.AR_MAX_STEPS)
+    if sum(predictive[0]) >= sum(results["sweep"][0]):
+        failures.append("predictive autorange is not faster than the sweep")
+
+    for failure in failures:
+        print("  FAIL: %s" % failure)
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())